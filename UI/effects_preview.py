@@ -1,326 +1,462 @@
 # Realtime Effects Preview
 # Applies all visual effects to preview frames
+#
+# The UI thread publishes an immutable EffectParams snapshot (with a version number)
+# whenever an effect variable changes. The preview worker compiles that snapshot once
+# into a list of stage callables with preallocated buffers and only recompiles when
+# the version (or the source frame size) changes - no Tk calls per frame.
+#
+# Stages are split in two layers: the base layer (resize, background, colour, foreground)
+# is cached per source frame, the overlay layer (subtitle bar, subtitles, sticker) is redrawn
+# on a copy of it. Moving a sticker on a paused frame only re-blends the overlays.
 
 import cv2
 import numpy as np
-from PIL import Image as PILImage
+import collections
 import os
 
+from utils.color_lut import parse_color_filter, get_preview_table
+from UI.sticker_compositor import StickerLayer
+from UI.subtitle_overlay import SubtitleLayer
+from utils.subtitle_model import subtitle_style_from_settings
 
-def apply_realtime_effects(main_window, frame):
+
+EffectParams = collections.namedtuple('EffectParams', [
+    'target_ratio',     # Canvas aspect (w/h) or None = source aspect
+    'fill',             # True = cover canvas (crop), False = fit (borders)
+    'scale_w', 'scale_h',
+    'blur',             # Background blur amount (0 = black background)
+    'color_filter',     # Preset key from utils.color_lut (None = no filter)
+    'brightness',       # 1.0 = off (same meaning as the export's eq brightness)
+    'mirror',
+    'subtitle_bar',     # Bar height in output pixels (0 = off)
+    'subtitles',        # SubtitleTrack of the previewed file (None = off / not transcribed yet)
+    'subtitle_style',   # SubtitleStyle (same as the export's ASS style)
+    'subtitle_offset',  # Trim start in seconds (cue times are relative to it)
+    'stickers',         # Tuple of StickerSpec in overlay order (last = the one being edited)
+    'speed',            # Playback speed for the preview clock
+    'show_stats',       # Debug overlay
+])
+
+StickerSpec = collections.namedtuple('StickerSpec', [
+    'path',
+    'scale',            # Width as a fraction of the canvas width
+    'anchor',           # 'custom' or (horizontal, vertical) preset anchor
+    'x', 'y',           # Custom position (fraction of canvas)
+])
+
+# Fields that change the base layer (everything else only touches the overlays)
+BASE_FIELDS = ('target_ratio', 'fill', 'scale_w', 'scale_h', 'blur', 'color_filter', 'brightness', 'mirror')
+
+# Processing quality picked by the player's QualityGovernor
+PreviewQuality = collections.namedtuple('PreviewQuality', [
+    'proc_height',      # Base layer height (source frames are downscaled to this)
+    'blur_downscale',   # Background blur runs at 1/N canvas size
+])
+
+QUALITY_LADDER = [
+    PreviewQuality(360, 4),
+    PreviewQuality(480, 4),
+    PreviewQuality(540, 2),
+    PreviewQuality(720, 2),
+    PreviewQuality(900, 2),
+    PreviewQuality(1080, 2),
+]
+DEFAULT_QUALITY_LEVEL = 3  # 720p
+
+
+def parse_aspect_ratio(ratio_str):
+    if "9:16" in ratio_str: return 9/16
+    if "16:9" in ratio_str: return 16/9
+    if "1:1" in ratio_str: return 1.0
+    if "4:3" in ratio_str: return 4/3
+    return None
+
+
+def parse_sticker_anchor(pos):
+    """'custom' for drag position, else (horizontal, vertical) preset anchor"""
+    if "Tùy chỉnh" in pos or "Custom" in pos:
+        return 'custom'
+    if "giữa" in pos or "Center" in pos:
+        return ('center', 'center')
+    h = 'left' if ("trái" in pos or "Left" in pos) else 'right'
+    v = 'top' if ("trên" in pos or "Top" in pos) else 'bottom'
+    return (h, v)
+
+
+def read_effect_params(main_window, previous=None):
     """
-    Apply all realtime effects to a video frame using OpenCL (cv2.UMat) for GPU acceleration
-    Returns: processed frame ready for display (RGB format)
+    Build an EffectParams snapshot from the Tk variables (MAIN THREAD ONLY)
+
+    A variable that can't be read (e.g. half-typed number) keeps its previous value.
     """
-    
-    # 1. Convert to UMat (OpenCL) -> GPU Memory
-    u_frame = cv2.UMat(frame)
-    
-    # 2. Resize to preview quality (480p)
-    h_base, w_base = frame.shape[:2]
-    proc_h = 480
-    
-    if h_base > proc_h:
-        scale = proc_h / h_base
-        proc_w = int(w_base * scale)
-        if proc_w > 1280:
-            scale = 1280 / w_base
-            proc_w = 1280
-            proc_h = int(h_base * scale)
-        
-        frame_base = cv2.resize(u_frame, (proc_w, proc_h), interpolation=cv2.INTER_LINEAR)
-    else:
-        frame_base = u_frame
-        proc_w, proc_h = w_base, h_base
-
-    # 3. Determine Canvas Size
-    ratio_str = main_window.aspect_ratio.get()
-    
-    target_ratio = None
-    if "9:16" in ratio_str: target_ratio = 9/16
-    elif "16:9" in ratio_str: target_ratio = 16/9
-    elif "1:1" in ratio_str: target_ratio = 1.0
-    elif "4:3" in ratio_str: target_ratio = 4/3
-    
-    if target_ratio is None:
-        target_ratio = proc_w / proc_h
-
-    # Calculate Canvas dimensions
-    if target_ratio < 1.0:  # Portrait
-        c_h = proc_h
-        c_w = int(proc_h * target_ratio)
-    else:  # Landscape or Square
-        c_w = proc_w
-        c_h = int(proc_w / target_ratio)
-    
-    # 4. Create Background (OpenCL Accelerated Blur)
-    if main_window.enable_blur.get() and main_window.blur_amount.get() > 0:
-        blur_val = main_window.blur_amount.get()
-        blur_downscale = 2
-        blur_w = c_w // blur_downscale
-        blur_h = c_h // blur_downscale
-        
-        # Downscale & Blur on GPU
-        bg_small = cv2.resize(frame_base, (blur_w, blur_h), interpolation=cv2.INTER_LINEAR)
-        k = int(blur_val * 3) * 2 + 1
-        if k > 1:
-            bg_blurred = cv2.GaussianBlur(bg_small, (k, k), 0)
-        else:
-            bg_blurred = bg_small
-        
-        # Upscale
-        canvas = cv2.resize(bg_blurred, (c_w, c_h), interpolation=cv2.INTER_LINEAR)
-    else:
-        # Create black canvas (UMat)
-        # Note: cv2.UMat does not support np.zeros directly easily, 
-        # but we can create numpy zeros and convert, OR just use resize from a black source?
-        # Cleanest: Create numpy zeros then convert. Overheads are small for single frame creation.
-        canvas_np = np.zeros((c_h, c_w, 3), dtype=np.uint8)
-        canvas = cv2.UMat(canvas_np)
-
-    # 5. Prepare Foreground
-    scale_fit_preview = min(c_w / w_base, c_h / h_base)
-    w_fitted = w_base * scale_fit_preview
-    h_fitted = h_base * scale_fit_preview
-    
-    s_w = main_window.scale_w.get()
-    s_h = main_window.scale_h.get()
-    
-    new_scaled_w = max(1, int(w_fitted * s_w))
-    new_scaled_h = max(1, int(h_fitted * s_h))
-    
-    frame_fg = cv2.resize(frame_base, (new_scaled_w, new_scaled_h), interpolation=cv2.INTER_LINEAR)
-    
-    # Apply Color Filter (UMat compatible)
-    frame_fg = apply_color_filter(main_window, frame_fg)
-    
-    # Apply Brightness
-    frame_fg = apply_brightness(main_window, frame_fg)
-    
-    # Mirror
-    if main_window.mirror_enabled.get():
-        frame_fg = cv2.flip(frame_fg, 1)
-
-    # 6. Composition (Paste FG onto BG)
-    # Convert back to Numpy for complex slicing/indexing (OpenCV UMat slicing is limited/tricky)
-    # Getting data back from GPU to CPU here is necessary for pixel-precise compositing if UMat slicing fails,
-    # but let's try to keep it efficiently.
-    # Actually, simplest reliability upgrade is: Process heavy transforms (resize/blur/color) on GPU/UMat,
-    # then bring back to CPU for final composition.
-    
-    canvas_cpu = canvas.get() # Download from GPU
-    frame_fg_cpu = frame_fg.get() # Download from GPU
-    
-    y_off = (c_h - new_scaled_h) // 2
-    x_off = (c_w - new_scaled_w) // 2
-
-    y1, y2 = max(0, y_off), min(c_h, y_off + new_scaled_h)
-    x1, x2 = max(0, x_off), min(c_w, x_off + new_scaled_w)
-    
-    sy1, sy2 = max(0, -y_off), max(0, -y_off) + (y2 - y1)
-    sx1, sx2 = max(0, -x_off), max(0, -x_off) + (x2 - x1)
-
-    if (y2 > y1) and (x2 > x1):
-         canvas_cpu[y1:y2, x1:x2] = frame_fg_cpu[sy1:sy2, sx1:sx2]
-    
-    # 7. Subtitle Bar & Sticker (CPU operations are fast enough for overlay)
-    canvas_cpu = apply_subtitle_bar(main_window, canvas_cpu, c_h, c_w)
-    canvas_cpu = apply_sticker_overlay(main_window, canvas_cpu, c_h, c_w)
-    
-    # 8. RGB Convert (CPU or GPU? CPU is fine here as we are already on CPU)
-    # Could move back to GPU for CVTColor but transfer cost might outweigh.
-    final_frame = cv2.cvtColor(canvas_cpu, cv2.COLOR_BGR2RGB)
-    
-    return final_frame
-
-
-def apply_color_filter(main_window, frame):
-    """Apply color filter to frame (OpenCL optimized)"""
-    color_filter = main_window.color_filter.get()
-    if not color_filter or "None" in color_filter or "Gốc" in color_filter:
-        return frame
-    
-    # Note: 'frame' here is likely a UMat from the caller
-    
-    if "Đen Trắng" in color_filter or "B&W" in color_filter:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        frame = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-        
-    elif "Sepia" in color_filter or "Cổ điển" in color_filter:
-        # Sepia matrix
-        kernel = np.array([[0.272, 0.534, 0.131],
-                          [0.349, 0.686, 0.168],
-                          [0.393, 0.769, 0.189]])
-        # cv2.transform supports UMat
-        frame = cv2.transform(frame, kernel)
-        
-    elif "Vintage" in color_filter or "Phim cũ" in color_filter:
-        # Vintage effect (Desaturate + Tint)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        # Split channels: UMat does not support direct indexing like hsv[:,:,1]
-        h, s, v = cv2.split(hsv)
-        
-        # Desaturate: s * 0.8
-        s = cv2.multiply(s, 0.8) # UMat safe
-        
-        hsv = cv2.merge([h, s, v])
-        frame = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
-        
-        # Tint channels: R*1.1, G*1.0, B*0.9 (approx vintage)
-        b, g, r = cv2.split(frame)
-        b = cv2.multiply(b, 0.9)
-        r = cv2.multiply(r, 1.1)
-        # Recast to prevent overflow quirks (though multiply handles it usually)
-        frame = cv2.merge([b, g, r])
-        
-    elif "Cold" in color_filter or "Lạnh" in color_filter:
-        # Boost Blue, Reduce Red
-        b, g, r = cv2.split(frame)
-        b = cv2.multiply(b, 1.3)
-        r = cv2.multiply(r, 0.8)
-        frame = cv2.merge([b, g, r])
-        
-    elif "Warm" in color_filter or "Ấm" in color_filter:
-        # Boost Red, Reduce Blue
-        b, g, r = cv2.split(frame)
-        b = cv2.multiply(b, 0.7)
-        r = cv2.multiply(r, 1.3)
-        frame = cv2.merge([b, g, r])
-    
-    return frame
-
-
-def apply_brightness(main_window, frame):
-    """Apply brightness adjustment (OpenCL compatible)"""
-    if main_window.enable_brightness.get():
-        brightness = main_window.brightness.get()
-        if brightness != 1.0:
-            # Alpha=contrast check, Beta=brightness.
-            # Here user wants "brightness" multiplier style.
-            # cv2.convertScaleAbs(frame, alpha=brightness, beta=0) is perfect for this.
-            # It performs: out = frame * alpha + beta
-            frame = cv2.convertScaleAbs(frame, alpha=brightness, beta=0)
-    return frame
-
-
-def apply_subtitle_bar(main_window, canvas, c_h, c_w):
-    """Draw subtitle black bar"""
-    if main_window.enable_subtitle_bar.get():
-        bar_height_px = main_window.subtitle_bar_height.get()
-        bar_height_preview = int(bar_height_px * (c_h / 1280.0))
-        bar_height_preview = min(bar_height_preview, c_h // 3)
-        
-        if bar_height_preview > 0:
-            cv2.rectangle(canvas, 
-                        (0, c_h - bar_height_preview),
-                        (c_w, c_h),
-                        (0, 0, 0),
-                        -1)
-    return canvas
-
-
-# Cache for sticker to avoid reloading every frame (HUGE performance boost)
-_sticker_cache = {
-    'path': None,
-    'scale': None,
-    'canvas_size': None,
-    'sticker_rgba': None,  # Pre-processed RGBA
-    'sticker_bgr': None,   # BGR channels
-    'sticker_alpha': None  # Alpha mask (pre-normalized)
-}
-
-def apply_sticker_overlay(main_window, canvas, c_h, c_w):
-    """Overlay sticker on canvas (OPTIMIZED - No lag!)"""
-    if not main_window.enable_sticker.get():
-        return canvas
-    
-    sticker_path = main_window.sticker_path.get()
-    if not sticker_path or not os.path.exists(sticker_path):
-        return canvas
-    
+    def get(name, default):
+        try:
+            return getattr(main_window, name).get()
+        except Exception:
+            return default
+
+    prev = previous._asdict() if previous else {}
+
+    stickers = ()
+    if get('enable_sticker', False):
+        stickers = read_sticker_specs(main_window, get, prev.get('stickers') or ())
+
+    blur = get('blur_amount', prev.get('blur', 0)) if get('enable_blur', False) else 0
+    brightness = get('brightness', prev.get('brightness', 1.0)) if get('enable_brightness', False) else 1.0
+    bar = get('subtitle_bar_height', prev.get('subtitle_bar', 0)) if get('enable_subtitle_bar', False) else 0
+    speed = get('speed_factor', prev.get('speed', 1.0)) if get('enable_speed', False) else 1.0
+    subtitles = getattr(main_window, 'preview_subtitles', None) if get('enable_subtitles', False) else None
     try:
-        sticker_scale = main_window.sticker_scale.get()
-        cache_key = (sticker_path, sticker_scale, c_w, c_h)
-        
-        # Check cache - Only reload if path/scale/size changed
-        if (_sticker_cache['path'] != sticker_path or 
-            _sticker_cache['scale'] != sticker_scale or
-            _sticker_cache['canvas_size'] != (c_w, c_h)):
-            
-            # Load and process sticker (only when needed)
-            sticker_pil = PILImage.open(sticker_path)
-            
-            if sticker_pil.mode != 'RGBA':
-                sticker_pil = sticker_pil.convert('RGBA')
-            
-            sticker_w = int(c_w * sticker_scale)
-            sticker_h = int(sticker_w * (sticker_pil.height / sticker_pil.width))
-            
-            sticker_pil = sticker_pil.resize((sticker_w, sticker_h), PILImage.Resampling.LANCZOS)
-            sticker_rgba = np.array(sticker_pil)
-            
-            # Pre-process for fast blending
-            if sticker_rgba.shape[2] == 4:
-                # Convert RGBA to BGR (OpenCV format)
-                sticker_bgr = cv2.cvtColor(sticker_rgba, cv2.COLOR_RGBA2BGR)
-                # Pre-normalize alpha to 0-1 range
-                sticker_alpha = sticker_rgba[:, :, 3:4].astype(np.float32) / 255.0
+        # Same settings keys the export builds its ASS style from
+        subtitle_style = subtitle_style_from_settings(main_window.get_subtitle_style_settings())
+    except Exception:
+        subtitle_style = prev.get('subtitle_style') or subtitle_style_from_settings({})
+    resize_mode = get('resize_mode', "")
+
+    return EffectParams(
+        target_ratio=parse_aspect_ratio(get('aspect_ratio', "")),
+        fill="Fill" in resize_mode or "Lấp đầy" in resize_mode,
+        scale_w=get('scale_w', prev.get('scale_w', 1.0)),
+        scale_h=get('scale_h', prev.get('scale_h', 1.0)),
+        blur=blur,
+        color_filter=parse_color_filter(get('color_filter', "")),
+        brightness=brightness,
+        mirror=bool(get('mirror_enabled', False)),
+        subtitle_bar=int(bar),
+        subtitles=subtitles or None,
+        subtitle_style=subtitle_style,
+        subtitle_offset=float(get('start_time', prev.get('subtitle_offset', 0)) or 0),
+        stickers=stickers,
+        speed=max(0.1, speed),
+        show_stats=bool(get('show_preview_stats', False)),
+    )
+
+
+def read_sticker_specs(main_window, get, previous=()):
+    """
+    Stickers of the video (stickers_list, same fallback as the export)
+
+    The last entry is the active sticker: its position/scale come from the
+    sticker variables, which the drag handlers and controls write.
+    """
+    active_prev = previous[-1] if previous else None
+    active = dict(
+        scale=get('sticker_scale', active_prev.scale if active_prev else 0.2),
+        anchor=parse_sticker_anchor(get('sticker_pos', "")),
+        x=get('sticker_drag_x', active_prev.x if active_prev else 0.8),
+        y=get('sticker_drag_y', active_prev.y if active_prev else 0.8),
+    )
+
+    entries = list(getattr(main_window, 'stickers_list', None) or [])
+    if not entries:
+        # Legacy single sticker
+        path = get('sticker_path', "")
+        return (StickerSpec(path=path, **active),) if path and os.path.exists(path) else ()
+
+    specs = []
+    for entry in entries[:-1]:
+        path = entry.get('path', '')
+        if path and os.path.exists(path):
+            specs.append(StickerSpec(
+                path=path,
+                scale=float(entry.get('scale', 0.2)),
+                anchor=parse_sticker_anchor(entry.get('pos', "")),
+                x=float(entry.get('x', 0.0)),
+                y=float(entry.get('y', 0.0)),
+            ))
+    path = entries[-1].get('path', '')
+    if path and os.path.exists(path):
+        specs.append(StickerSpec(path=path, **active))
+    return tuple(specs)
+
+
+class EffectParamsPublisher:
+    """
+    Publishes (version, EffectParams) from the UI thread
+
+    Variable traces coalesce into one rebuild per Tk idle cycle. The worker
+    reads current() - a single attribute read, no Tcl round trip.
+    """
+
+    WATCHED_VARS = (
+        'aspect_ratio', 'resize_mode', 'scale_w', 'scale_h',
+        'enable_blur', 'blur_amount', 'color_filter',
+        'enable_brightness', 'brightness', 'mirror_enabled',
+        'enable_subtitle_bar', 'subtitle_bar_height',
+        'enable_subtitles', 'start_time', 'subtitle_font_size',
+        'enable_sticker', 'sticker_path', 'sticker_scale', 'sticker_pos',
+        'sticker_drag_x', 'sticker_drag_y',
+        'enable_speed', 'speed_factor', 'show_preview_stats',
+    )
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self._pending = False
+        self._snapshot = (1, read_effect_params(main_window))
+        for name in self.WATCHED_VARS:
+            var = getattr(main_window, name, None)
+            if var is not None:
+                var.trace_add("write", self._on_change)
+
+    def _on_change(self, *args):
+        if self._pending:
+            return
+        self._pending = True
+        self.main_window.root.after_idle(self.publish)
+
+    def invalidate(self):
+        """Schedule a rebuild for state that isn't a Tk variable (e.g. stickers_list, preview_subtitles)"""
+        self._on_change()
+
+    def publish(self):
+        """Rebuild the snapshot now (main thread)"""
+        self._pending = False
+        version, params = self._snapshot
+        new_params = read_effect_params(self.main_window, params)
+        if new_params != params:
+            self._snapshot = (version + 1, new_params)
+
+    def current(self):
+        """(version, EffectParams) - safe from any thread"""
+        return self._snapshot
+
+
+# === COMPILED PIPELINE ===
+
+class CompiledEffectPipeline:
+    """Effect stages prebuilt for one (params version, source frame size, display size, quality)"""
+
+    # Rotating RGB outputs: frames wait in the player's output queue while the next one renders
+    OUTPUT_POOL = 6
+
+    def __init__(self, params, version, frame_shape, display_size=None, quality=None, previous=None):
+        self.params = params
+        self.version = version
+        self.frame_shape = frame_shape
+        self.display_size = display_size
+        self.quality = quality or QUALITY_LADDER[DEFAULT_QUALITY_LEVEL]
+        self.base_signature = (frame_shape, self.quality) + tuple(getattr(params, f) for f in BASE_FIELDS)
+        self.base_stages = []
+        self.overlay_stages = []
+        self.base_valid = False
+        self._compile(params, frame_shape)
+        self._compile_output(display_size)
+
+        # Only overlays (or the display size) changed -> keep the previous pipeline's rendered base layer
+        if previous is not None and previous.base_signature == self.base_signature:
+            self.layer = previous.layer
+            self.base_valid = previous.base_valid
+            if not self.overlay_stages:
+                self.canvas = self.layer
+
+    def run(self, frame, reuse_base=False, t=0.0):
+        """
+        Render frame to RGB at display size
+
+        Args:
+            frame: BGR source frame
+            reuse_base: True if frame is the one rendered last time (base layer still valid)
+            t: Preview time in seconds (animated stickers, subtitles)
+        """
+        self.src = frame
+        self._t = t
+        if not (reuse_base and self.base_valid):
+            for stage in self.base_stages:
+                stage()
+            self.base_valid = True
+        for stage in self.overlay_stages:
+            stage()
+        src = self.canvas
+        if self._fit_buf is not None:
+            # Container-fit resize here (worker) instead of PIL in the Tk thread
+            cv2.resize(self.canvas, self._fit_size, dst=self._fit_buf, interpolation=self._fit_interp)
+            src = self._fit_buf
+        out = self._out_pool[self._out_idx]
+        self._out_idx = (self._out_idx + 1) % len(self._out_pool)
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=out)
+        return out
+
+    def _compile_output(self, display_size):
+        """Output buffers at the size the preview label shows ("Contain" fit), or canvas size"""
+        c_w, c_h = self.c_w, self.c_h
+        out_w, out_h = c_w, c_h
+        self._fit_buf = None
+        if display_size and display_size[0] > 50 and display_size[1] > 50:
+            w_cont, h_cont = display_size
+            if c_w / c_h > w_cont / h_cont:
+                out_w, out_h = w_cont, max(1, int(w_cont * c_h / c_w))  # Width constrained
             else:
-                sticker_bgr = cv2.cvtColor(sticker_rgba, cv2.COLOR_RGB2BGR)
-                sticker_alpha = None
-            
-            # Update cache
-            _sticker_cache['path'] = sticker_path
-            _sticker_cache['scale'] = sticker_scale
-            _sticker_cache['canvas_size'] = (c_w, c_h)
-            _sticker_cache['sticker_bgr'] = sticker_bgr
-            _sticker_cache['sticker_alpha'] = sticker_alpha
-        
-        # Use cached sticker
-        sticker_bgr = _sticker_cache['sticker_bgr']
-        sticker_alpha = _sticker_cache['sticker_alpha']
-        sticker_h, sticker_w = sticker_bgr.shape[:2]
-        
-        # Calculate position
-        sticker_pos = main_window.sticker_pos.get()
-        margin = 20
-        
-        if "Tùy chỉnh" in sticker_pos or "Custom" in sticker_pos:
-            x_pos = int(main_window.sticker_drag_x.get() * c_w)
-            y_pos = int(main_window.sticker_drag_y.get() * c_h)
+                out_w, out_h = max(1, int(h_cont * c_w / c_h)), h_cont  # Height constrained
+            if (out_w, out_h) != (c_w, c_h):
+                self._fit_size = (out_w, out_h)
+                self._fit_buf = np.empty((out_h, out_w, 3), dtype=np.uint8)
+                self._fit_interp = cv2.INTER_AREA if out_w < c_w else cv2.INTER_LINEAR
+        self._out_pool = [np.empty((out_h, out_w, 3), dtype=np.uint8) for _ in range(self.OUTPUT_POOL)]
+        self._out_idx = 0
+
+    def _compile(self, p, frame_shape):
+        h_base, w_base = frame_shape[:2]
+
+        # 1. Base size (quality height max, 16:9 width max)
+        proc_h = self.quality.proc_height
+        max_w = proc_h * 16 // 9
+        if h_base > proc_h:
+            scale = proc_h / h_base
+            proc_w = int(w_base * scale)
+            if proc_w > max_w:
+                scale = max_w / w_base
+                proc_w = max_w
+                proc_h = int(h_base * scale)
+            self.base = np.empty((proc_h, proc_w, 3), dtype=np.uint8)
+            self.base_stages.append(self._stage_base_resize)
         else:
-            x_pos = c_w - sticker_w - margin
-            y_pos = c_h - sticker_h - margin
-            
-            if "trái" in sticker_pos or "Left" in sticker_pos:
-                x_pos = margin
-            if "trên" in sticker_pos or "Top" in sticker_pos:
-                y_pos = margin
-            if "giữa" in sticker_pos or "Center" in sticker_pos:
-                x_pos = (c_w - sticker_w) // 2
-                y_pos = (c_h - sticker_h) // 2
-        
-        x_pos = max(0, min(x_pos, c_w - sticker_w))
-        y_pos = max(0, min(y_pos, c_h - sticker_h))
-        
-        y1, y2 = y_pos, y_pos + sticker_h
-        x1, x2 = x_pos, x_pos + sticker_w
-        
-        # Bounds check
-        if y2 > c_h or x2 > c_w:
-            return canvas
-        
-        # OPTIMIZED Alpha blending using NumPy vectorization (100x faster!)
-        if sticker_alpha is not None:
-            # Vectorized operation - No Python loops!
-            roi = canvas[y1:y2, x1:x2].astype(np.float32)
-            blended = sticker_alpha * sticker_bgr.astype(np.float32) + (1 - sticker_alpha) * roi
-            canvas[y1:y2, x1:x2] = blended.astype(np.uint8)
+            self.base = None
+            proc_w, proc_h = w_base, h_base
+
+        # 2. Canvas size
+        target_ratio = p.target_ratio or proc_w / proc_h
+        if target_ratio < 1.0:  # Portrait
+            c_h = proc_h
+            c_w = int(proc_h * target_ratio)
+        else:  # Landscape or Square
+            c_w = proc_w
+            c_h = int(proc_w / target_ratio)
+        self.c_w, self.c_h = c_w, c_h
+        self.layer = np.zeros((c_h, c_w, 3), dtype=np.uint8)  # Base layer (cached per source frame)
+
+        # 3. Foreground geometry
+        if p.fill:
+            scale_fit = max(c_w / w_base, c_h / h_base)
+        else:
+            scale_fit = min(c_w / w_base, c_h / h_base)
+        fg_w = max(1, int(w_base * scale_fit * p.scale_w))
+        fg_h = max(1, int(h_base * scale_fit * p.scale_h))
+        self.fg = np.empty((fg_h, fg_w, 3), dtype=np.uint8)
+
+        y_off = (c_h - fg_h) // 2
+        x_off = (c_w - fg_w) // 2
+        y1, y2 = max(0, y_off), min(c_h, y_off + fg_h)
+        x1, x2 = max(0, x_off), min(c_w, x_off + fg_w)
+        sy1, sx1 = max(0, -y_off), max(0, -x_off)
+        sy2, sx2 = sy1 + (y2 - y1), sx1 + (x2 - x1)
+        if p.mirror:
+            # Paste the mirrored FG by reading source columns right-to-left
+            sx1, sx2 = fg_w - sx2, fg_w - sx1
+        self._fg_covers = y1 == 0 and x1 == 0 and y2 == c_h and x2 == c_w
+        self._paste = (slice(y1, y2), slice(x1, x2), slice(sy1, sy2), slice(sx1, sx2)) if (y2 > y1 and x2 > x1) else None
+
+        # 4. Background
+        if p.blur > 0 and not self._fg_covers:
+            d = self.quality.blur_downscale
+            self._blur_small = np.empty((max(1, c_h // d), max(1, c_w // d), 3), dtype=np.uint8)
+            self._blur_tmp = np.empty_like(self._blur_small)
+            # Kernel tuned at 720p / half size: scale it so the look doesn't change with quality
+            k = int(p.blur * 3 * (2 / d) * (self.quality.proc_height / 720)) * 2 + 1
+            self._blur_k = (k, k) if k > 1 else None
+            self.base_stages.append(self._stage_blur_background)
+        elif not self._fg_covers:
+            self.base_stages.append(self._stage_black_background)
+
+        # 5. Foreground + colour
+        self.base_stages.append(self._stage_foreground)
+        # Colour preset + brightness: one lookup in the shared LUT (matches the export's lut3d)
+        table = get_preview_table(p.color_filter, p.brightness)
+        if table is not None:
+            self._lut_table = table
+            self._lut_q = np.empty_like(self.fg)
+            self._lut_idx = np.empty(self.fg.shape[:2], dtype=np.uint32)
+            self.base_stages.append(self._stage_color_lut)
+        if self._paste is not None:
+            self.base_stages.append(self._stage_paste_mirrored if p.mirror else self._stage_paste)
+
+        # 6. Subtitle bar
+        if p.subtitle_bar > 0:
+            bar = min(int(p.subtitle_bar * (c_h / 1280.0)), c_h // 3)
+            if bar > 0:
+                self._bar_rows = slice(c_h - bar, c_h)
+                self.overlay_stages.append(self._stage_subtitle_bar)
+
+        # 7. Subtitles (cue raster cached per cue, blended per frame)
+        self._subtitles = None
+        if p.subtitles:
+            self._subtitles = SubtitleLayer(p.subtitles, p.subtitle_style, p.subtitle_offset, c_w, c_h)
+            self.overlay_stages.append(self._stage_subtitles)
+
+        # 8. Stickers (decoded sprites are cached across recompiles: dragging only moves them)
+        self._stickers = StickerLayer(p.stickers, c_w, c_h) if p.stickers else None
+        if self._stickers:
+            self.overlay_stages.append(self._stage_stickers)
+
+        # Overlays draw on a copy so the base layer stays reusable; without overlays the base is the canvas
+        if self.overlay_stages:
+            self.canvas = np.empty_like(self.layer)
+            self.overlay_stages.insert(0, self._stage_copy_layer)
         else:
-            # No alpha - Direct paste
-            canvas[y1:y2, x1:x2] = sticker_bgr
-    
-    except Exception as e:
-        pass
-    
-    return canvas
+            self.canvas = self.layer
+
+    # --- Stages (run per frame, write into preallocated buffers) ---
+
+    def _base(self):
+        return self.base if self.base is not None else self.src
+
+    def _stage_base_resize(self):
+        cv2.resize(self.src, (self.base.shape[1], self.base.shape[0]), dst=self.base, interpolation=cv2.INTER_LINEAR)
+
+    def _stage_blur_background(self):
+        small = self._blur_small
+        cv2.resize(self._base(), (small.shape[1], small.shape[0]), dst=small, interpolation=cv2.INTER_LINEAR)
+        if self._blur_k:
+            cv2.GaussianBlur(small, self._blur_k, 0, dst=self._blur_tmp)
+            small = self._blur_tmp
+        cv2.resize(small, (self.c_w, self.c_h), dst=self.layer, interpolation=cv2.INTER_LINEAR)
+
+    def _stage_black_background(self):
+        self.layer.fill(0)
+
+    def _stage_foreground(self):
+        cv2.resize(self._base(), (self.fg.shape[1], self.fg.shape[0]), dst=self.fg, interpolation=cv2.INTER_LINEAR)
+
+    def _stage_color_lut(self):
+        # 6 bits per channel: index = (b>>2)*4096 + (g>>2)*64 + (r>>2)
+        q, idx = self._lut_q, self._lut_idx
+        np.right_shift(self.fg, 2, out=q)
+        np.copyto(idx, q[:, :, 0])
+        idx <<= 6
+        idx += q[:, :, 1]
+        idx <<= 6
+        idx += q[:, :, 2]
+        np.take(self._lut_table, idx, axis=0, out=self.fg, mode='clip')
+
+    def _stage_paste(self):
+        y, x, sy, sx = self._paste
+        self.layer[y, x] = self.fg[sy, sx]
+
+    def _stage_paste_mirrored(self):
+        y, x, sy, sx = self._paste
+        self.layer[y, x] = self.fg[sy, sx][:, ::-1]
+
+    def _stage_copy_layer(self):
+        np.copyto(self.canvas, self.layer)
+
+    def _stage_subtitle_bar(self):
+        self.canvas[self._bar_rows] = 0
+
+    def _stage_subtitles(self):
+        self._subtitles.draw(self.canvas, self._t)
+
+    def _stage_stickers(self):
+        box = self._stickers.draw(self.canvas, self._t)
+        if box:
+            # Selection Border (CapCut Style) - shows the active sticker can be dragged
+            cv2.rectangle(self.canvas, box[:2], box[2:], (0, 0, 0), 3)  # Outer Black
+            cv2.rectangle(self.canvas, box[:2], box[2:], (255, 255, 255), 1)  # Inner White
+
+
+def apply_realtime_effects(main_window, frame):
+    """
+    One-shot helper: apply all realtime effects to a single frame (MAIN THREAD - reads Tk variables)
+    Returns: processed frame ready for display (RGB format)
+    """
+    pipeline = CompiledEffectPipeline(read_effect_params(main_window), 0, frame.shape)
+    return pipeline.run(frame).copy()
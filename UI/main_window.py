@@ -13,7 +13,6 @@ from UI.modules.config_manager import ConfigManager, APP_VERSION, DEFAULT_INPUT_
 from UI.modules.custom_widgets import DraggableValueLabel
 
 # --- CONFIGURATION ---
-import cv2
 from PIL import Image, ImageTk
 
 # Import utils
@@ -34,6 +33,8 @@ from utils.background_helper import enable_background_processing, notify_video_c
 
 # NEW: Preview player modules
 from UI.preview_player import VideoPreviewPlayer
+from UI.preview_sources import PREVIEW_BACKENDS
+from UI.effects_preview import EffectParamsPublisher
 from utils.giphy_api import GiphyAPI
 
 # --- THEME COLORS (Tuple: Light, Dark) ---
@@ -159,6 +160,15 @@ class VideoEditorGUI:
         
         # Settings Variables
         self.config_manager.init_settings_vars()
+
+        # Subtitles of the previewed file (SubtitleTrack, same object type the export burns in)
+        self.preview_subtitles = None
+        self._preview_subtitles_key = None
+        self._preview_subtitles_file = None
+        self._preview_subtitles_job = None
+        
+        # Immutable effect snapshot for the preview worker (rebuilt on variable change)
+        self.effect_params = EffectParamsPublisher(self)
         
         # Preview State
         self.current_video_cap = None
@@ -181,7 +191,9 @@ class VideoEditorGUI:
         self.load_file_list()
         
         # Initialize Preview Player (NEW)
-        self.preview_player = VideoPreviewPlayer(self)
+        self._thread_preview_player = VideoPreviewPlayer(self)
+        self._preview_engine = None  # Separate-process engine, created on first use
+        self.preview_player = self._thread_preview_player
         
         # System Tray Support
         self.tray_icon = None
@@ -199,6 +211,20 @@ class VideoEditorGUI:
         
         # Background Checks
         threading.Thread(target=self.check_updates_bg, daemon=True).start()
+        threading.Thread(target=self._warm_up_subtitle_fonts, daemon=True).start()
+        
+        # Preview subtitles follow the subtitle/trim settings of the previewed file
+        for var in (self.enable_subtitles, self.subtitle_language, self.asr_profile,
+                    self.force_google_subs, self.start_time, self.duration):
+            var.trace_add("write", self._schedule_preview_subtitles)
+    
+    def _warm_up_subtitle_fonts(self):
+        """Build the shared subtitle font cache in the background (first run only takes long)"""
+        try:
+            from utils.subtitle_fonts import warm_up_subtitle_fonts
+            warm_up_subtitle_fonts(log_callback=self.log)
+        except Exception as e:
+            print(f"Subtitle font warm-up error: {e}")
     
     def setup_system_tray(self):
         """Setup system tray icon for background processing"""
@@ -301,6 +327,17 @@ class VideoEditorGUI:
             # Stop Preview
             self.stop_preview = True
             self.is_paused = False # Break pause loop
+
+            # Stop background proxy encodes
+            try:
+                from utils.proxy_media import cancel_proxy_jobs
+                cancel_proxy_jobs()
+            except Exception:
+                pass
+
+            # Stop the preview engine process (frees its shared memory)
+            if self._preview_engine is not None:
+                self._preview_engine.shutdown()
             
             # Stop Processing
             if self.is_processing:
@@ -454,7 +491,7 @@ class VideoEditorGUI:
         self.quit_app()
 
     def cleanup_old_srt_files(self):
-        """Clean up old temporary SRT files from previous sessions"""
+        """Clean up temporary SRT files left by older versions (subtitles are ASS files in the transcript cache now)"""
         try:
             srt_dir = "srt_files"
             if os.path.exists(srt_dir):
@@ -941,6 +978,7 @@ class VideoEditorGUI:
             try:
                 self.preview_label.configure(image='', text="⏸️ Đang dừng preview để xóa file...")
                 self.preview_label.imgtk = None
+                self._preview_photo = None
                 self.latest_frame = None
             except: 
                 pass
@@ -979,6 +1017,11 @@ class VideoEditorGUI:
             
             # STEP 9: Kill ALL FFmpeg processes to release file handles
             print("🔪 Killing FFmpeg processes...")
+            try:
+                from utils.proxy_media import cancel_proxy_jobs
+                cancel_proxy_jobs()
+            except Exception:
+                pass
             try:
                 import subprocess
                 # Kill all ffmpeg and ffprobe processes
@@ -1121,6 +1164,7 @@ class VideoEditorGUI:
         # 1. Video Player Area (Top)
         preview_container = ctk.CTkFrame(parent, fg_color="#000000", corner_radius=0)
         preview_container.pack(fill="both", expand=True, padx=0, pady=0)
+        self.preview_container = preview_container
         
         self.preview_label = ctk.CTkLabel(preview_container, text="BẤM VÀO VIDEO ĐỂ XEM TRƯỚC", font=("Segoe UI", 14, "bold"), text_color="#555")
         self.preview_label.pack(fill="both", expand=True)
@@ -1150,6 +1194,7 @@ class VideoEditorGUI:
         # === VIDEO PLAYER CONTROLS ===
         controls_frame = ctk.CTkFrame(preview_container, fg_color=get_color(COLOR_BG_HEADER), height=60, corner_radius=0)
         controls_frame.pack(fill="x", side="bottom")
+        self.preview_controls_frame = controls_frame
         
         # Play/Pause Button
         self.is_paused = False
@@ -1446,13 +1491,24 @@ class VideoEditorGUI:
         
         # Category Selector
         # Just use a combobox for simpler UI in narrow space
-        cats = ["All", "Custom", "Emoji", "Watermark"]
+        cats = ["All", "Custom", "Emoji", "Watermark", "Animated", "Static"]
         cat_combo = ctk.CTkComboBox(category_frame, variable=self.sticker_category, values=cats, width=150, height=24, command=lambda e: self.refresh_sticker_grid())
         cat_combo.pack(side="left", padx=5)
         
         # Default to All
         self.sticker_category.set("All")
         
+        # Offline search (names, Giphy titles, search queries, tags)
+        search_row = ctk.CTkFrame(lib_frame, fg_color="transparent")
+        search_row.pack(fill="x", padx=5, pady=(0, 5))
+        self.sticker_search_var = tk.StringVar()
+        self._sticker_search_job = None
+        search_entry = ctk.CTkEntry(search_row, textvariable=self.sticker_search_var, height=26,
+                                    placeholder_text="🔍 Tìm sticker đã tải (Enter: tìm thêm Giphy)")
+        search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        search_entry.bind("<KeyRelease>", lambda e: self._schedule_sticker_search())
+        search_entry.bind("<Return>", lambda e: self.search_stickers_offline_first())
+        
         # Grid Container
         self.sticker_grid_frame = ctk.CTkFrame(lib_frame, fg_color="transparent")
         self.sticker_grid_frame.pack(fill="both", expand=True, padx=5, pady=5)
@@ -1537,8 +1593,21 @@ class VideoEditorGUI:
             for key, val in library.categories.items():
                 if key not in priority_order:
                     stickers.extend(val)
+        elif category in ("Animated", "Static"):
+            want_animated = category == "Animated"
+            stickers = [name for names in library.categories.values() for name in names
+                        if library.get_sticker_path(name) and library.is_animated(name) == want_animated]
         else:
             stickers = library.categories.get(category, [])
+        
+        # Offline search: best matches first, limited to the category
+        query = self.sticker_search_var.get().strip() if hasattr(self, 'sticker_search_var') else ""
+        if query:
+            in_category = set(stickers)
+            stickers = [name for name in library.search(query) if name in in_category]
+            if not stickers:
+                ctk.CTkLabel(self.sticker_grid_frame, text=f"Không có sticker khớp '{query}'\n(Enter để tìm trên Giphy)").pack(pady=20)
+                return
             
         print(f"[DEBUG] Total stickers found: {len(stickers)}")
         if category == "Reaction":
@@ -1553,6 +1622,7 @@ class VideoEditorGUI:
         
         # Create grid (3 columns)
         cols = 3
+        missing_thumbs = False
         
         for i, sticker_name in enumerate(stickers):
             row = i // cols
@@ -1565,14 +1635,14 @@ class VideoEditorGUI:
             
             sticker_path = library.get_sticker_path(sticker_name)
             
-            if sticker_path and os.path.exists(sticker_path):
-                try:
-                    from PIL import Image
-                    img_pil = Image.open(sticker_path)
-                    # Convert to CTkImage
-                    btn_image = ctk.CTkImage(light_image=img_pil, dark_image=img_pil, size=(40, 40))
-                except:
+            if sticker_path:
+                # Thumbnail from the library atlas (built in background, never opens the GIF here)
+                thumb = library.thumbnail(sticker_name)
+                if thumb is not None:
+                    btn_image = ctk.CTkImage(light_image=thumb, dark_image=thumb, size=(40, 40))
+                else:
                     btn_text = sticker_name[:2]
+                    missing_thumbs = True
             else:
                 # Is Emoji?
                 btn_text = sticker_name.split()[0] if " " in sticker_name else sticker_name
@@ -1598,6 +1668,37 @@ class VideoEditorGUI:
             
         # Configure columns
         self.sticker_grid_frame.grid_columnconfigure((0, 1, 2), weight=1)
+        
+        # Redraw once the missing thumbnails exist
+        if missing_thumbs:
+            def on_thumbs_built(count):
+                if count:
+                    self.root.after(0, self.refresh_sticker_grid)
+            library.build_thumbnails(on_done=on_thumbs_built)
+    
+    def _schedule_sticker_search(self):
+        """Filter the sticker grid 200 ms after the last keystroke"""
+        if self._sticker_search_job:
+            self.root.after_cancel(self._sticker_search_job)
+        self._sticker_search_job = self.root.after(200, self._run_sticker_search)
+    
+    def _run_sticker_search(self):
+        self._sticker_search_job = None
+        self.refresh_sticker_grid()
+    
+    def search_stickers_offline_first(self):
+        """Enter in the sticker search: local results first, Giphy only when there are too few"""
+        if self._sticker_search_job:
+            self.root.after_cancel(self._sticker_search_job)
+            self._sticker_search_job = None
+        self.refresh_sticker_grid()
+        
+        query = self.sticker_search_var.get().strip()
+        if not query:
+            return
+        from UI.sticker import get_sticker_library
+        if len(get_sticker_library().search(query)) < STICKER_LOCAL_MIN_RESULTS:
+            self.open_online_search_dialog(query=query)
     
     def add_sticker_to_canvas(self, path):
         # Alias for add_sticker_to_video to match my new logic
@@ -1662,6 +1763,10 @@ class VideoEditorGUI:
         # Debug log
         print(f"[DEBUG] Refreshing stickers list. Total stickers: {len(self.stickers_list)}")
         
+        # stickers_list isn't a Tk variable: tell the preview to pick up the change
+        if hasattr(self, 'effect_params'):
+            self.effect_params.invalidate()
+        
         if not self.stickers_list:
             ctk.CTkLabel(self.video_stickers_frame, text="Chưa có sticker nào trong video", 
                     text_color="#666", font=("Segoe UI", 9)).pack(pady=20)
@@ -1921,6 +2026,12 @@ class VideoEditorGUI:
         self.create_section_label(frame, "BACKGROUND PROCESSING")
         self.create_checkbox(frame, "Minimize to Tray (Chạy ngầm khi xuất video)", self.enable_minimize_to_tray)
         
+        self.create_section_label(frame, "PREVIEW")
+        self.create_checkbox(frame, "Hiện thông số Preview (FPS / frame bị bỏ)", self.show_preview_stats)
+        self.create_checkbox(frame, "Tạo Proxy 540p cho video 4K/HEVC (Preview mượt hơn)", self.use_preview_proxies)
+        self.create_combobox_row(frame, "Bộ giải mã Preview:", self.preview_backend, PREVIEW_BACKENDS)
+        self.create_checkbox(frame, "Chạy Preview trong tiến trình riêng (mượt hơn khi đang xử lý hàng loạt)", self.preview_separate_process)
+        
         # === CONFIG MANAGEMENT (NEW) ===
         self.create_section_label(frame, "QUẢN LÝ CẤU HÌNH")
         
@@ -1977,7 +2088,26 @@ class VideoEditorGUI:
         )
         lang_dropdown.pack(side="left")
         
-        ctk.CTkLabel(frame, text="* Sử dụng OpenAI Whisper (Small Model)\n* Tự động nhận dạng ngôn ngữ và tạo phụ đề chính xác >95%", 
+        # Inference Profile (speed vs accuracy)
+        profile_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        profile_frame.pack(fill="x", pady=(0, 5))
+        
+        profile_lbl = ctk.CTkLabel(profile_frame, text="Chế độ / Profile:", font=("Segoe UI", 11), text_color=get_color(COLOR_TEXT_PRIMARY))
+        profile_lbl.configure(fg_color=profile_frame.cget("fg_color"))
+        profile_lbl.pack(side="left", padx=(0, 10))
+        
+        ctk.CTkComboBox(
+            profile_frame,
+            variable=self.asr_profile,
+            values=["draft", "balanced", "accurate"],
+            width=200,
+            state="readonly"
+        ).pack(side="left")
+        
+        self.create_checkbox(frame, "Batch ASR (gộp nhiều clip ngắn, nhanh hơn)", self.asr_batch_mode)
+        self.create_checkbox(frame, "Dùng Google Speech (không cần Whisper)", self.force_google_subs)
+        
+        ctk.CTkLabel(frame, text="* draft: nhanh nhất (base) | balanced: small | accurate: medium, chính xác nhất\n* Tự động nhận dạng ngôn ngữ và tạo phụ đề chính xác >95%", 
                             fg_color="transparent", text_color="#666", font=("Segoe UI", 10), justify="left").pack(anchor="w", pady=5)
         
         # Subtitle Black Bar (NEW)
@@ -2154,16 +2284,27 @@ class VideoEditorGUI:
             except Exception as e:
                 print(f"Preview update error: {e}")
         
+        # Debounced: typing redraws once, 120 ms after the last change
+        self._outro_preview_job = None
+        def schedule_outro_preview(*args):
+            if self._outro_preview_job:
+                self.root.after_cancel(self._outro_preview_job)
+            self._outro_preview_job = self.root.after(120, run_outro_preview)
+        
+        def run_outro_preview():
+            self._outro_preview_job = None
+            update_outro_preview()
+        
         # Bind updates to all settings
-        txt_box.bind("<KeyRelease>", lambda e: update_outro_preview())
-        self.outro_text_font.trace_add("write", lambda *args: update_outro_preview())
-        self.outro_text_font_size.trace_add("write", lambda *args: update_outro_preview())
-        self.outro_text_font_color.trace_add("write", lambda *args: update_outro_preview())
-        self.outro_text_bg_color.trace_add("write", lambda *args: update_outro_preview())
-        self.outro_text_position.trace_add("write", lambda *args: update_outro_preview())
+        txt_box.bind("<KeyRelease>", schedule_outro_preview)
+        self.outro_text_font.trace_add("write", schedule_outro_preview)
+        self.outro_text_font_size.trace_add("write", schedule_outro_preview)
+        self.outro_text_font_color.trace_add("write", schedule_outro_preview)
+        self.outro_text_bg_color.trace_add("write", schedule_outro_preview)
+        self.outro_text_position.trace_add("write", schedule_outro_preview)
         # self.outro_text_position trace removed here (duplicate)
-        self.outro_text_box.trace_add("write", lambda *args: update_outro_preview())
-        self.outro_text_box_padding.trace_add("write", lambda *args: update_outro_preview())
+        self.outro_text_box.trace_add("write", schedule_outro_preview)
+        self.outro_text_box_padding.trace_add("write", schedule_outro_preview)
         
         # Initial preview
         self.root.after(500, update_outro_preview)
@@ -2275,8 +2416,8 @@ class VideoEditorGUI:
     
 
     
-    def open_online_search_dialog(self):
-        """Open dialog to search stickers on Giphy (CTk Version)"""
+    def open_online_search_dialog(self, query=None):
+        """Open dialog to search stickers on Giphy (CTk Version); query starts a search right away"""
         dialog = ctk.CTkToplevel(self.root)
         dialog.title("Tìm Sticker Online (Giphy)")
         dialog.geometry("720x600")
@@ -2321,6 +2462,12 @@ class VideoEditorGUI:
 
         giphy = GiphyAPI()
         
+        # Dialog closed: stop pending thumbnail downloads
+        def on_dialog_close():
+            giphy.close()
+            dialog.destroy()
+        dialog.protocol("WM_DELETE_WINDOW", on_dialog_close)
+        
         # Store references to PhotoImages to prevent Garbage Collection
         self.giphy_images = []
         
@@ -2334,11 +2481,16 @@ class VideoEditorGUI:
                 w.destroy()
             self.giphy_images.clear()
             
+            # New search cancels the previous one (its thumbnails stop arriving)
+            token = giphy.new_search()
+            
             # Run in thread
-            threading.Thread(target=search_task, args=(query,), daemon=True).start()
+            threading.Thread(target=search_task, args=(query, token), daemon=True).start()
             
-        def search_task(query):
-            results = giphy.search_stickers(query, limit=24)
+        def search_task(query, token):
+            results = giphy.search_stickers(query, limit=24, token=token)
+            if token.cancelled:
+                return
             
             if not results:
                 self.root.after(0, lambda: status_lbl.configure(text="Không tìm thấy kết quả nào.", text_color="orange"))
@@ -2348,48 +2500,33 @@ class VideoEditorGUI:
             self.root.after(0, lambda: status_lbl.configure(text=f"Đang tải {len(results)} hình ảnh..."))
             
             # Load images logic
-            load_images_bg(results)
+            load_images_bg(results, token)
             
-        def load_images_bg(results):
-            # We process images one by one or in batch
-            from PIL import Image, ImageTk
-            import requests
+        def load_images_bg(results, token):
+            # Thumbnails are fetched concurrently (cached on disk), shown in result order
+            from PIL import Image
             from io import BytesIO
             
-            row = 0
-            col = 0
             cols = 4
             
             # Config grid
             for i in range(cols):
                 result_container.columnconfigure(i, weight=1)
             
-            for i, item in enumerate(results):
+            def on_preview(i, item, data):
                 try:
-                    # Get url from GiphyAPI result structure
-                    url = item.get('preview_url') # Changed from direct dict access as GiphyAPI pre-processes it
-                    if not url: 
-                        # Fallback if raw dict passed
-                        url = item.get('images', {}).get('fixed_height_small', {}).get('url')
-                    
-                    if not url: continue
-                    
-                    response = requests.get(url)
-                    img_data = BytesIO(response.content)
-                    pil_img = Image.open(img_data)
+                    pil_img = Image.open(BytesIO(data))
                     pil_img.load()
-                    
+                    r, c = divmod(i, cols)
                     # Pass to UI thread
-                    self.root.after(0, lambda img=pil_img, it=item, r=row, c=col: show_img(img, it, r, c))
-                    
-                    col += 1
-                    if col >= cols:
-                        col = 0
-                        row += 1
-                        
+                    self.root.after(0, lambda img=pil_img, it=item, r=r, c=c: show_img(img, it, r, c, token))
                 except Exception as e:
                     print(f"Error loading sticker thumb: {e}")
             
+            giphy.fetch_previews(results, on_preview, token)
+            if token.cancelled:
+                return
+            
             def update_finish_status():
                 try:
                     if status_lbl.winfo_exists():
@@ -2398,7 +2535,9 @@ class VideoEditorGUI:
 
             self.root.after(0, update_finish_status)
 
-        def show_img(pil_img, item, r, c):
+        def show_img(pil_img, item, r, c, token):
+            if token.cancelled:
+                return
             try:
                 if not result_container.winfo_exists(): return
             except: return
@@ -2425,39 +2564,29 @@ class VideoEditorGUI:
             if not url: return
             
             status_lbl.configure(text="Đang tải xuống sticker gốc...", text_color=get_color(COLOR_ACCENT))
-            threading.Thread(target=lambda: download_task(url), daemon=True).start()
-            
-        def download_task(url):
-             import requests
-             import time
-             try:
-                response = requests.get(url)
-                if response.status_code == 200:
-                    # Save to temp
-                    filename = f"giphy_{int(time.time())}.gif"
-                    
-                    # Ensure temp dir exists. Actually we should save to sticker library or temp.
-                    # Let's save to 'stickers/downloaded'
-                    from UI.sticker import get_sticker_library
-                    lib = get_sticker_library()
-                    # Use lib.stickers_dir (Path object)
-                    save_path = os.path.join(lib.stickers_dir, filename)
-                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                    
-                    with open(save_path, "wb") as f:
-                        f.write(response.content)
-                    
-                    # Update UI
-                    self.root.after(0, lambda: update_ui_success(save_path))
-             except Exception as e:
-                 print(e)
-                 self.root.after(0, lambda: status_lbl.configure(text="Lỗi tải xuống.", text_color="red"))
-
-        def update_ui_success(path):
-            # Register with library
+            import time
+            sticker_id = item.get('id') or f"giphy_{int(time.time())}"
+            threading.Thread(target=lambda: download_task(url, sticker_id, item), daemon=True).start()
+            
+        def download_task(url, sticker_id, item):
+            # Pooled + size-capped temp cache; add_custom_sticker copies it into the library
+            path = giphy.download_sticker(url, sticker_id)
+            if path:
+                self.root.after(0, lambda: update_ui_success(path, item))
+            else:
+                self.root.after(0, lambda: status_lbl.configure(text="Lỗi tải xuống.", text_color="red"))
+
+        def update_ui_success(path, item=None):
+            # Register with library (title/query/tags kept for offline search)
             from UI.sticker import get_sticker_library
             lib = get_sticker_library()
-            lib.add_custom_sticker(path)
+            metadata = None
+            if item:
+                metadata = {'title': item.get('title'), 'query': item.get('query'), 'tags': item.get('tags'), 'source': 'giphy'}
+            # Use the library copy: temp_stickers is size-capped and evicts old downloads
+            lib_path = lib.add_custom_sticker(path, metadata=metadata)
+            if lib_path:
+                path = lib_path
             
             # Refresh sticker dropdown if it exists
             # We need to refresh self.sticker_dropdown values
@@ -2500,6 +2629,11 @@ class VideoEditorGUI:
 
         def destroy_dialog():
             dialog.destroy()
+        
+        # Opened from the offline search: go straight to the results
+        if query:
+            search_var.set(query)
+            perform_search()
 
     # --- Logic Methods (Simplified using utils) ---
 
@@ -2530,6 +2664,7 @@ class VideoEditorGUI:
             # Get video info (duration, resolution, fps)
             duration_str = "--:--"
             resolution_str = "---"
+            video_info = None
             
             try:
                 video_info = get_video_info(file_path)
@@ -2556,6 +2691,21 @@ class VideoEditorGUI:
                 resolution_str,
                 f"{size_mb:.1f} MB"
             ))
+
+            # Keyframe index for fast preview seeking (background, once per file)
+            try:
+                from utils.media_catalog import schedule_keyframe_index
+                schedule_keyframe_index(file_path)
+            except Exception:
+                pass
+
+            # Low-res proxy for heavy sources (preview only, export uses the original)
+            if self.use_preview_proxies.get() and video_info:
+                try:
+                    from utils.proxy_media import schedule_proxy
+                    schedule_proxy(file_path, video_info, log_callback=self.log)
+                except Exception:
+                    pass
         except OSError:
             pass
 
@@ -2671,6 +2821,10 @@ class VideoEditorGUI:
         # Check bounds (clicking black bars)
         if not (0 <= img_click_x <= img_w and 0 <= img_click_y <= img_h):
             return
+        
+        # Normalize (same space as sticker_drag_x / sticker_drag_y)
+        click_x = img_click_x / img_w
+        click_y = img_click_y / img_h
 
         # DEBUG INFO
         print(f"[DEBUG HIT] Event: {event.x},{event.y} | Label: {lbl_w}x{lbl_h} | Img: {img_w}x{img_h} | Offset: {offset_x},{offset_y}")
@@ -2821,8 +2975,7 @@ class VideoEditorGUI:
         # Set seeking flag and target (sync with player)
         self.seeking = True
         self.seek_target_frame = target_frame
-        self.preview_player.seeking = True
-        self.preview_player.seek_target_frame = target_frame
+        self.preview_player.seek(target_frame)
         
         # Update time display
         current_time = target_frame / self.video_fps if self.video_fps > 0 else 0
@@ -2872,7 +3025,7 @@ class VideoEditorGUI:
             'volume_boost': self.volume_boost.get(),
             'bass_boost': self.bass_boost.get(),
             'use_gpu': self.use_gpu.get(),
-            'subtitle_font_size': 14, # Default
+            **self.get_subtitle_style_settings(),
         
             # Intro / Outro
             'enable_intro': self.enable_intro.get(),
@@ -2912,6 +3065,10 @@ class VideoEditorGUI:
             # Subtitle Black Bar (NEW)
             'enable_subtitle_bar': self.enable_subtitle_bar.get(),
             'subtitle_bar_height': self.subtitle_bar_height.get(),
+            
+            # Whisper inference profile (draft / balanced / accurate)
+            'asr_profile': self.asr_profile.get(),
+            'asr_batch_mode': self.asr_batch_mode.get(),
         }
         
         # Get files
@@ -3121,6 +3278,17 @@ class VideoEditorGUI:
                 self.log(f"   ⚠️ Outro pre-normalize error: {e}")
                 settings['enable_outro'] = False
         
+        # Subtitle fonts: make sure the shared fontconfig cache exists before the jobs start
+        # (no-op if the app-start warm-up already ran)
+        if self.enable_subtitles.get():
+            self._warm_up_subtitle_fonts()
+        
+        # BATCH ASR: transcribe all short clips together before the per-file workers start
+        batch_segments = {}
+        if (self.enable_subtitles.get() and settings.get('asr_batch_mode')
+                and not self.force_google_subs.get() and len(files) > 1):
+            batch_segments = self._prepare_batch_subtitles(files, settings, max_workers)
+        
         lock = threading.Lock() # For updating counters safely
         
         def _process_single_file(filename):
@@ -3133,45 +3301,69 @@ class VideoEditorGUI:
             input_path = os.path.join(self.input_dir.get(), filename)
             output_path = os.path.join(self.output_dir.get(), filename)
             
-            # 1. Subtitles
-            srt_path = None
-            if self.enable_subtitles.get():
+            # 1. Subtitles (in-memory track; the export writes its styled ASS file)
+            from utils.subtitle_model import SubtitleTrack
+            subtitles = None
+            if self.enable_subtitles.get() and filename in batch_segments:
+                subtitles = SubtitleTrack.from_segments(batch_segments[filename])
+                if subtitles:
+                    self.log(f"   ✅ Subtitles ready (batch): {len(subtitles)} cues")
+            elif self.enable_subtitles.get():
                 try:
+                    # Transcript cache first (file fingerprint + trim window): a hit needs no probe,
+                    # no speech gate and no audio decode
+                    cached = None
+                    if not self.force_google_subs.get():
+                        from utils.transcript_cache import peek_transcript_cached
+                        cached = peek_transcript_cached(
+                            input_path,
+                            start_time=settings.get('start_time', 0),
+                            duration=settings.get('duration', 0),
+                            language=self._get_subtitle_language_code(),
+                            profile=settings.get('asr_profile')
+                        )
+                    
                     # Pre-check for Audio Stream to save time/errors
                     from utils.video_processor import get_video_info
-                    v_info = get_video_info(input_path)
-                    if not v_info or not v_info.get('has_audio', False):
+                    v_info = get_video_info(input_path) if cached is None else None
+                    if cached is not None:
+                        subtitles = SubtitleTrack.from_segments(cached)
+                        self.log(f"   ⚡ Transcript cache HIT ({len(subtitles)} cues) - skipping speech gate and Whisper")
+                    elif not v_info or not v_info.get('has_audio', False):
                         self.log(f"   ⚠️ No audio stream detected. Skipping subtitles for: {filename}")
-                        srt_path = None
+                    elif not self._has_likely_speech(input_path, settings, v_info):
+                        self.log(f"   ⏭️ No speech in audio (music/silence). Skipping subtitles for: {filename}")
                     else:
                         self.log(f"   📝 Generating subtitles for: {filename}")
                         
-                        # Extract language code from dropdown (e.g., "vi (Tiếng Việt)" -> "vi")
-                        lang_str = self.subtitle_language.get()
-                        if "auto" in lang_str.lower():
-                            language_code = None  # None = Auto-detect
+                        language_code = self._get_subtitle_language_code()
+                        if language_code is None:
                             self.log(f"   🌐 Language: Auto-detect (Whisper will identify)")
                         else:
-                            language_code = lang_str.split()[0] if lang_str else None
                             self.log(f"   🌐 Language: {language_code}")
                         
-                        audio_temp = f"temp_audio_{abs(hash(filename))}.wav"
-                        from utils.subtitle_generator import extract_audio_from_video, generate_subtitles_with_whisper
-                        if extract_audio_from_video(input_path, audio_temp, log_callback=self.log):
-                            srt_path = generate_subtitles_with_whisper(
-                                audio_temp, 
+                        # Transcribe only the trimmed window (same as the export) through the cache
+                        segments = None
+                        if not self.force_google_subs.get():
+                            from utils.transcript_cache import get_transcript_cached
+                            segments = get_transcript_cached(
+                                input_path,
+                                start_time=settings.get('start_time', 0),
+                                duration=settings.get('duration', 0),
                                 language=language_code,
-                                log_callback=self.log
+                                log_callback=self.log,
+                                profile=settings.get('asr_profile')
                             )
-                            if srt_path:
-                                self.log(f"   ✅ Subtitle file created: {srt_path}")
-                            else:
-                                self.log(f"   ⚠️ Subtitle generation returned None - No speech detected or error occurred")
-                                self.log(f"   💡 Tip: Check if the video has clear audio")
-                            if os.path.exists(audio_temp): 
-                                os.remove(audio_temp)
+                        
+                        if segments is None:
+                            # Forced, or Whisper failed -> Google Speech fallback
+                            segments = self._generate_google_subtitles(input_path, settings, language_code)
+                        subtitles = SubtitleTrack.from_segments(segments)
+                        if subtitles:
+                            self.log(f"   ✅ Subtitles ready: {len(subtitles)} cues")
                         else:
-                            self.log(f"   ⚠️ Audio extraction failed")
+                            self.log(f"   ⚠️ Subtitle generation returned None - No speech detected or error occurred")
+                            self.log(f"   💡 Tip: Check if the video has clear audio")
                 except Exception as e:
                     self.log(f"   ❌ Subtitle Error ({filename}): {e}")
                     import traceback
@@ -3190,23 +3382,14 @@ class VideoEditorGUI:
             
             is_success = process_video_with_ffmpeg(
                 input_path, output_path, settings, 
-                srt_file=srt_path, 
+                subtitles=subtitles, 
                 log_callback=self.log,
                 progress_callback=update_ffmpeg_progress,
                 check_stop_signal=lambda: not self.is_processing
             )
             
-            
-            # Clean up temporary SRT file after processing
-            if srt_path and os.path.exists(srt_path):
-                try:
-                    os.remove(srt_path)
-                    self.log(f"   🗑️ Cleaned up temp subtitle file")
-                except Exception as e:
-                    self.log(f"   ⚠️ Could not delete temp SRT: {e}")
-            
-            # Add Text Outro if enabled (NEW)
-            if is_success and settings.get('enable_outro_text'):
+            # Append-mode Text Outro (overlay mode is already drawn by the main encode)
+            if is_success and settings.get('enable_outro_text') and settings.get('outro_text_style') == 'append':
                 try:
                     from utils.text_outro_helper import add_text_outro_to_video
                     import tempfile
@@ -3296,6 +3479,153 @@ class VideoEditorGUI:
         self.stop_btn.configure(state="disabled")
         self.export_btn.configure(state="normal")
 
+    def get_subtitle_style_settings(self):
+        """Subtitle style keys of the export settings (the preview builds its SubtitleStyle from the same dict)"""
+        return {
+            'subtitle_font_size': self.subtitle_font_size.get(),
+        }
+
+    def _get_subtitle_language_code(self):
+        """Language code from dropdown (e.g., "vi (Tiếng Việt)" -> "vi"), None = Auto-detect"""
+        lang_str = self.subtitle_language.get()
+        if not lang_str or "auto" in lang_str.lower():
+            return None
+        return lang_str.split()[0]
+
+    def _prepare_batch_subtitles(self, files, settings, max_workers):
+        """Batch ASR pre-pass: gate + cache lookup per file, one batched Whisper run for the misses"""
+        from utils.video_processor import get_video_info
+        from utils.transcript_cache import get_transcripts_batched, peek_transcript_cached
+        import concurrent.futures
+        
+        language_code = self._get_subtitle_language_code()
+        start = settings.get('start_time', 0)
+        duration = settings.get('duration', 0)
+        self.log(f"   📦 Batch ASR: preparing {len(files)} files (Language: {language_code or 'auto, detected once'})...")
+        
+        def check(filename):
+            input_path = os.path.join(self.input_dir.get(), filename)
+            # Cached files skip the probe and the speech gate (the batch lookup hits the same entry)
+            if peek_transcript_cached(input_path, start_time=start, duration=duration,
+                                      language=language_code, profile=settings.get('asr_profile')) is not None:
+                return (filename, input_path, start, duration)
+            v_info = get_video_info(input_path)
+            if not v_info or not v_info.get('has_audio', False):
+                return None
+            if not self._has_likely_speech(input_path, settings, v_info):
+                return None
+            return (filename, input_path, start, duration)
+        
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                jobs = [job for job in executor.map(check, files) if job]
+            
+            results = get_transcripts_batched(
+                jobs,
+                language=language_code,
+                profile=settings.get('asr_profile'),
+                log_callback=self.log,
+                max_workers=max_workers
+            )
+            # Files without speech/audio get no subtitles and must not be re-checked per file
+            speech_files = {job[0] for job in jobs}
+            for filename in files:
+                if filename not in speech_files:
+                    results[filename] = []
+            return results
+        except Exception as e:
+            self.log(f"   ⚠️ Batch ASR error: {e} - using per-file transcription")
+            return {}
+
+    def _generate_google_subtitles(self, input_path, settings, language_code):
+        """Google Speech fallback on the trimmed window (chunked + concurrent) - segments or None"""
+        from utils.subtitle_generator import (
+            decode_audio_pcm, write_wav_pcm, GOOGLE_LANGUAGE_CODES
+        )
+        self.log(f"   🌐 Using Google Speech Recognition fallback...")
+        pcm = decode_audio_pcm(input_path, start_time=settings.get('start_time', 0),
+                               duration=settings.get('duration', 0))
+        if not pcm:
+            self.log(f"   ⚠️ Audio extraction failed")
+            return None
+        
+        audio_temp = os.path.join(tempfile.gettempdir(), f"temp_audio_google_{threading.get_ident()}.wav")
+        try:
+            write_wav_pcm(pcm, audio_temp)
+            return generate_subtitles_with_google(
+                audio_temp,
+                language=GOOGLE_LANGUAGE_CODES.get(language_code, 'en-US'),
+                log_callback=self.log
+            )
+        finally:
+            if os.path.exists(audio_temp):
+                os.remove(audio_temp)
+
+    def _schedule_preview_subtitles(self, *args):
+        """Debounced reload (trim spinners fire on every step)"""
+        if self._preview_subtitles_job:
+            self.root.after_cancel(self._preview_subtitles_job)
+        self._preview_subtitles_job = self.root.after(800, self.load_preview_subtitles)
+
+    def load_preview_subtitles(self):
+        """
+        Subtitles of the previewed file as a SubtitleTrack, before export (MAIN THREAD)
+        
+        Transcribes the trimmed window in the background through the transcript cache, so the
+        export of the same file/window reuses the result. Google-only mode has no preview.
+        """
+        self._preview_subtitles_job = None
+        filepath = self._preview_subtitles_file
+        try:
+            enabled = self.enable_subtitles.get() and not self.force_google_subs.get()
+            start, duration = self.start_time.get(), self.duration.get()
+        except Exception:
+            return  # Half-typed trim value
+        key = None
+        if enabled and filepath:
+            key = (filepath, start, duration, self._get_subtitle_language_code(), self.asr_profile.get())
+        if key == self._preview_subtitles_key:
+            return
+        self._preview_subtitles_key = key
+        self.preview_subtitles = None
+        self.effect_params.invalidate()
+        if key is None:
+            return
+        
+        def worker():
+            try:
+                from utils.transcript_cache import get_transcript_cached
+                from utils.subtitle_model import SubtitleTrack
+                segments = get_transcript_cached(filepath, start_time=start, duration=duration,
+                                                 language=key[3], log_callback=self.log, profile=key[4])
+                track = SubtitleTrack.from_segments(segments)
+            except Exception as e:
+                self.log(f"   ⚠️ Preview subtitles error: {e}")
+                return
+            
+            def apply():
+                if self._preview_subtitles_key == key:
+                    self.preview_subtitles = track
+                    self.effect_params.invalidate()
+            self.root.after(0, apply)
+        
+        self.log(f"📝 Preview subtitles: {os.path.basename(filepath)}")
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _has_likely_speech(self, input_path, settings, v_info=None):
+        """Cheap speech-presence gate so music-only/silent clips never load Whisper"""
+        try:
+            from utils.speech_gate import detect_speech_presence
+            start = settings.get('start_time', 0) or 0
+            duration = settings.get('duration', 0) or 0
+            if not duration and v_info:
+                duration = max(0, v_info.get('duration', 0) - start)
+            return detect_speech_presence(input_path, start_time=start, duration=duration,
+                                          log_callback=self.log)
+        except Exception as e:
+            self.log(f"   ⚠️ Speech gate error: {e}")
+            return True
+
     def on_media_select(self, event):
         """Handle video selection for preview"""
         selection = self.tree_media.selection()
@@ -3317,6 +3647,7 @@ class VideoEditorGUI:
             self.preview_label.configure(image='', text='Đang tải...')
             self.preview_label.pack(expand=True) # REMOVED fill='both' to prevent forced resizing loop
             self.preview_label.imgtk = None
+            self._preview_photo = None
         except:
             pass
         
@@ -3324,13 +3655,32 @@ class VideoEditorGUI:
         import time
         time.sleep(0.15)
         
+        # Thread player or separate-process engine (setting applies from the next opened file)
+        self.preview_player = self._get_preview_player()
+        
         # Start new preview
         self.stop_preview = False
         self.preview_thread = threading.Thread(target=self.play_preview_thread, args=(filepath, current_id), daemon=True)
         self.preview_thread.start()
+        
+        self._preview_subtitles_file = filepath
+        self.load_preview_subtitles()
+
+    def _get_preview_player(self):
+        """Player for the next preview session: in-process thread or the engine process"""
+        try:
+            if self.preview_separate_process.get():
+                if self._preview_engine is None:
+                    from UI.preview_process import PreviewProcessClient
+                    self._preview_engine = PreviewProcessClient(self)
+                return self._preview_engine
+        except Exception as e:
+            print(f"Preview engine unavailable: {e}")
+        return self._thread_preview_player
 
     def start_preview_polling(self):
         """Main Thread Loop: Polls for new frames and updates UI safely"""
+        import time
         # Stop any existing polling
         if hasattr(self, '_poll_id') and self._poll_id:
             try:
@@ -3342,89 +3692,58 @@ class VideoEditorGUI:
                 return
                 
             try:
-                # Check if new frame is available from worker
-                if hasattr(self, 'latest_frame') and self.latest_frame is not None:
-                    # Create Image in MAIN THREAD (Crucial for stability)
-                    frame_arr = self.latest_frame
-                    # Store current preview dimensions for drag handlers
+                # Preview area size -> the render thread scales to it (no PIL resize on the Tk thread)
+                try:
+                    w_cont = self.preview_container.winfo_width()
+                    h_cont = self.preview_container.winfo_height() - self.preview_controls_frame.winfo_height()
+                    if w_cont > 50 and h_cont > 50 and self.preview_player.display_size != (w_cont, h_cont):
+                        self.preview_player.display_size = (w_cont, h_cont)
+                except:
+                    pass
+
+                # Newest processed frame that is due on the playback clock (None = nothing new, skip)
+                frame_arr = self.preview_player.present()
+                if frame_arr is not None:
+                    self.latest_frame = frame_arr
+                    # Frame already has display size: drag handlers map against these dims
                     self.preview_img_h, self.preview_img_w = frame_arr.shape[:2]
+                    self.preview_display_w, self.preview_display_h = self.preview_img_w, self.preview_img_h
                     img = Image.fromarray(frame_arr)
-                    
-                    # --- DYNAMIC SCALING (To fit window) ---
-                    try:
-                        w_cont = self.preview_label.winfo_width()
-                        h_cont = self.preview_label.winfo_height()
-                        
-                        # Only scale if container is valid and significantly different size
-                        if w_cont > 50 and h_cont > 50:
-                            # Calculate aspect ratios
-                            img_ratio = img.width / img.height
-                            cont_ratio = w_cont / h_cont
-                            
-                            # Standard "Contain" logic to maximize size
-                            if img_ratio > cont_ratio:
-                                # Width constrained
-                                new_w = w_cont
-                                new_h = int(w_cont / img_ratio)
-                            else:
-                                # Height constrained
-                                new_h = h_cont
-                                new_w = int(h_cont * img_ratio)
-                                
-                            # Resize properly using high-quality resampling
-                            img = img.resize((new_w, new_h), Image.Resampling.BILINEAR)
-                            
-                            # Debug/Store display dims for mouse events mapping
-                            self.preview_display_w = new_w
-                            self.preview_display_h = new_h
-                    except:
-                        pass
-                    # ---------------------------------------
 
-                    imgtk = ImageTk.PhotoImage(image=img)
-                    
-                    # Check if widget still exists before updating
                     try:
-                        if self.preview_label.winfo_exists():
-                            # Store old image reference
-                            old_img = getattr(self.preview_label, 'imgtk', None)
-                            
-                            # Update with new image
-                            self.preview_label.imgtk = imgtk # Keep ref
-                            self.preview_label.configure(image=imgtk, text="")
-                            
-                            # Delete old image to free memory
-                            if old_img:
-                                try:
-                                    del old_img
-                                except:
-                                    pass
+                        if not self.preview_label.winfo_exists():
+                            return
+                        photo = getattr(self, '_preview_photo', None)
+                        if photo is not None and (photo.width(), photo.height()) == img.size:
+                            # Same size: copy pixels into the existing PhotoImage (no new Tk image)
+                            photo.paste(img)
+                        else:
+                            photo = ImageTk.PhotoImage(image=img)
+                            self._preview_photo = photo
+                            self.preview_label.imgtk = photo # Keep ref
+                            self.preview_label.configure(image=photo, text="")
                     except tk.TclError:
                         # Widget was destroyed, stop polling
                         return
-                        
-                    # Explicitly delete PIL image object
                     del img
+
+                # Seek bar / time label: coalesced to ~4 updates per second, only when changed
+                now = time.time()
+                if now - getattr(self, '_last_status_update', 0.0) >= 0.25:
+                    self._last_status_update = now
+                    status = self.preview_player.playback_status()
+                    if status and status != getattr(self, '_last_status', None):
+                        self._last_status = status
+                        self.seek_var.set(status[0])
+                        self.time_label.configure(text=status[1])
             except Exception as e:
                 # Silently handle errors (don't spam console)
                 pass
                 
             # ADAPTIVE POLLING RATE (Performance Optimization)
-            # Adjust frame rate based on window size and activity
+            # Follows the governor's target frame rate; 60 FPS when dragging sticker for smooth movement
             try:
-                window_width = self.root.winfo_width()
-                window_height = self.root.winfo_height()
-                
-                # Small window (< 800px wide) = Lower frame rate to reduce CPU load
-                if window_width < 800:
-                    base_interval = 50  # 20 FPS for small windows
-                elif window_width < 1200:
-                    base_interval = 40  # 25 FPS for medium windows
-                else:
-                    base_interval = 33  # 30 FPS for large windows
-                
-                # Boost to 60 FPS when dragging sticker for smooth movement
-                poll_interval = 16 if self.sticker_dragging else base_interval
+                poll_interval = self.preview_player.poll_interval_ms(self.sticker_dragging)
             except:
                 # Fallback
                 poll_interval = 16 if self.sticker_dragging else 40
@@ -3434,385 +3753,6 @@ class VideoEditorGUI:
         _poll()
 
     def play_preview_thread(self, filepath, thread_id):
-        """Worker Thread: Reads frames, Resizes to Preview Quality (480p). NO UI interaction."""
-        try:
-            import time
-            import numpy as np
-            import gc
-            
-            # Start UI Polling from Main Thread context
-            self.root.after(0, self.start_preview_polling)
-
-            cap = cv2.VideoCapture(filepath)
-            # Get video info for player controls (NEW)
-            self.video_total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.video_fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
-            # Target 24 FPS (Cinematic/Smooth) - Safe limit
-            target_fps = 24.0
-            frame_interval = 1.0 / target_fps
-            
-            frame_count = 0
-            
-            while not self.stop_preview and cap.isOpened():
-                start_time = time.time()
-                
-                if self.preview_id != thread_id:
-                    break
-                # Handle Pause (NEW)
-                while self.is_paused and not self.stop_preview:
-                    time.sleep(0.1)
-                    if self.preview_id != thread_id:
-                        break
-
-                # Handle Seek (NEW)
-                if self.seeking:
-                    try:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, self.seek_target_frame)
-                        frame_count = self.seek_target_frame
-                        self.seeking = False
-                    except:
-                        self.seeking = False
-                # Update seek bar and time display (NEW)
-                current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                self.video_current_frame = current_frame
-                if self.video_total_frames > 0:
-                    seek_percent = (current_frame / self.video_total_frames) * 100
-                    self.root.after(0, lambda p=seek_percent: self.seek_var.set(p))
-                
-                current_time = current_frame / self.video_fps if self.video_fps > 0 else 0
-                total_time = self.video_total_frames / self.video_fps if self.video_fps > 0 else 0
-                time_text = f"{self.format_time(current_time)} / {self.format_time(total_time)}"
-                self.root.after(0, lambda t=time_text: self.time_label.configure(text=t))
-                # Loop video
-                try:
-                    if cap.get(cv2.CAP_PROP_POS_FRAMES) >= cap.get(cv2.CAP_PROP_FRAME_COUNT):
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-
-                    ret, frame = cap.read()
-                    if not ret:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        time.sleep(0.1)
-                        continue
-                except:
-                    break
-                
-                frame_count += 1
-                
-                # Apply Speed Preview (NEW)
-                # Simulate speed by skipping frames for faster playback
-                # or slowing down frame interval for slower playback
-                speed_factor = self.speed_factor.get() if self.enable_speed.get() else 1.0
-                
-                # For speed > 1.0 (faster), skip frames
-                if speed_factor > 1.0:
-                    # Skip frames to simulate speed
-                    # E.g., 2x speed = skip every other frame
-                    skip_frames = int(speed_factor) - 1
-                    if skip_frames > 0 and frame_count % (skip_frames + 1) != 0:
-                        continue  # Skip this frame
-                
-                # Adjust playback interval for speed
-                adjusted_interval = frame_interval / speed_factor
-                if frame_count % 50 == 0:
-                    gc.collect() # Force GC every 50 frames to prevent RAM spike
-                
-                # --- PROCESSING (Background) ---
-                
-                # --- PROCESSING (Background) ---
-                
-                # 1. Base Resize (Standard Preview Size 720p - Increased for better visibility)
-                # Keep this as the "Container" size basis
-                h_base, w_base = frame.shape[:2]
-                proc_h = 720  # UPDATED: Increased from 480 to 720
-                
-                if h_base > proc_h:
-                    scale = proc_h / h_base
-                    proc_w = int(w_base * scale)
-                    if proc_w > 1280:
-                         scale = 1280 / w_base
-                         proc_w = 1280
-                         proc_h = int(h_base * scale)
-                    
-                    # This frame serves as the SOURCE for both BG and FG
-                    frame_base = cv2.resize(frame, (proc_w, proc_h), interpolation=cv2.INTER_LINEAR)
-                else:
-                    frame_base = frame.copy()
-                    proc_w, proc_h = w_base, h_base
-
-                # 2. Determine Canvas Size (Background)
-                ratio_str = self.aspect_ratio.get()
-                
-                target_ratio = None
-                if "9:16" in ratio_str: target_ratio = 9/16
-                elif "16:9" in ratio_str: target_ratio = 16/9
-                elif "1:1" in ratio_str: target_ratio = 1.0
-                elif "4:3" in ratio_str: target_ratio = 4/3
-                
-                # If Original or simple mode, use current video ratio as canvas ratio
-                if target_ratio is None:
-                    target_ratio = proc_w / proc_h
-
-                # Calculate Canvas dimensions
-                if target_ratio < 1.0: # Portrait
-                    c_h = proc_h
-                    c_w = int(proc_h * target_ratio)
-                else: # Landscape or Square
-                    c_w = proc_w
-                    c_h = int(proc_w / target_ratio)
-                
-                # 3. Create Background (Canvas)
-                if self.enable_blur.get() and self.blur_amount.get() > 0:
-                     # Stretch base frame to fill canvas then Blur
-                     bg_stretched = cv2.resize(frame_base, (c_w, c_h), interpolation=cv2.INTER_LINEAR)
-                     
-                     blur_val = self.blur_amount.get()
-                     k = int(blur_val * 6) * 2 + 1
-                     if k > 1:
-                         try:
-                             canvas = cv2.GaussianBlur(bg_stretched, (k, k), 0)
-                         except: canvas = bg_stretched
-                     else:
-                         canvas = bg_stretched
-                else:
-                     canvas = np.zeros((c_h, c_w, 3), dtype=np.uint8)
-
-                # 4. Prepare Foreground (Scaled Video)
-                # 4. Prepare Foreground (Scaled Video)
-                resize_mode = self.resize_mode.get()
-                
-                if "Fill" in resize_mode or "Lấp đầy" in resize_mode:
-                    # Fill logic: Cover the canvas (crop excess)
-                    scale_preview = max(c_w / w_base, c_h / h_base)
-                else:
-                    # Fit logic: Ensure video fits inside canvas
-                    scale_preview = min(c_w / w_base, c_h / h_base)
-                
-                # Base Dimensions
-                w_fitted = w_base * scale_preview
-                h_fitted = h_base * scale_preview
-                
-                # Apply User Scale (Percent)
-                s_w = self.scale_w.get()
-                s_h = self.scale_h.get()
-                
-                new_scaled_w = max(1, int(w_fitted * s_w))
-                new_scaled_h = max(1, int(h_fitted * s_h))
-                
-                frame_fg = cv2.resize(frame_base, (new_scaled_w, new_scaled_h), interpolation=cv2.INTER_LINEAR)
-                
-                # Apply Color Filter (NEW - Preview)
-                color_filter = self.color_filter.get()
-                if color_filter and "None" not in color_filter and "Gốc" not in color_filter:
-                    if "Đen Trắng" in color_filter or "B&W" in color_filter:
-                        # Black & White
-                        frame_fg = cv2.cvtColor(frame_fg, cv2.COLOR_BGR2GRAY)
-                        frame_fg = cv2.cvtColor(frame_fg, cv2.COLOR_GRAY2BGR)
-                    elif "Sepia" in color_filter or "Cổ điển" in color_filter:
-                        # Sepia tone
-                        kernel = np.array([[0.272, 0.534, 0.131],
-                                          [0.349, 0.686, 0.168],
-                                          [0.393, 0.769, 0.189]])
-                        frame_fg = cv2.transform(frame_fg, kernel)
-                        frame_fg = np.clip(frame_fg, 0, 255).astype(np.uint8)
-                    elif "Vintage" in color_filter or "Phim cũ" in color_filter:
-                        # Vintage (reduce saturation, slight yellow tint)
-                        hsv = cv2.cvtColor(frame_fg, cv2.COLOR_BGR2HSV).astype(np.float32)
-                        hsv[:, :, 1] = hsv[:, :, 1] * 0.8  # Reduce saturation
-                        hsv = np.clip(hsv, 0, 255).astype(np.uint8)
-                        frame_fg = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
-                        # Add slight yellow tint
-                        frame_fg[:, :, 0] = np.clip(frame_fg[:, :, 0] * 0.9, 0, 255)  # Reduce blue
-                        frame_fg[:, :, 1] = np.clip(frame_fg[:, :, 1] * 1.0, 0, 255)  # Keep green
-                        frame_fg[:, :, 2] = np.clip(frame_fg[:, :, 2] * 1.1, 0, 255)  # Boost red
-                    elif "Cold" in color_filter or "Lạnh" in color_filter:
-                        # Cold (boost blue, reduce red)
-                        frame_fg[:, :, 0] = np.clip(frame_fg[:, :, 0] * 1.3, 0, 255)  # Boost blue
-                        frame_fg[:, :, 2] = np.clip(frame_fg[:, :, 2] * 0.8, 0, 255)  # Reduce red
-                    elif "Warm" in color_filter or "Ấm" in color_filter:
-                        # Warm (boost red/yellow, reduce blue)
-                        frame_fg[:, :, 0] = np.clip(frame_fg[:, :, 0] * 0.7, 0, 255)  # Reduce blue
-                        frame_fg[:, :, 2] = np.clip(frame_fg[:, :, 2] * 1.3, 0, 255)  # Boost red
-                
-                # Apply Brightness (NEW - Preview)
-                if self.enable_brightness.get():
-                    brightness = self.brightness.get()
-                    if brightness != 1.0:
-                        # Brightness adjustment: multiply all channels
-                        # brightness > 1.0 = brighter, < 1.0 = darker
-                        frame_fg = frame_fg.astype(np.float32)
-                        frame_fg = frame_fg * brightness
-                        frame_fg = np.clip(frame_fg, 0, 255).astype(np.uint8)
-                
-                # Mirror FG only
-                if self.mirror_enabled.get():
-                    frame_fg = cv2.flip(frame_fg, 1)
-
-                # 5. Paste FG onto BG (Center)
-                y_off = (c_h - new_scaled_h) // 2
-                x_off = (c_w - new_scaled_w) // 2
-
-                # Safe Paste Logic (Handle out of bounds due to Zoom)
-                y1, y2 = max(0, y_off), min(c_h, y_off + new_scaled_h)
-                x1, x2 = max(0, x_off), min(c_w, x_off + new_scaled_w)
-                
-                # Source coords
-                sy1, sy2 = max(0, -y_off), max(0, -y_off) + (y2 - y1)
-                sx1, sx2 = max(0, -x_off), max(0, -x_off) + (x2 - x1)
-
-                if (y2 > y1) and (x2 > x1):
-                    canvas[y1:y2, x1:x2] = frame_fg[sy1:sy2, sx1:sx2]
-                
-                # 6. Draw Subtitle Black Bar (NEW - Preview)
-                if self.enable_subtitle_bar.get():
-                    bar_height_px = self.subtitle_bar_height.get()
-                    # Scale bar height to preview resolution
-                    # Original video might be 1280px tall, preview is ~480px
-                    # So we scale proportionally
-                    bar_height_preview = int(bar_height_px * (c_h / 1280.0))  # Assuming 720p/1080p base
-                    
-                    # Ensure bar doesn't exceed canvas height
-                    bar_height_preview = min(bar_height_preview, c_h // 3)  # Max 1/3 of height
-                    
-                    if bar_height_preview > 0:
-                        # Draw black rectangle at bottom
-                        # cv2.rectangle(img, pt1, pt2, color, thickness=-1 for filled)
-                        cv2.rectangle(canvas, 
-                                    (0, c_h - bar_height_preview),  # Top-left of bar
-                                    (c_w, c_h),                      # Bottom-right (full width, bottom edge)
-                                    (0, 0, 0),                       # Black color
-                                    -1)                              # Filled
-                
-                # 7. Overlay Sticker (NEW - Preview)
-                if self.enable_sticker.get():
-                    sticker_path = self.sticker_path.get()
-                    if sticker_path and os.path.exists(sticker_path):
-                        try:
-                            from PIL import Image as PILImage
-                            
-                            # Load sticker
-                            sticker_pil = PILImage.open(sticker_path)
-                            
-                            # Convert to RGBA if not already
-                            if sticker_pil.mode != 'RGBA':
-                                sticker_pil = sticker_pil.convert('RGBA')
-                            
-                            # Calculate sticker size based on scale setting
-                            sticker_scale = self.sticker_scale.get()
-                            sticker_w = int(c_w * sticker_scale)
-                            sticker_h = int(sticker_w * (sticker_pil.height / sticker_pil.width))
-                            
-                            # Resize sticker
-                            sticker_pil = sticker_pil.resize((sticker_w, sticker_h), PILImage.Resampling.LANCZOS)
-                            
-                            # Convert to numpy array
-                            sticker_np = np.array(sticker_pil)
-                            
-                            # Calculate position
-                            sticker_pos = self.sticker_pos.get()
-                            margin = 20
-                            
-                            # Check if using custom drag position
-                            if "Tùy chỉnh" in sticker_pos or "Custom" in sticker_pos:
-                                # Use drag position (normalized 0-1)
-                                x_pos = int(self.sticker_drag_x.get() * c_w)
-                                y_pos = int(self.sticker_drag_y.get() * c_h)
-                            else:
-                                # Use preset positions (Robust Logic)
-                                # Default: Bottom-Right
-                                x_pos = c_w - sticker_w - margin
-                                y_pos = c_h - sticker_h - margin
-                                
-                                # Vertical Logic
-                                if "Top" in sticker_pos or "trên" in sticker_pos:
-                                    y_pos = margin
-                                elif "Bottom" in sticker_pos or "dưới" in sticker_pos:
-                                    y_pos = c_h - sticker_h - margin
-                                elif "Center" in sticker_pos or "giữa" in sticker_pos:
-                                    y_pos = (c_h - sticker_h) // 2
-                                    
-                                # Horizontal Logic
-                                if "Left" in sticker_pos or "trái" in sticker_pos:
-                                    x_pos = margin
-                                elif "Right" in sticker_pos or "phải" in sticker_pos:
-                                    x_pos = c_w - sticker_w - margin
-                                elif "Center" in sticker_pos or "giữa" in sticker_pos:
-                                    x_pos = (c_w - sticker_w) // 2
-                            
-                            # Ensure sticker is within bounds
-                            x_pos = max(0, min(x_pos, c_w - sticker_w))
-                            y_pos = max(0, min(y_pos, c_h - sticker_h))
-                            
-                            # Overlay with alpha blending
-                            if sticker_np.shape[2] == 4:  # Has alpha channel
-                                # Extract RGB and Alpha
-                                sticker_rgb = sticker_np[:, :, :3]
-                                alpha_mask = sticker_np[:, :, 3] / 255.0
-                                
-                                # Define ROI on canvas
-                                y1, y2 = y_pos, y_pos + sticker_h
-                                x1, x2 = x_pos, x_pos + sticker_w
-                                
-                                # Clip to canvas bounds
-                                y1 = max(0, y1); y2 = min(c_h, y2);
-                                x1 = max(0, x1); x2 = min(c_w, x2);
-                                
-                                # Adjustment for source if clipped
-                                sy1 = max(0, -y_pos); sy2 = sy1 + (y2 - y1);
-                                sx1 = max(0, -x_pos); sx2 = sx1 + (x2 - x1);
-                                
-                                if y2 > y1 and x2 > x1:
-                                    # Blend
-                                    for c in range(3):
-                                        canvas[y1:y2, x1:x2, c] = (alpha_mask[sy1:sy2, sx1:sx2] * sticker_rgb[sy1:sy2, sx1:sx2, c] + 
-                                                                 (1 - alpha_mask[sy1:sy2, sx1:sx2]) * canvas[y1:y2, x1:x2, c])
-                                                                 
-                                    # Draw Selection Border (CapCut Style)
-                                    # Always draw it to show it's interactable, or at least when Custom mode/Hover
-                                    # For now, always draw a thin dashed-like or solid white box to indicate "You can move me"
-                                    # White border with black outline for visibility
-                                    cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 0, 0), 3) # Outer Black
-                                    cv2.rectangle(canvas, (x1, y1), (x2, y2), (255, 255, 255), 1) # Inner White
-                            else:
-                                # No alpha, just paste directly
-                                y1, y2 = y_pos, y_pos + sticker_h
-                                x1, x2 = x_pos, x_pos + sticker_w
-                                # Clip to canvas bounds
-                                y1 = max(0, y1); y2 = min(c_h, y2);
-                                x1 = max(0, x1); x2 = min(c_w, x2);
-                                
-                                # Adjustment for source if clipped
-                                sy1 = max(0, -y_pos); sy2 = sy1 + (y2 - y1);
-                                sx1 = max(0, -x_pos); sx2 = sx1 + (x2 - x1);
-
-                                if y2 > y1 and x2 > x1:
-                                    canvas[y1:y2, x1:x2] = sticker_np[sy1:sy2, sx1:sx2, :3]
-                                    # Draw Selection Border (CapCut Style)
-                                    cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 0, 0), 3) # Outer Black
-                                    cv2.rectangle(canvas, (x1, y1), (x2, y2), (255, 255, 255), 1) # Inner White
-                        
-                        except Exception as e:
-                            # Silently fail if sticker can't be loaded
-                            pass
-                
-                final_frame_ready = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
-
-                # SHARE WITH MAIN THREAD
-                self.latest_frame = final_frame_ready
-                
-                # Sleep with adjusted interval for speed
-                elapsed = time.time() - start_time
-                wait = adjusted_interval - elapsed
-                if wait < 0.01: wait = 0.01
-                time.sleep(wait)
-            
-        except Exception as e:
-            print(f"Preview error: {e}")
-        finally:
-            # CRITICAL: Always release video capture to prevent file locks
-            try:
-                if 'cap' in locals() and cap is not None:
-                    cap.release()
-            except:
-                pass
-            self.latest_frame = None
+        """Worker Thread: decoder -> ring buffer -> effects pipeline (see UI/preview_player.py). NO UI interaction."""
+        self.preview_player.play_preview_thread(filepath, thread_id)
 
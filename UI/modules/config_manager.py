@@ -65,6 +65,8 @@ class ConfigManager:
         g.enable_subtitles = tk.BooleanVar(value=False)
         g.subtitle_language = tk.StringVar(value="auto (Tự động)")  # Auto-detect by default
         g.force_google_subs = tk.BooleanVar(value=False)
+        g.asr_profile = tk.StringVar(value="balanced")  # draft / balanced / accurate
+        g.asr_batch_mode = tk.BooleanVar(value=False)  # Cross-file batched ASR
         g.subtitle_font_size = tk.IntVar(value=14)
         g.enable_subtitle_bar = tk.BooleanVar(value=False)
         g.subtitle_bar_height = tk.IntVar(value=80)
@@ -106,6 +108,10 @@ class ConfigManager:
         g.use_gpu = tk.BooleanVar(value=True)
         g.status_var = tk.StringVar(value="Sẵn sàng")
         g.enable_minimize_to_tray = tk.BooleanVar(value=False)
+        g.show_preview_stats = tk.BooleanVar(value=False)  # Preview debug overlay (fps/dropped frames)
+        g.use_preview_proxies = tk.BooleanVar(value=True)  # 540p proxies for 4K/HEVC preview
+        g.preview_backend = tk.StringVar(value="OpenCV")  # OpenCV / FFmpeg Pipe
+        g.preview_separate_process = tk.BooleanVar(value=False)  # Decode + effects in a child process
 
     def auto_save_config(self):
         """Auto-save current settings to hidden config file (no user interaction)"""
@@ -144,6 +150,8 @@ class ConfigManager:
                     "enable_subtitles": g.enable_subtitles.get(),
                     "subtitle_language": g.subtitle_language.get(),
                     "force_google_subs": g.force_google_subs.get(),
+                    "asr_profile": g.asr_profile.get(),
+                    "asr_batch_mode": g.asr_batch_mode.get(),
                     "enable_subtitle_bar": g.enable_subtitle_bar.get(),
                     "subtitle_bar_height": g.subtitle_bar_height.get()
                 },
@@ -169,7 +177,11 @@ class ConfigManager:
                 "system": {
                     "num_threads": g.num_threads.get(),
                     "use_gpu": g.use_gpu.get(),
-                    "enable_minimize_to_tray": g.enable_minimize_to_tray.get()
+                    "enable_minimize_to_tray": g.enable_minimize_to_tray.get(),
+                    "show_preview_stats": g.show_preview_stats.get(),
+                    "use_preview_proxies": g.use_preview_proxies.get(),
+                    "preview_backend": g.preview_backend.get(),
+                    "preview_separate_process": g.preview_separate_process.get()
                 }
             }
             
@@ -240,6 +252,8 @@ class ConfigManager:
                 g.enable_subtitles.set(s.get("enable_subtitles", False))
                 g.subtitle_language.set(s.get("subtitle_language", "auto (Tự động)"))
                 g.force_google_subs.set(s.get("force_google_subs", False))
+                g.asr_profile.set(s.get("asr_profile", "balanced"))
+                g.asr_batch_mode.set(s.get("asr_batch_mode", False))
                 g.enable_subtitle_bar.set(s.get("enable_subtitle_bar", False))
                 g.subtitle_bar_height.set(s.get("subtitle_bar_height", 80))
             
@@ -263,6 +277,10 @@ class ConfigManager:
                 g.num_threads.set(sys.get("num_threads", detect_optimal_threads()))
                 g.use_gpu.set(sys.get("use_gpu", True))
                 g.enable_minimize_to_tray.set(sys.get("enable_minimize_to_tray", False))
+                g.show_preview_stats.set(sys.get("show_preview_stats", False))
+                g.use_preview_proxies.set(sys.get("use_preview_proxies", True))
+                g.preview_backend.set(sys.get("preview_backend", "OpenCV"))
+                g.preview_separate_process.set(sys.get("preview_separate_process", False))
             
             print(f"✅ Auto-loaded config from: {self.auto_config_file}")
             if hasattr(g, 'log'): g.log("✅ Đã tải cấu hình đã lưu")
@@ -316,6 +334,8 @@ class ConfigManager:
                         "enable_subtitles": g.enable_subtitles.get(),
                         "subtitle_language": g.subtitle_language.get(),
                         "force_google_subs": g.force_google_subs.get(),
+                        "asr_profile": g.asr_profile.get(),
+                        "asr_batch_mode": g.asr_batch_mode.get(),
                         "enable_subtitle_bar": g.enable_subtitle_bar.get(),
                         "subtitle_bar_height": g.subtitle_bar_height.get()
                     },
@@ -336,7 +356,11 @@ class ConfigManager:
                     "system": {
                         "num_threads": g.num_threads.get(),
                         "use_gpu": g.use_gpu.get(),
-                        "enable_minimize_to_tray": g.enable_minimize_to_tray.get()
+                        "enable_minimize_to_tray": g.enable_minimize_to_tray.get(),
+                        "show_preview_stats": g.show_preview_stats.get(),
+                        "use_preview_proxies": g.use_preview_proxies.get(),
+                        "preview_backend": g.preview_backend.get(),
+                        "preview_separate_process": g.preview_separate_process.get()
                     }
                 }
                 with open(filename, 'w', encoding='utf-8') as f:
@@ -408,6 +432,8 @@ class ConfigManager:
                     g.enable_subtitles.set(s.get("enable_subtitles", False))
                     g.subtitle_language.set(s.get("subtitle_language", "auto (Tự động)"))
                     g.force_google_subs.set(s.get("force_google_subs", False))
+                    g.asr_profile.set(s.get("asr_profile", "balanced"))
+                    g.asr_batch_mode.set(s.get("asr_batch_mode", False))
                     g.enable_subtitle_bar.set(s.get("enable_subtitle_bar", False))
                     
                 if "intro_outro" in config:
@@ -438,6 +464,10 @@ class ConfigManager:
                     g.num_threads.set(sys.get("num_threads", detect_optimal_threads()))
                     g.use_gpu.set(sys.get("use_gpu", True))
                     g.enable_minimize_to_tray.set(sys.get("enable_minimize_to_tray", False))
+                    g.show_preview_stats.set(sys.get("show_preview_stats", False))
+                    g.use_preview_proxies.set(sys.get("use_preview_proxies", True))
+                    g.preview_backend.set(sys.get("preview_backend", "OpenCV"))
+                    g.preview_separate_process.set(sys.get("preview_separate_process", False))
 
                 g.log(f"✅ Đã tải cấu hình từ: {filename}")
                 messagebox.showinfo("Thành công", f"Đã tải cấu hình từ:\n{os.path.basename(filename)}")
@@ -479,6 +509,8 @@ class ConfigManager:
             g.enable_subtitles.set(False)
             g.subtitle_language.set("auto (Tự động)")
             g.force_google_subs.set(False)
+            g.asr_profile.set("balanced")
+            g.asr_batch_mode.set(False)
             g.enable_subtitle_bar.set(False)
             g.subtitle_bar_height.set(80)
             
@@ -1,138 +1,616 @@
 # Video Preview Player Logic
+# Pipeline: decoder stage -> frame ring buffer -> effects stage -> UI stage (presented on a clock)
 # Handles video playback, pause, seek, and realtime effects
 
 import cv2
 import numpy as np
 import time
 import threading
+import collections
 import gc
-from PIL import Image
+
+from UI.preview_sources import open_frame_source
+from UI.effects_preview import CompiledEffectPipeline, QUALITY_LADDER, DEFAULT_QUALITY_LEVEL
+
+
+# Decoded frames kept ahead of the playhead
+RING_CAPACITY = 8
+# Processed frames waiting for the UI
+OUTPUT_CAPACITY = 3
+
+
+class FrameRingBuffer:
+    """Bounded FIFO of decoded frames between the decoder and the effects stage"""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item, timeout=0.1):
+        """Block while full. Returns False on timeout so the caller can re-check stop/seek flags"""
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                self._cond.wait(timeout)
+                if len(self._items) >= self.capacity:
+                    return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=0.1):
+        """Oldest frame, or None if nothing arrived within timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+                if not self._items:
+                    return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PlaybackClock:
+    """Maps wall time to stream time (seconds), honours pause and speed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base_pts = 0.0
+        self._base_wall = time.perf_counter()
+        self._paused = False
+        self.speed = 1.0
+
+    def _now_locked(self):
+        if self._paused:
+            return self._base_pts
+        return self._base_pts + (time.perf_counter() - self._base_wall) * self.speed
+
+    def now(self):
+        with self._lock:
+            return self._now_locked()
+
+    def reset(self, pts):
+        with self._lock:
+            self._base_pts = pts
+            self._base_wall = time.perf_counter()
+
+    def set_paused(self, paused):
+        with self._lock:
+            if paused != self._paused:
+                self._base_pts = self._now_locked()
+                self._base_wall = time.perf_counter()
+                self._paused = paused
+
+    def set_speed(self, speed):
+        with self._lock:
+            if speed != self.speed:
+                self._base_pts = self._now_locked()
+                self._base_wall = time.perf_counter()
+                self.speed = speed
+
+
+class PreviewStats:
+    """Frame pacing and dropped-frame counters (shown in the debug overlay)"""
+
+    def __init__(self):
+        self.decoded = 0
+        self.presented = 0
+        self.dropped_late = 0   # Behind the clock -> skipped before effects
+        self.dropped_ui = 0     # Processed but replaced before the UI showed it
+        self.skipped = 0        # Skipped on purpose by the quality governor
+        self.effect_ms = 0.0    # Moving average of effect cost per frame
+        self.latency_ms = 0.0   # Moving average of how late frames reach the UI (vs their pts)
+        self._last_present = None
+        self._intervals = collections.deque(maxlen=60)
+
+    def on_effect(self, ms):
+        self.effect_ms = ms if self.effect_ms == 0 else self.effect_ms * 0.9 + ms * 0.1
+
+    def on_present(self, latency=0.0):
+        ms = max(0.0, latency * 1000)
+        self.latency_ms = ms if self.latency_ms == 0 else self.latency_ms * 0.9 + ms * 0.1
+        now = time.perf_counter()
+        if self._last_present is not None:
+            self._intervals.append(now - self._last_present)
+        self._last_present = now
+        self.presented += 1
+
+    def pacing(self):
+        """(presented fps, interval jitter in ms) over the last 60 frames"""
+        if len(self._intervals) < 2:
+            return 0.0, 0.0
+        intervals = np.array(self._intervals)
+        return 1.0 / max(1e-6, intervals.mean()), float(intervals.std() * 1000)
+
+    def overlay_lines(self, ring_fill, ring_capacity):
+        fps, jitter = self.pacing()
+        return [
+            f"present {fps:4.1f} fps  jitter {jitter:4.1f} ms",
+            f"effects {self.effect_ms:4.1f} ms  latency {self.latency_ms:4.1f} ms",
+            f"decoded {self.decoded}  shown {self.presented}  ring {ring_fill}/{ring_capacity}",
+            f"dropped late {self.dropped_late}  ui {self.dropped_ui}  skip {self.skipped}",
+        ]
+
+
+def poll_interval_for(fps, dragging=False):
+    """Tk poll period in ms: about twice the presented frame rate, 60 Hz while dragging a sticker"""
+    if dragging:
+        return 16
+    return int(max(8, min(50, 500 / max(1.0, fps))))
+
+
+class QualityGovernor:
+    """
+    Adjusts processing resolution, blur downscale and frame skipping to hold the target frame rate
+
+    Measures per-frame effect cost and presentation latency (PreviewStats). Steps down at once
+    when over budget, steps back up only after a few good measurements in a row. While a sticker
+    is dragged latency comes first: the budget is halved and resolution capped.
+    """
+
+    EVAL_INTERVAL = 0.5     # Seconds between decisions
+    UPGRADE_AFTER = 3       # Good evaluations in a row before stepping up
+    MAX_SKIP = 3            # Render at most every 3rd frame at the lowest resolution
+    DRAG_MAX_LEVEL = 2      # 540p while dragging
+
+    def __init__(self, level=DEFAULT_QUALITY_LEVEL):
+        self.level = level
+        self.skip = 1
+        self.target_fps = 24.0
+        self._good = 0
+        self._last_eval = time.perf_counter()
+
+    @property
+    def quality(self):
+        return QUALITY_LADDER[self.level]
+
+    def reset(self):
+        """New file: keep the learned level (machine speed), start without frame skipping"""
+        self.skip = 1
+        self._good = 0
+        self._last_eval = time.perf_counter()
+
+    def max_level(self, display_size):
+        """Highest level worth processing at: the first one covering the preview height"""
+        if not display_size:
+            return DEFAULT_QUALITY_LEVEL
+        for i, q in enumerate(QUALITY_LADDER):
+            if q.proc_height >= display_size[1]:
+                return i
+        return len(QUALITY_LADDER) - 1
+
+    def update(self, stats, target_fps, dragging=False, display_size=None):
+        """
+        Re-evaluate (at most every EVAL_INTERVAL)
+
+        Returns:
+            tuple: (PreviewQuality, frame skip) to use for the next frames
+        """
+        self.target_fps = max(1.0, min(60.0, target_fps))
+        limit = self.max_level(display_size)
+        if dragging:
+            limit = min(limit, self.DRAG_MAX_LEVEL)
+        if self.level > limit:
+            self.level = limit
+            stats.effect_ms = 0.0  # Re-measure at the new level
+
+        now = time.perf_counter()
+        if now - self._last_eval < self.EVAL_INTERVAL:
+            return self.quality, self.skip
+        self._last_eval = now
+
+        budget = 1000.0 / self.target_fps
+        if dragging:
+            budget *= 0.5
+        cost, latency = stats.effect_ms, stats.latency_ms
+
+        if cost > 0.85 * budget or latency > 2 * budget:
+            self._good = 0
+            if self.level > 0:
+                self.level -= 1
+                stats.effect_ms = 0.0
+            elif self.skip < self.MAX_SKIP:
+                self.skip += 1
+        elif cost < 0.5 * budget and latency < budget:
+            self._good += 1
+            if self._good >= self.UPGRADE_AFTER:
+                self._good = 0
+                if self.skip > 1:
+                    self.skip -= 1
+                elif self.level < limit:
+                    self.level += 1
+                    stats.effect_ms = 0.0
+        else:
+            self._good = 0
+        return self.quality, self.skip
+
+
+def draw_stats_overlay(frame, lines):
+    """Draw debug text in the top-left corner (frame is modified in place)"""
+    y = 18
+    box_w = 10 + max(len(line) for line in lines) * 8
+    cv2.rectangle(frame, (0, 0), (min(frame.shape[1], box_w), 8 + 18 * len(lines)), (0, 0, 0), -1)
+    for line in lines:
+        cv2.putText(frame, line, (6, y), cv2.FONT_HERSHEY_SIMPLEX, 0.42, (0, 255, 0), 1, cv2.LINE_AA)
+        y += 18
+    return frame
 
 
 class VideoPreviewPlayer:
     """Manages video preview playback with pause/seek support"""
-    
+
     def __init__(self, main_window):
         self.main_window = main_window
         self.stop_preview = False
         self.is_paused = False
         self.seeking = False
         self.seek_target_frame = 0
-        
+
         self.video_total_frames = 0
         self.video_current_frame = 0
         self.video_fps = 24.0
-        
+
+        self.ring = FrameRingBuffer(RING_CAPACITY)
+        self.clock = PlaybackClock()
+        self.stats = PreviewStats()
+        self.governor = QualityGovernor()
+        self._output = collections.deque(maxlen=OUTPUT_CAPACITY)  # (pts, frame_idx, frame)
+        self._output_lock = threading.Lock()
+        self._seek_generation = 0
+        self._pipeline = None
+        self._base_item = None  # Decoded item the pipeline's base layer was rendered from
+        self.display_size = None  # (w, h) of the preview area, set by the UI thread
+
+    @property
+    def paused(self):
+        return self.is_paused or getattr(self.main_window, 'is_paused', False)
+
+    def _is_active(self, thread_id):
+        mw = self.main_window
+        return not self.stop_preview and not mw.stop_preview and mw.preview_id == thread_id
+
     def play_preview_thread(self, filepath, thread_id):
-        """Worker Thread: Reads frames, applies effects, handles pause/seek"""
+        """Worker Thread: runs the effects stage and owns the decoder stage thread"""
+        cap = None
+        decoder = None
+        session_stop = threading.Event()
         try:
-            import time
-            
             # Start UI Polling from Main Thread context
             self.main_window.root.after(0, self.main_window.start_preview_polling)
 
-            cap = cv2.VideoCapture(filepath)
-            
-            # Get video info
-            self.video_total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.video_fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
-            
-            # Target 24 FPS (Cinematic/Smooth) - Safe limit
-            target_fps = 24.0
-            frame_interval = 1.0 / target_fps
-            
-            frame_count = 0
-            
-            while not self.stop_preview and cap.isOpened():
-                start_time = time.time()
-                
-                if self.main_window.preview_id != thread_id:
-                    break
-
-                # Handle Pause
-                while self.is_paused and not self.stop_preview:
-                    time.sleep(0.1)
-                    if self.main_window.preview_id != thread_id:
-                        break
-                
-                # Handle Seek
-                if self.seeking:
-                    try:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, self.seek_target_frame)
-                        frame_count = self.seek_target_frame
-                        self.seeking = False
-                    except:
-                        self.seeking = False
-
-                # Loop video
-                try:
-                    if cap.get(cv2.CAP_PROP_POS_FRAMES) >= cap.get(cv2.CAP_PROP_FRAME_COUNT):
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # Preview from the low-res proxy when one is ready (same frame count as the source)
+            self._using_proxy = False
+            source_path = filepath
+            try:
+                if self.main_window.use_preview_proxies.get():
+                    from utils.proxy_media import get_proxy_path
+                    proxy_path = get_proxy_path(filepath)
+                    if proxy_path:
+                        source_path = proxy_path
+                        self._using_proxy = True
+            except Exception as e:
+                print(f"Proxy lookup failed: {e}")
+
+            try:
+                backend = self.main_window.preview_backend.get()
+            except Exception:
+                backend = None
+            cap = open_frame_source(source_path, backend)
+
+            # Get video info once (not per frame)
+            self.video_total_frames = cap.frame_count
+            self.video_fps = cap.fps
+            self.video_current_frame = 0
+
+            # on_seek() reads these from the main window
+            self.main_window.video_total_frames = self.video_total_frames
+            self.main_window.video_fps = self.video_fps
+
+            self.seeking = False
+            self.ring.clear()
+            with self._output_lock:
+                self._output.clear()
+            self.stats = PreviewStats()
+            self.governor.reset()
+            self.clock.reset(0.0)
+
+            # Keyframe index for fast seeking (built once per file in the background)
+            self._filepath = filepath
+            self._keyframes = None
+            self._keyframes_checked = 0.0
+            try:
+                from utils.media_catalog import schedule_keyframe_index
+                schedule_keyframe_index(filepath)
+            except Exception as e:
+                print(f"Keyframe index unavailable: {e}")
+
+            decoder = threading.Thread(target=self._decoder_loop, args=(cap, thread_id, session_stop), daemon=True)
+            decoder.start()
+
+            self._effects_loop(thread_id)
 
-                    ret, frame = cap.read()
-                    if not ret:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        time.sleep(0.1)
-                        continue
-                except:
-                    break
-                
-                frame_count += 1
-                
-                # Update seek bar and time display
-                current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                self.video_current_frame = current_frame
-                if self.video_total_frames > 0:
-                    seek_percent = (current_frame / self.video_total_frames) * 100
-                    self.main_window.root.after(0, lambda p=seek_percent: self.main_window.seek_var.set(p))
-                    
-                    current_time = current_frame / self.video_fps if self.video_fps > 0 else 0
-                    total_time = self.video_total_frames / self.video_fps if self.video_fps > 0 else 0
-                    time_text = f"{self.format_time(current_time)} / {self.format_time(total_time)}"
-                    self.main_window.root.after(0, lambda t=time_text: self.main_window.time_label.config(text=t))
-                
-                # Apply Speed Preview
-                speed_factor = self.main_window.speed_factor.get() if self.main_window.enable_speed.get() else 1.0
-                
-                if speed_factor > 1.0:
-                    skip_frames = int(speed_factor) - 1
-                    if skip_frames > 0 and frame_count % (skip_frames + 1) != 0:
-                        continue
-                
-                adjusted_interval = frame_interval / speed_factor
-                
-                if frame_count % 50 == 0:
-                    gc.collect()
-                
-                # Process frame (resize, apply effects, etc.)
-                final_frame = self.process_frame(frame)
-                
-                # Share with main thread
-                self.main_window.latest_frame = final_frame
-                
-                # Sleep with adjusted interval
-                elapsed = time.time() - start_time
-                wait = adjusted_interval - elapsed
-                if wait < 0.01: wait = 0.01
-                time.sleep(wait)
-            
         except Exception as e:
             print(f"Preview error: {e}")
         finally:
+            session_stop.set()
+            if decoder is not None:
+                decoder.join(timeout=1.0)
             # CRITICAL: Always release video capture to prevent file locks
             try:
-                if 'cap' in locals() and cap is not None:
+                if cap is not None:
                     cap.release()
             except:
                 pass
             self.main_window.latest_frame = None
-    
-    def process_frame(self, frame):
-        """Apply all realtime effects to frame"""
-        # This will call the effects processor
-        from UI.effects_preview import apply_realtime_effects
-        return apply_realtime_effects(self.main_window, frame)
-    
+
+    # === DECODER STAGE ===
+    def _decoder_loop(self, cap, thread_id, session_stop):
+        """Decode ahead of the playhead into the ring buffer"""
+        frame_idx = 0
+        loop_offset = 0.0  # Stream time keeps growing across loops so the clock never jumps back
+        fps = self.video_fps
+        frame_dur = 1.0 / fps
+
+        def running():
+            return not session_stop.is_set() and self._is_active(thread_id)
+
+        try:
+            while running():
+                # Handle Seek
+                if self.seeking:
+                    target = max(0, int(self.seek_target_frame))
+                    self.seeking = False
+                    self._seek_generation += 1
+                    loop_offset = 0.0
+                    self.ring.clear()
+                    with self._output_lock:
+                        self._output.clear()
+                    self.clock.reset(target / fps)
+                    if not self._seek_to_frame(cap, target, running):
+                        continue  # Superseded by a newer seek while refining
+                    frame_idx = target
+
+                pts = loop_offset + frame_idx / fps
+
+                # Catch up: frame already late and nothing buffered -> grab without converting
+                if (not self.paused and len(self.ring) == 0
+                        and pts < self.clock.now() - 2 * frame_dur):
+                    if cap.grab():
+                        frame_idx += 1
+                        self.stats.dropped_late += 1
+                        continue
+                    ret = False
+                else:
+                    ret, frame = cap.read()
+
+                if not ret:
+                    # End of file (or read error) -> loop video
+                    loop_offset += frame_idx / fps
+                    frame_idx = 0
+                    cap.seek(0)
+                    time.sleep(0.01)
+                    continue
+
+                # (generation, frame index, pts, BGR frame, exact) - exact=False only for a seek's keyframe stand-in
+                item = (self._seek_generation, frame_idx, pts, frame, True)
+                while running() and not self.seeking:
+                    if self.ring.put(item):
+                        break
+
+                frame_idx += 1
+                self.stats.decoded += 1
+        except Exception as e:
+            print(f"Preview decoder error: {e}")
+
+    def _get_keyframes(self):
+        """Keyframe times of the current file, re-checking the catalog at most every 2s until indexed"""
+        if self._keyframes is None and time.time() - self._keyframes_checked > 2.0:
+            self._keyframes_checked = time.time()
+            try:
+                from utils.media_catalog import get_keyframe_index
+                self._keyframes = get_keyframe_index(self._filepath)
+            except Exception:
+                self._keyframes = None
+        return self._keyframes
+
+    def _seek_to_frame(self, cap, target, running):
+        """
+        Two-step seek: jump to the preceding keyframe and show it immediately,
+        then decode forward to the exact frame (grab only, no conversion)
+
+        Returns:
+            bool: False if a newer seek arrived before the exact frame was reached
+        """
+        keyframes = None if self._using_proxy else self._get_keyframes()
+        if not keyframes:
+            # Proxies are all-intra: every frame is a keyframe
+            # Not indexed yet -> let the backend seek (may decode from the previous keyframe)
+            cap.seek(target)
+            return True
+
+        from utils.media_catalog import nearest_keyframe
+        fps = self.video_fps
+        kf_frame = min(target, int(round(nearest_keyframe(keyframes, target / fps) * fps)))
+        if kf_frame == target:
+            cap.seek(target)
+            return True
+        # ffmpeg pipe: decode keyframes only for the quick first frame
+        cap.seek(kf_frame, keyframes_only=cap.accurate_seek)
+
+        # Step 1: keyframe shown in place of the target while refining (provisional: exact=False)
+        ret, frame = cap.read()
+        if not ret:
+            cap.seek(target)
+            return True
+        self.ring.put((self._seek_generation, target, target / fps, frame, False), timeout=0.05)
+
+        if cap.accurate_seek:
+            # Step 2 (ffmpeg): restart at the exact time, ffmpeg decodes forward in its own threads
+            if self.seeking or not running():
+                return False
+            cap.seek(target)
+            self.clock.reset(target / fps)
+            return True
+
+        # Step 2: decode forward to the exact frame
+        for _ in range(target - kf_frame - 1):
+            if self.seeking or not running():
+                return False
+            if not cap.grab():
+                break
+        self.clock.reset(target / fps)
+        return True
+
+    # === EFFECTS STAGE ===
+    def _effects_loop(self, thread_id):
+        """Apply effects to decoded frames and queue them for the UI clock"""
+        held = None          # Last frame, re-rendered while paused so edits stay visible
+        last_render = 0.0
+        frame_dur = 1.0 / self.video_fps
+        processed = 0
+
+        while self._is_active(thread_id):
+            version, params = self.main_window.effect_params.current()
+            self.clock.set_speed(params.speed)
+            self.clock.set_paused(self.paused)
+            dragging = getattr(self.main_window, 'sticker_dragging', False)
+            _, skip = self.governor.update(
+                self.stats, self.video_fps * params.speed,
+                dragging=dragging, display_size=self.display_size
+            )
+
+            if self.paused:
+                # Seek while paused -> show the first frame at the new position, then keep
+                # draining until the exact frame replaces the keyframe stand-in
+                if (held is None or held[0] != self._seek_generation or not held[4]) and len(self.ring) > 0:
+                    item = self.ring.get(timeout=0)
+                    if item is not None and item[0] == self._seek_generation:
+                        held = item
+                        last_render = 0.0
+                # Re-render the held frame only when an effect changed (or after a seek)
+                # Dragging only re-blends overlays on the cached base layer -> follow the mouse at ~60 Hz
+                min_gap = 0.012 if dragging else 0.05
+                if (held is not None and time.perf_counter() - last_render > min_gap
+                        and (last_render == 0.0 or self._pipeline_stale(version))):
+                    self._render(held, pts=self.clock.now())
+                    last_render = time.perf_counter()
+                time.sleep(0.004 if dragging else 0.02)
+                continue
+
+            item = self.ring.get(timeout=0.1)
+            if item is None:
+                continue
+            generation, frame_idx, pts, frame, _exact = item
+            if generation != self._seek_generation:
+                continue  # Stale frame from before a seek
+
+            # Late by more than a frame and a newer one is waiting -> skip effects
+            if pts < self.clock.now() - frame_dur and len(self.ring) > 0:
+                self.stats.dropped_late += 1
+                continue
+
+            # Governor frame skip: keep every Nth frame (the held frame simply stays longer)
+            if skip > 1 and frame_idx % skip:
+                self.stats.skipped += 1
+                continue
+
+            held = item
+            self._render(item, pts=pts)
+            last_render = time.perf_counter()
+
+            processed += 1
+            if processed % 50 == 0:
+                gc.collect()  # Force GC every 50 frames to prevent RAM spike
+
+            # Don't run far ahead of the clock (output queue is small)
+            while (self._is_active(thread_id) and not self.paused and not self.seeking
+                   and pts - self.clock.now() > 2 * frame_dur):
+                time.sleep(0.005)
+
+    def _render(self, item, pts):
+        generation, frame_idx, _pts, frame, _exact = item
+        # Same decoded item as last render (paused edits) -> base layer can be reused
+        reuse_base = item is self._base_item
+        self._base_item = item
+        t0 = time.perf_counter()
+        final_frame = self.process_frame(frame, reuse_base=reuse_base, t=pts)
+        self.stats.on_effect((time.perf_counter() - t0) * 1000)
+
+        if self._pipeline.params.show_stats:
+            q = self._pipeline.quality
+            lines = self.stats.overlay_lines(len(self.ring), self.ring.capacity)
+            lines.append(f"quality {q.proc_height}p  blur 1/{q.blur_downscale}  skip {self.governor.skip}")
+            draw_stats_overlay(final_frame, lines)
+
+        with self._output_lock:
+            if generation == self._seek_generation:
+                if len(self._output) == self._output.maxlen:
+                    self.stats.dropped_ui += 1
+                self._output.append((pts, frame_idx, final_frame))
+
+    # === UI STAGE ===
+    def present(self):
+        """
+        Called from the Tk poll loop: newest processed frame that is due on the clock
+
+        Returns:
+            numpy RGB frame, or None to keep showing the current one
+        """
+        now = self.clock.now() + 0.5 / self.video_fps
+        chosen = None
+        with self._output_lock:
+            while self._output and self._output[0][0] <= now:
+                if chosen is not None:
+                    self.stats.dropped_ui += 1
+                chosen = self._output.popleft()
+        if chosen is None:
+            return None
+        self.video_current_frame = chosen[1]
+        self.stats.on_present(latency=self.clock.now() - chosen[0])
+        return chosen[2]
+
+    def poll_interval_ms(self, dragging=False):
+        return poll_interval_for(self.governor.target_fps, dragging)
+
+    def seek(self, target_frame):
+        """Request a seek (picked up by the decoder stage)"""
+        self.seek_target_frame = target_frame
+        self.seeking = True
+
+    def playback_status(self):
+        """(seek percent, time text) of the last presented frame - polled by the UI a few times per second"""
+        if self.video_total_frames <= 0:
+            return None
+        seek_percent = (self.video_current_frame / self.video_total_frames) * 100
+        current_time = self.video_current_frame / self.video_fps if self.video_fps > 0 else 0
+        total_time = self.video_total_frames / self.video_fps if self.video_fps > 0 else 0
+        return seek_percent, f"{self.format_time(current_time)} / {self.format_time(total_time)}"
+
+    def process_frame(self, frame, reuse_base=False, t=0.0):
+        """Apply all realtime effects to frame (pipeline recompiled only when params/sizes/quality change)"""
+        version, params = self.main_window.effect_params.current()
+        pipeline = self._pipeline
+        if self._pipeline_stale(version, frame.shape):
+            pipeline = CompiledEffectPipeline(params, version, frame.shape, self.display_size,
+                                              self.governor.quality, previous=pipeline)
+            self._pipeline = pipeline
+        return pipeline.run(frame, reuse_base=reuse_base, t=t)
+
+    def _pipeline_stale(self, version, frame_shape=None):
+        pipeline = self._pipeline
+        return (pipeline is None or pipeline.version != version
+                or pipeline.display_size != self.display_size
+                or pipeline.quality != self.governor.quality
+                or (frame_shape is not None and pipeline.frame_shape != frame_shape))
+
     def format_time(self, seconds):
         """Format seconds to MM:SS"""
         mins = int(seconds // 60)
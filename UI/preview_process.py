@@ -0,0 +1,392 @@
+# Process-Isolated Preview Engine
+# Decode + effects run in a child process (own GIL), so Tk event handling and the
+# batch threads' log/progress callbacks no longer compete with the preview.
+#   - Frames: multiprocessing.shared_memory double buffer (header + 2 slots)
+#   - Control: queue of small commands (open, seek, pause, params snapshot, display size)
+# The child runs the normal VideoPreviewPlayer against a headless stand-in for the main window.
+# The GUI side (PreviewProcessClient) has the same interface the main window uses on VideoPreviewPlayer.
+
+import time
+import queue
+import struct
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# seq, session, frame_idx, front slot, height, width
+HEADER_FMT = '<qqqqii'
+HEADER_BYTES = 64
+# Smallest slot: a 1080p RGB frame (slots are sized to the screen when it is bigger)
+MIN_SLOT_BYTES = 1920 * 1080 * 3
+
+
+# === CHILD PROCESS ===
+
+class _Value:
+    """Stand-in for a Tk variable"""
+
+    def __init__(self, value=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class _NoRoot:
+    def after(self, ms, func=None, *args):
+        return None
+
+
+class _SnapshotSource:
+    """Latest effect params snapshot received from the GUI (same interface as EffectParamsPublisher)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = (0, None)
+
+    def update(self, version, params):
+        with self._lock:
+            self._snapshot = (version, params)
+
+    def current(self):
+        with self._lock:
+            return self._snapshot
+
+
+class _EngineHost:
+    """Headless replacement for the main window, as seen by VideoPreviewPlayer"""
+
+    def __init__(self):
+        self.stop_preview = False
+        self.is_paused = False
+        self.preview_id = 0
+        self.session = 0
+        self.latest_frame = None
+        self.video_total_frames = 0
+        self.video_fps = 24.0
+        self.sticker_dragging = False  # Quality governor favours latency while dragging
+        self.root = _NoRoot()
+        self.effect_params = _SnapshotSource()
+        self.preview_backend = _Value(None)
+        self.use_preview_proxies = _Value(True)
+
+    def start_preview_polling(self):
+        pass
+
+
+def _publish_loop(player, host, shm, slot_bytes, lock, status, stop_event):
+    """Copy each due frame into the back slot, then flip the header under the lock"""
+    seq = 0
+    front = 0
+    info = None
+    while not stop_event.is_set():
+        try:
+            current = (host.session, player.video_total_frames, player.video_fps)
+            if current != info and player.video_total_frames > 0:
+                info = current
+                status.put(('info',) + current)
+
+            frame = None if host.stop_preview else player.present()
+            if frame is None:
+                time.sleep(0.004)
+                continue
+
+            h, w = frame.shape[:2]
+            if h * w * 3 > slot_bytes:
+                continue  # Display larger than the slot (screen changed) -> client clamps the size
+            back = 1 - front
+            dst = np.ndarray((h, w, 3), dtype=np.uint8, buffer=shm.buf, offset=HEADER_BYTES + back * slot_bytes)
+            np.copyto(dst, frame)
+            del dst
+            seq += 1
+            with lock:
+                struct.pack_into(HEADER_FMT, shm.buf, 0, seq, host.session, player.video_current_frame, back, h, w)
+            front = back
+        except Exception as e:
+            print(f"Preview engine publish error: {e}")
+            time.sleep(0.05)
+
+
+def run_engine(shm_name, slot_bytes, control, status, lock):
+    """Child process entry point: executes control commands until 'quit'"""
+    from UI.preview_player import VideoPreviewPlayer
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    host = _EngineHost()
+    player = VideoPreviewPlayer(host)
+    worker = None
+    stop_event = threading.Event()
+    publisher = threading.Thread(target=_publish_loop, args=(player, host, shm, slot_bytes, lock, status, stop_event), daemon=True)
+    publisher.start()
+
+    def stop_worker():
+        host.stop_preview = True
+        if worker is not None:
+            worker.join(timeout=2.0)
+
+    try:
+        while True:
+            try:
+                cmd = control.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            kind = cmd[0]
+            if kind == 'params':
+                host.effect_params.update(cmd[1], cmd[2])
+            elif kind == 'pause':
+                host.is_paused = cmd[1]
+            elif kind == 'dragging':
+                host.sticker_dragging = cmd[1]
+            elif kind == 'display':
+                player.display_size = cmd[1]
+            elif kind == 'seek':
+                player.seek(cmd[1])
+            elif kind == 'open':
+                _, session, filepath, backend, use_proxies = cmd
+                stop_worker()
+                with player._output_lock:
+                    player._output.clear()
+                host.session = session
+                host.preview_backend.set(backend)
+                host.use_preview_proxies.set(use_proxies)
+                host.preview_id += 1
+                host.stop_preview = False
+                worker = threading.Thread(target=player.play_preview_thread, args=(filepath, host.preview_id), daemon=True)
+                worker.start()
+            elif kind == 'close':
+                stop_worker()
+            elif kind == 'quit':
+                break
+    except (KeyboardInterrupt, EOFError, OSError):
+        pass
+    finally:
+        stop_worker()
+        stop_event.set()
+        publisher.join(timeout=1.0)
+        try:
+            shm.close()
+        except Exception:
+            pass
+
+
+# === GUI PROCESS ===
+
+class PreviewProcessClient:
+    """Drives the preview engine process; same interface as VideoPreviewPlayer for the main window"""
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.stop_preview = False
+        self.is_paused = False
+
+        self.video_total_frames = 0
+        self.video_current_frame = 0
+        self.video_fps = 24.0
+        self.display_size = None
+
+        # Screen size is read here (Tk thread); slots must hold a full-screen preview
+        try:
+            screen_w = main_window.root.winfo_screenwidth()
+            screen_h = main_window.root.winfo_screenheight()
+        except Exception:
+            screen_w, screen_h = 1920, 1080
+        self._max_display = (screen_w, screen_h)
+        self._slot_bytes = max(MIN_SLOT_BYTES, screen_w * screen_h * 3)
+
+        self._proc = None
+        self._shm = None
+        self._lock = None
+        self._control = None
+        self._status = None
+        self._session = 0
+        self._sent = {}
+        self._last_seq = 0
+        self._buffers = [None, None]  # Frames handed to Tk (copied out of shared memory)
+        self._buf_idx = 0
+        self._engine_lock = threading.Lock()
+
+    @property
+    def paused(self):
+        return self.is_paused or getattr(self.main_window, 'is_paused', False)
+
+    def _is_active(self, thread_id):
+        mw = self.main_window
+        return not self.stop_preview and not mw.stop_preview and mw.preview_id == thread_id
+
+    # === ENGINE LIFECYCLE ===
+    def _ensure_engine(self):
+        with self._engine_lock:
+            if self._proc is not None and self._proc.is_alive():
+                return
+            self._close_engine()
+            # spawn everywhere: never fork the Tk process
+            ctx = multiprocessing.get_context('spawn')
+            self._shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + 2 * self._slot_bytes)
+            struct.pack_into(HEADER_FMT, self._shm.buf, 0, 0, 0, 0, 0, 0, 0)
+            self._lock = ctx.Lock()
+            self._control = ctx.Queue()
+            self._status = ctx.Queue()
+            self._proc = ctx.Process(
+                target=run_engine, name="PreviewEngine", daemon=True,
+                args=(self._shm.name, self._slot_bytes, self._control, self._status, self._lock)
+            )
+            self._proc.start()
+            self._sent = {}
+            self._last_seq = 0
+
+    def _close_engine(self):
+        if self._proc is not None:
+            try:
+                self._control.put(('quit',))
+                self._proc.join(timeout=2.0)
+                if self._proc.is_alive():
+                    self._proc.terminate()
+            except Exception:
+                pass
+            self._proc = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except Exception:
+                pass
+            self._shm = None
+
+    def shutdown(self):
+        """Stop the engine process and free the shared memory (app exit)"""
+        self.stop_preview = True
+        with self._engine_lock:
+            self._close_engine()
+
+    def _send(self, *cmd):
+        try:
+            if self._control is not None:
+                self._control.put(cmd)
+        except Exception:
+            pass
+
+    def _sync_controls(self):
+        """Forward pause state, params snapshot and display size when they changed"""
+        if self._control is None:
+            return
+        version, params = self.main_window.effect_params.current()
+        if self._sent.get('version') != version:
+            self._sent['version'] = version
+            self._send('params', version, params)
+        paused = self.paused
+        if self._sent.get('paused') != paused:
+            self._sent['paused'] = paused
+            self._send('pause', paused)
+        dragging = getattr(self.main_window, 'sticker_dragging', False)
+        if self._sent.get('dragging') != dragging:
+            self._sent['dragging'] = dragging
+            self._send('dragging', dragging)
+        display = self.display_size
+        if display is not None:
+            display = (min(display[0], self._max_display[0]), min(display[1], self._max_display[1]))
+        if self._sent.get('display') != display:
+            self._sent['display'] = display
+            self._send('display', display)
+
+    def _drain_status(self):
+        while self._status is not None:
+            try:
+                msg = self._status.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            if msg[0] == 'info' and msg[1] == self._session:
+                self.video_total_frames, self.video_fps = msg[2], msg[3]
+                # on_seek() reads these from the main window
+                self.main_window.video_total_frames = self.video_total_frames
+                self.main_window.video_fps = self.video_fps
+
+    # === PLAYER INTERFACE ===
+    def play_preview_thread(self, filepath, thread_id):
+        """Worker Thread: opens the file in the engine and waits until this preview session ends"""
+        try:
+            self.main_window.root.after(0, self.main_window.start_preview_polling)
+            self._ensure_engine()
+
+            try:
+                backend = self.main_window.preview_backend.get()
+                use_proxies = self.main_window.use_preview_proxies.get()
+            except Exception:
+                backend, use_proxies = None, True
+
+            self._session += 1
+            self.video_total_frames = 0
+            self.video_current_frame = 0
+            self._sync_controls()
+            self._send('open', self._session, filepath, backend, use_proxies)
+
+            while self._is_active(thread_id):
+                if not self._proc.is_alive():
+                    print("Preview engine exited unexpectedly")
+                    break
+                time.sleep(0.05)
+        except Exception as e:
+            print(f"Preview engine error: {e}")
+        finally:
+            if self.main_window.preview_id == thread_id:
+                self._send('close')
+            self.main_window.latest_frame = None
+
+    def seek(self, target_frame):
+        self.video_current_frame = target_frame
+        self._send('seek', target_frame)
+
+    def present(self):
+        """
+        Called from the Tk poll loop: newest frame the engine published
+
+        Returns:
+            numpy RGB frame, or None to keep showing the current one
+        """
+        self._sync_controls()
+        self._drain_status()
+        if self._shm is None:
+            return None
+        # Timeout: a crashed engine must never block the Tk thread
+        if not self._lock.acquire(timeout=0.02):
+            return None
+        try:
+            seq, session, frame_idx, slot, h, w = struct.unpack_from(HEADER_FMT, self._shm.buf, 0)
+            if seq == self._last_seq or session != self._session or h == 0:
+                return None
+            src = np.ndarray((h, w, 3), dtype=np.uint8, buffer=self._shm.buf, offset=HEADER_BYTES + slot * self._slot_bytes)
+            dst = self._buffers[self._buf_idx]
+            if dst is None or dst.shape != src.shape:
+                dst = np.empty_like(src)
+                self._buffers[self._buf_idx] = dst
+            np.copyto(dst, src)
+            del src
+        finally:
+            self._lock.release()
+        self._buf_idx = 1 - self._buf_idx
+        self._last_seq = seq
+        self.video_current_frame = frame_idx
+        return dst
+
+    def poll_interval_ms(self, dragging=False):
+        from UI.preview_player import poll_interval_for
+        return poll_interval_for(self.video_fps, dragging)
+
+    def playback_status(self):
+        """(seek percent, time text) of the last presented frame"""
+        if self.video_total_frames <= 0:
+            return None
+        seek_percent = (self.video_current_frame / self.video_total_frames) * 100
+        current_time = self.video_current_frame / self.video_fps if self.video_fps > 0 else 0
+        total_time = self.video_total_frames / self.video_fps if self.video_fps > 0 else 0
+        return seek_percent, f"{self.format_time(current_time)} / {self.format_time(total_time)}"
+
+    def format_time(self, seconds):
+        """Format seconds to MM:SS"""
+        mins = int(seconds // 60)
+        secs = int(seconds % 60)
+        return f"{mins:02d}:{secs:02d}"
@@ -0,0 +1,148 @@
+# Preview Frame Sources
+# Decoder backends for the preview player:
+#   - OpenCVFrameSource: cv2.VideoCapture (full-res frames, resized later by the effects stage)
+#   - FFmpegPipeFrameSource: ffmpeg scales on the input side and writes rawvideo bgr24 to a pipe,
+#     read with readinto() into a preallocated buffer pool (no per-frame allocation)
+
+import sys
+import subprocess
+import numpy as np
+
+PREVIEW_BACKENDS = ["OpenCV", "FFmpeg Pipe"]
+DEFAULT_PREVIEW_BACKEND = "OpenCV"
+
+# Same height the effects stage works at, so it never has to resize pipe frames again
+PREVIEW_DECODE_HEIGHT = 720
+
+
+class OpenCVFrameSource:
+    """cv2.VideoCapture backend"""
+
+    accurate_seek = False  # CAP_PROP_POS_FRAMES may decode from the previous keyframe or land off by a few frames
+
+    def __init__(self, path):
+        import cv2
+        self._cv2 = cv2
+        self.cap = cv2.VideoCapture(path)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and 0 < fps <= 240 else 24.0
+
+    def read(self):
+        return self.cap.read()
+
+    def grab(self):
+        return self.cap.grab()
+
+    def seek(self, frame_idx, keyframes_only=False):
+        self.cap.set(self._cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+    def release(self):
+        self.cap.release()
+
+
+class FFmpegPipeFrameSource:
+    """
+    ffmpeg rawvideo pipe backend
+
+    Frames returned by read() are views into a reused buffer pool: they stay
+    valid until the pool wraps around (pool_size reads later).
+    """
+
+    accurate_seek = True  # Input-side -ss: ffmpeg seeks to the keyframe and decodes forward itself
+
+    def __init__(self, path, max_height=PREVIEW_DECODE_HEIGHT, pool_size=12):
+        from utils.video_processor import get_video_info
+        self.path = path
+        info = get_video_info(path) or {}
+        src_w, src_h = info.get('width', 1280), info.get('height', 720)
+        self.fps = info.get('fps') or 24.0
+        if not 0 < self.fps <= 240:
+            self.fps = 24.0
+        self.frame_count = int(info.get('duration', 0) * self.fps)
+
+        # Output size: downscale only, keep aspect, even dimensions
+        out_h = min(src_h, max_height)
+        out_w = max(2, int(round(src_w * out_h / src_h / 2)) * 2)
+        out_h = max(2, out_h // 2 * 2)
+        self.width, self.height = out_w, out_h
+
+        self.frame_bytes = out_w * out_h * 3
+        self._pool = [np.empty((out_h, out_w, 3), dtype=np.uint8) for _ in range(pool_size)]
+        self._pool_idx = 0
+        self._scratch = np.empty(self.frame_bytes, dtype=np.uint8)  # grab() target, never handed out
+        self._proc = None
+        self._start(0.0)
+
+    def _get_ffmpeg_path(self):
+        try:
+            from imageio_ffmpeg import get_ffmpeg_exe
+            return get_ffmpeg_exe()
+        except:
+            return 'ffmpeg'
+
+    def _start(self, seconds, keyframes_only=False):
+        self._stop()
+        cmd = [self._get_ffmpeg_path(), '-hide_banner', '-v', 'error', '-nostdin']
+        if keyframes_only:
+            cmd += ['-skip_frame', 'nokey']  # Decoder option: only keyframes are decoded (scrubbing)
+        if seconds > 0:
+            cmd += ['-ss', f"{seconds:.3f}"]
+        cmd += [
+            '-i', self.path,
+            '-map', '0:v:0', '-an', '-sn',
+            '-vf', f"scale={self.width}:{self.height}:flags=fast_bilinear",
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'
+        ]
+        self._proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=self.frame_bytes * 2,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+
+    def _stop(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.stdout.close()
+                self._proc.wait(timeout=1)
+            except Exception:
+                pass
+            self._proc = None
+
+    def _read_into(self, view):
+        """Fill view completely from the pipe. False on EOF"""
+        if self._proc is None:
+            return False
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self._proc.stdout.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def read(self):
+        frame = self._pool[self._pool_idx]
+        if not self._read_into(memoryview(frame.reshape(-1))):
+            return False, None
+        self._pool_idx = (self._pool_idx + 1) % len(self._pool)
+        return True, frame
+
+    def grab(self):
+        return self._read_into(memoryview(self._scratch))
+
+    def seek(self, frame_idx, keyframes_only=False):
+        self._start(frame_idx / self.fps, keyframes_only=keyframes_only)
+
+    def release(self):
+        self._stop()
+
+
+def open_frame_source(path, backend=None):
+    """Create the preview source for backend name (falls back to OpenCV if ffmpeg can't start)"""
+    if backend and "FFmpeg" in backend:
+        try:
+            return FFmpegPipeFrameSource(path)
+        except Exception as e:
+            print(f"FFmpeg pipe source failed, using OpenCV: {e}")
+    return OpenCVFrameSource(path)
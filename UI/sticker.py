@@ -2,17 +2,19 @@
 
 import os
 from PIL import Image
-import cv2
-import numpy as np
 from pathlib import Path
 
 
 class StickerLibrary:
     """Manages built-in sticker library (CapCut style)"""
     
+    IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+    BUILTIN_STEMS = ('heart', 'star', 'fire', 'lightning', 'thumbs', 'subscribe')
+    
     def __init__(self):
         self.stickers_dir = Path(__file__).parent.parent / "assets" / "stickers"
         self.config_file = self.stickers_dir / "stickers.json"
+        self.metadata_file = self.stickers_dir / "metadata.json"
         
         self.categories = {
             "Emoji": ["❤️ Heart", "⭐ Star", "🔥 Fire", "👍 Thumbs Up", "⚡ Lightning"],
@@ -20,6 +22,16 @@ class StickerLibrary:
             "Custom": []  # User-added stickers (loaded from JSON)
         }
         
+        # Manifest of the sticker directory: filename -> (size, mtime)
+        self.files = {}
+        self._by_lower = {}   # lowercase filename -> filename (O(1) lookups)
+        self._resolved = {}   # display name -> path or None (memoized get_sticker_path)
+        self._atlas = None
+        
+        # Per-sticker metadata (title, query, tags, width, height, animated) + offline search index
+        self.metadata = {}
+        self._search_index = None
+        
         # Ensure directory exists
         print(f"DEBUG: Stickes Dir: {self.stickers_dir.absolute()}")
         self.stickers_dir.mkdir(parents=True, exist_ok=True)
@@ -27,6 +39,32 @@ class StickerLibrary:
         # Load custom stickers from JSON file
         self._load_custom_stickers()
     
+    def _scan_directory(self):
+        """Index every image file of the sticker directory (one scandir pass)"""
+        files = {}
+        try:
+            with os.scandir(self.stickers_dir) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(self.IMAGE_EXTS) and entry.is_file():
+                        st = entry.stat()
+                        files[entry.name] = (st.st_size, st.st_mtime)
+        except OSError as e:
+            print(f"Error scanning stickers: {e}")
+        self.files = files
+        self._by_lower = {name.lower(): name for name in files}
+        self._resolved = {}
+    
+    def _index_file(self, filename):
+        """Add/refresh one file in the manifest after it was copied in"""
+        try:
+            st = os.stat(self.stickers_dir / filename)
+        except OSError:
+            return
+        self.files[filename] = (st.st_size, st.st_mtime)
+        self._by_lower[filename.lower()] = filename
+        self._resolved = {}
+        self._search_index = None
+    
     def get_sticker_path(self, sticker_name):
         """Get full path to a sticker by name
         
@@ -36,11 +74,19 @@ class StickerLibrary:
         Returns:
             Path to sticker file, or None if not found
         """
+        if sticker_name in self._resolved:
+            return self._resolved[sticker_name]
+        
+        path = self._resolve(sticker_name)
+        self._resolved[sticker_name] = path
+        return path
+    
+    def _resolve(self, sticker_name):
         # First, try exact filename match (for Giphy stickers with ID filenames)
         if '.' in sticker_name:  # Has extension
-            path = self.stickers_dir / sticker_name
-            if path.exists():
-                return str(path)
+            filename = self._by_lower.get(sticker_name.lower())
+            if filename:
+                return str(self.stickers_dir / filename)
         
         # Clean name (remove emoji prefix)
         clean_name = sticker_name.split()[-1].lower()
@@ -57,17 +103,14 @@ class StickerLibrary:
         ]
         
         for name in possible_names:
-            path = self.stickers_dir / name
-            if path.exists():
-                return str(path)
+            filename = self._by_lower.get(name)
+            if filename:
+                return str(self.stickers_dir / filename)
         
-        # Last resort: search directory for any file containing the clean name
-        try:
-            for file in self.stickers_dir.iterdir():
-                if file.is_file() and clean_name in file.name.lower():
-                    return str(file)
-        except:
-            pass
+        # Last resort: any file containing the clean name (result is memoized)
+        for lower, filename in self._by_lower.items():
+            if clean_name in lower:
+                return str(self.stickers_dir / filename)
         
         return None
     
@@ -84,14 +127,11 @@ class StickerLibrary:
         try:
             import json
             
-            # First, scan directory for ALL image files
-            all_stickers = []
-            if self.stickers_dir.exists():
-                for file in self.stickers_dir.iterdir():
-                    if file.is_file() and file.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif', '.webp']:
-                        # Skip built-in stickers (heart, star, etc.)
-                        if file.stem not in ['heart', 'star', 'fire', 'lightning', 'thumbs', 'subscribe']:
-                            all_stickers.append(file.name)
+            # First, index the directory (ALL image files)
+            self._scan_directory()
+            self._load_metadata()
+            all_stickers = [name for name in self.files
+                            if os.path.splitext(name)[0] not in self.BUILTIN_STEMS]
             
             # Load from JSON (for ordering/favorites)
             saved_order = []
@@ -101,19 +141,16 @@ class StickerLibrary:
                     saved_order = data.get("custom_stickers", [])
             
             # Combine: saved order first, then new files
-            ordered_stickers = []
-            for sticker in saved_order:
-                if sticker in all_stickers:
-                    ordered_stickers.append(sticker)
+            available = set(all_stickers)
+            ordered_stickers = [sticker for sticker in saved_order if sticker in available]
             
             # Add new stickers not in JSON
-            for sticker in all_stickers:
-                if sticker not in ordered_stickers:
-                    ordered_stickers.append(sticker)
+            listed = set(ordered_stickers)
+            ordered_stickers.extend(sticker for sticker in sorted(all_stickers) if sticker not in listed)
             
             self.categories["Custom"] = ordered_stickers
             
-            # Update JSON with complete list
+            # Update JSON only when files were added/removed
             if ordered_stickers != saved_order:
                 self._save_custom_stickers()
             
@@ -138,15 +175,16 @@ class StickerLibrary:
         except Exception as e:
             print(f"Error saving custom stickers: {e}")
     
-    def add_custom_sticker(self, file_path, display_name=None):
+    def add_custom_sticker(self, file_path, display_name=None, metadata=None):
         """Add a custom sticker to library
         
         Args:
             file_path: Path to sticker image
             display_name: Optional display name (defaults to filename)
+            metadata: Optional dict (title, query, tags) kept for offline search
             
         Returns:
-            True if successful
+            str: Path of the library copy (stickers dir), or False if it failed
         """
         try:
             import shutil
@@ -157,7 +195,10 @@ class StickerLibrary:
             # Copy to stickers directory (permanent storage)
             filename = os.path.basename(file_path)
             dest = self.stickers_dir / filename
-            shutil.copy2(file_path, dest)
+            if os.path.abspath(file_path) != os.path.abspath(dest):
+                shutil.copy2(file_path, dest)
+            self._index_file(filename)
+            self.set_metadata(filename, metadata)
             
             # Add to custom category
             name = display_name or filename
@@ -166,11 +207,121 @@ class StickerLibrary:
                 # Save to JSON for persistence
                 self._save_custom_stickers()
             
-            return True
+            return str(dest)
             
         except Exception as e:
             print(f"Error adding custom sticker: {e}")
             return False
+    
+    # === METADATA / OFFLINE SEARCH ===
+    def _load_metadata(self):
+        try:
+            import json
+            if self.metadata_file.exists():
+                with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                    self.metadata = json.load(f)
+        except Exception as e:
+            print(f"Error loading sticker metadata: {e}")
+            self.metadata = {}
+    
+    def _save_metadata(self):
+        try:
+            import json
+            import threading
+            tmp_path = f"{self.metadata_file}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metadata, f, ensure_ascii=False)
+            os.replace(tmp_path, self.metadata_file)
+        except Exception as e:
+            print(f"Error saving sticker metadata: {e}")
+    
+    def set_metadata(self, filename, metadata=None):
+        """Merge metadata for a sticker file; width/height/animated are read from the image"""
+        entry = dict(self.metadata.get(filename, {}))
+        if metadata:
+            for key in ('title', 'query', 'tags', 'source'):
+                if metadata.get(key):
+                    entry[key] = metadata[key]
+        if 'width' not in entry:
+            try:
+                with Image.open(self.stickers_dir / filename) as img:
+                    entry['width'], entry['height'] = img.size
+                    entry['animated'] = bool(getattr(img, 'is_animated', False)) and getattr(img, 'n_frames', 1) > 1
+            except Exception:
+                pass
+        if entry != self.metadata.get(filename):
+            self.metadata[filename] = entry
+            self._save_metadata()
+        self._search_index = None
+    
+    def _get_search_index(self):
+        if self._search_index is None:
+            from UI.sticker_search import StickerIndex
+            index = StickerIndex()
+            for names in self.categories.values():
+                for name in names:
+                    path = self.get_sticker_path(name)
+                    filename = os.path.basename(path) if path else name
+                    meta = self.metadata.get(filename, {})
+                    index.add(name, name, os.path.splitext(filename)[0], meta.get('title'), meta.get('query'), meta.get('tags', []))
+            self._search_index = index
+        return self._search_index
+    
+    def search(self, query, limit=None):
+        """Offline search over names, titles, search queries and tags (display names, best first)"""
+        return self._get_search_index().search(query, limit)
+    
+    def is_animated(self, sticker_name):
+        """Animated flag from metadata (GIF extension when it was never recorded)"""
+        path = self.get_sticker_path(sticker_name)
+        if not path:
+            return False
+        meta = self.metadata.get(os.path.basename(path), {})
+        if 'animated' in meta:
+            return meta['animated']
+        return path.lower().endswith('.gif')
+    
+    # === THUMBNAILS ===
+    def _get_atlas(self):
+        if self._atlas is None:
+            from UI.sticker_atlas import StickerThumbAtlas
+            self._atlas = StickerThumbAtlas()
+        return self._atlas
+    
+    def thumbnail(self, sticker_name):
+        """40x40 thumbnail (PIL RGBA) from the atlas, or None until it has been built"""
+        path = self.get_sticker_path(sticker_name)
+        if not path:
+            return None
+        filename = os.path.basename(path)
+        stat = self.files.get(filename)
+        if stat is None:
+            return None
+        try:
+            return self._get_atlas().thumbnail(filename, stat)
+        except Exception:
+            return None
+    
+    def build_thumbnails(self, on_done=None):
+        """
+        Build missing thumbnails in the background
+        
+        Args:
+            on_done: Called with the number of new thumbnails (from the builder thread)
+            
+        Returns:
+            True if a build was started/joined, False if the atlas is up to date
+        """
+        try:
+            atlas = self._get_atlas()
+            if not atlas.needs_build(self.files):
+                return False
+            atlas.build(self.stickers_dir, self.files, on_done)
+            return True
+        except Exception as e:
+            print(f"Error building sticker thumbnails: {e}")
+            return False
+
 
 
 # Global library instance
@@ -292,6 +443,11 @@ class StickerManager:
         if not sticker_img:
             return None
         
+        return sticker_img.resize(self.scaled_size(sticker_img, video_width, video_height, scale_factor),
+                                  Image.Resampling.LANCZOS)
+    
+    def scaled_size(self, sticker_img, video_width, video_height, scale_factor):
+        """(width, height) of the sticker for a video size and scale factor"""
         # Calculate target size based on video dimensions
         # Use the smaller dimension as reference
         ref_size = min(video_width, video_height)
@@ -312,7 +468,7 @@ class StickerManager:
         new_w = max(10, new_w)
         new_h = max(10, new_h)
         
-        return sticker_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+        return new_w, new_h
     
     def apply_sticker_to_frame(self, frame, sticker_path, position_key, scale_factor):
         """Apply sticker overlay to a video frame
@@ -338,46 +494,16 @@ class StickerManager:
             # Get frame dimensions
             frame_h, frame_w = frame.shape[:2]
             
-            # Resize sticker
-            sticker_resized = self.resize_sticker(sticker, frame_w, frame_h, scale_factor)
-            if not sticker_resized:
-                return frame
-            
-            sticker_w, sticker_h = sticker_resized.size
+            # Scaled sticker from the shared compositor cache (no per-call LANCZOS resize)
+            from UI.sticker_compositor import load_sprite, blend_frame
+            sticker_w, _ = self.scaled_size(sticker, frame_w, frame_h, scale_factor)
+            sprite = load_sprite(sticker_path, sticker_w)
             
             # Calculate position
-            x, y = self.calculate_position(frame_w, frame_h, sticker_w, sticker_h, position_key)
-            
-            # Convert PIL to OpenCV format
-            sticker_cv = cv2.cvtColor(np.array(sticker_resized), cv2.COLOR_RGBA2BGRA)
-            
-            # Extract alpha channel
-            alpha = sticker_cv[:, :, 3] / 255.0
-            
-            # Get the region of interest (ROI) from the frame
-            y1, y2 = y, y + sticker_h
-            x1, x2 = x, x + sticker_w
-            
-            # Ensure we don't go out of bounds
-            if y2 > frame_h:
-                y2 = frame_h
-                sticker_cv = sticker_cv[:y2-y, :, :]
-                alpha = alpha[:y2-y, :]
-            
-            if x2 > frame_w:
-                x2 = frame_w
-                sticker_cv = sticker_cv[:, :x2-x, :]
-                alpha = alpha[:, :x2-x]
-            
-            roi = frame[y1:y2, x1:x2]
-            
-            # Blend using alpha channel
-            for c in range(3):  # BGR channels
-                roi[:, :, c] = (alpha * sticker_cv[:, :, c] + 
-                               (1 - alpha) * roi[:, :, c])
+            x, y = self.calculate_position(frame_w, frame_h, sprite.width, sprite.height, position_key)
             
-            # Put ROI back into frame
-            frame[y1:y2, x1:x2] = roi
+            # Integer alpha blend in place (clipped to the frame)
+            blend_frame(frame, sprite.frame_at(0.0), x, y)
             
             return frame
             
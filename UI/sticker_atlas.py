@@ -0,0 +1,182 @@
+# Sticker Thumbnail Atlas
+# All 40x40 sticker thumbnails in one RGBA image + an offset table, kept across sessions:
+#   - table: filename -> (size, mtime, cell); a thumbnail is reused while size/mtime match
+#   - missing or stale thumbnails are built in a background thread, never on the Tk thread
+#   - cells of deleted stickers are reused by new ones
+
+import os
+import json
+import threading
+
+from PIL import Image
+
+from config.settings import STICKER_CACHE_DIR
+
+THUMB_SIZE = 40
+ATLAS_COLUMNS = 32
+FAILED_CELL = -1  # Unreadable image: not retried until the file changes
+
+
+class StickerThumbAtlas:
+    """Persistent thumbnail atlas for the sticker library"""
+
+    def __init__(self, cache_dir=None):
+        cache_dir = cache_dir or os.path.join(os.getcwd(), STICKER_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.png_path = os.path.join(cache_dir, "library_atlas.png")
+        self.table_path = os.path.join(cache_dir, "library_manifest.json")
+
+        self._lock = threading.Lock()
+        self._entries = {}   # filename -> (size, mtime, cell)
+        self._atlas = None   # PIL RGBA image, ATLAS_COLUMNS cells wide
+        self._crops = {}     # filename -> cropped thumbnail (PIL)
+        self._builder = None
+        self._callbacks = []
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.table_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('thumb_size') != THUMB_SIZE or data.get('columns') != ATLAS_COLUMNS:
+                return
+            entries = {name: tuple(e) for name, e in data.get('entries', {}).items()}
+            atlas = None
+            if any(e[2] != FAILED_CELL for e in entries.values()):
+                with Image.open(self.png_path) as img:
+                    atlas = img.convert('RGBA')
+            self._entries, self._atlas = entries, atlas
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Sticker atlas ignored (rebuilding): {e}")
+
+    def _save(self, entries, atlas):
+        data = {
+            'thumb_size': THUMB_SIZE,
+            'columns': ATLAS_COLUMNS,
+            'entries': {name: list(e) for name, e in entries.items()}
+        }
+        tmp_json = f"{self.table_path}.{threading.get_ident()}.tmp"
+        if atlas is not None:
+            tmp_png = f"{self.png_path}.{threading.get_ident()}.tmp.png"
+            atlas.save(tmp_png, 'PNG')
+            os.replace(tmp_png, self.png_path)
+        with open(tmp_json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_json, self.table_path)
+
+    @staticmethod
+    def _cell_box(cell):
+        x = (cell % ATLAS_COLUMNS) * THUMB_SIZE
+        y = (cell // ATLAS_COLUMNS) * THUMB_SIZE
+        return x, y, x + THUMB_SIZE, y + THUMB_SIZE
+
+    def thumbnail(self, name, stat):
+        """
+        Cached thumbnail of a sticker file
+
+        Args:
+            name: Filename inside the sticker directory
+            stat: (size, mtime) of the file now
+
+        Returns:
+            PIL RGBA image (THUMB_SIZE x THUMB_SIZE), or None if not built yet / unreadable
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or tuple(entry[:2]) != tuple(stat) or entry[2] == FAILED_CELL:
+                return None
+            crop = self._crops.get(name)
+            if crop is None and self._atlas is not None:
+                crop = self._atlas.crop(self._cell_box(entry[2]))
+                self._crops[name] = crop
+            return crop
+
+    def needs_build(self, files):
+        """True if any file in {filename: (size, mtime)} has no up-to-date thumbnail entry"""
+        with self._lock:
+            return any(tuple(self._entries.get(name, (None, None))[:2]) != tuple(stat) for name, stat in files.items())
+
+    def build(self, directory, files, on_done=None):
+        """
+        Build missing/stale thumbnails in the background (one builder at a time)
+
+        Args:
+            directory: Sticker directory
+            files: {filename: (size, mtime)} currently in the library
+            on_done: Called with the number of new thumbnails (from the builder thread)
+        """
+        with self._lock:
+            if on_done is not None:
+                self._callbacks.append(on_done)
+            if self._builder is not None and self._builder.is_alive():
+                return
+            self._builder = threading.Thread(target=self._build, args=(str(directory), dict(files)), daemon=True)
+            self._builder.start()
+
+    def _build(self, directory, files):
+        built = 0
+        try:
+            with self._lock:
+                entries = dict(self._entries)
+                atlas = self._atlas.copy() if self._atlas is not None else None
+
+            # Drop deleted/changed stickers, then give free cells to the rest
+            removed = [name for name, e in entries.items() if tuple(e[:2]) != tuple(files.get(name, (None, None)))]
+            for name in removed:
+                del entries[name]
+            todo = [name for name in files if name not in entries]
+
+            used = {e[2] for e in entries.values() if e[2] != FAILED_CELL}
+            free = (cell for cell in range(len(used) + len(todo)) if cell not in used)
+
+            for name in todo:
+                thumb = self._make_thumb(os.path.join(directory, name))
+                if thumb is None:
+                    entries[name] = (files[name][0], files[name][1], FAILED_CELL)
+                    continue
+                cell = next(free)
+                rows = cell // ATLAS_COLUMNS + 1
+                if atlas is None or atlas.height < rows * THUMB_SIZE:
+                    grown = Image.new('RGBA', (ATLAS_COLUMNS * THUMB_SIZE, rows * THUMB_SIZE), (0, 0, 0, 0))
+                    if atlas is not None:
+                        grown.paste(atlas, (0, 0))
+                    atlas = grown
+                box = self._cell_box(cell)
+                atlas.paste((0, 0, 0, 0), box)
+                atlas.paste(thumb, box[:2])
+                entries[name] = (files[name][0], files[name][1], cell)
+                built += 1
+
+            if removed or todo:
+                self._save(entries, atlas)
+            with self._lock:
+                self._entries, self._atlas = entries, atlas
+                self._crops = {}
+            if built:
+                print(f"🖼️ Sticker atlas: {built} thumbnail mới ({len(entries)} tổng)")
+        except Exception as e:
+            print(f"Sticker atlas build error: {e}")
+        finally:
+            with self._lock:
+                callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                try:
+                    callback(built)
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _make_thumb(path):
+        try:
+            with Image.open(path) as img:
+                img.draft('RGB', (THUMB_SIZE * 2, THUMB_SIZE * 2))  # JPEG: decode at reduced size
+                img.seek(0)
+                frame = img.convert('RGBA')
+            frame.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.Resampling.LANCZOS)
+            cell = Image.new('RGBA', (THUMB_SIZE, THUMB_SIZE), (0, 0, 0, 0))
+            cell.paste(frame, ((THUMB_SIZE - frame.width) // 2, (THUMB_SIZE - frame.height) // 2))
+            return cell
+        except Exception:
+            return None
@@ -0,0 +1,163 @@
+# Sticker Compositor
+# One compositor for the preview pipeline and StickerManager:
+#   - each sticker is decoded once per (path, width) into premultiplied uint16 BGR + inverse alpha
+#   - blending is integer only, into a preallocated ROI buffer: out = (bg * (256 - a) + fg * a) >> 8
+#   - animated GIF/APNG/WebP: all frames decoded once with their durations, picked by timestamp
+
+import bisect
+import threading
+import collections
+
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+
+MAX_ANIMATION_FRAMES = 300
+DEFAULT_FRAME_MS = 100   # GIFs with 0/10 ms delays play at 10 fps in browsers too
+SPRITE_CACHE_SIZE = 24
+STICKER_MARGIN = 20
+
+_sprite_cache = collections.OrderedDict()  # (path, width) -> StickerSprite, least recently used first
+_sprite_cache_lock = threading.Lock()
+
+
+def prepare_frame(rgba):
+    """(BGR uint8, premultiplied BGR uint16 or None, inverse alpha uint16 or None) for an RGBA array"""
+    bgr = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
+    alpha = rgba[:, :, 3:4].astype(np.uint16)
+    if alpha.min() == 255:
+        return bgr, None, None
+    alpha += alpha >> 7  # 0..255 -> 0..256 so that opaque pixels keep their exact colour
+    return bgr, bgr.astype(np.uint16) * alpha, 256 - alpha
+
+
+class StickerSprite:
+    """Decoded sticker at one width: one frame for still images, a timed frame list for animations"""
+
+    def __init__(self, frames, durations):
+        self.frames = frames
+        self.height, self.width = frames[0][0].shape[:2]
+        self.animated = len(frames) > 1
+        self._ends = list(np.cumsum(durations))  # End time of each frame (seconds)
+        self.total = self._ends[-1]
+
+    def frame_at(self, t):
+        if not self.animated:
+            return self.frames[0]
+        idx = bisect.bisect_right(self._ends, t % self.total)
+        return self.frames[min(idx, len(self.frames) - 1)]
+
+
+def load_sprite(path, width):
+    """StickerSprite for path scaled to width (cached, aspect kept)"""
+    key = (path, width)
+    with _sprite_cache_lock:
+        sprite = _sprite_cache.get(key)
+        if sprite is not None:
+            _sprite_cache.move_to_end(key)
+            return sprite
+
+    frames, durations = [], []
+    with Image.open(path) as img:
+        height = max(1, int(width * img.height / img.width))
+        for i, frame in enumerate(ImageSequence.Iterator(img)):
+            if i >= MAX_ANIMATION_FRAMES:
+                break
+            rgba = frame.convert('RGBA').resize((width, height), Image.Resampling.LANCZOS)
+            frames.append(prepare_frame(np.asarray(rgba)))
+            ms = frame.info.get('duration') or DEFAULT_FRAME_MS
+            durations.append((ms if ms > 10 else DEFAULT_FRAME_MS) / 1000.0)
+    sprite = StickerSprite(frames, durations)
+
+    with _sprite_cache_lock:
+        _sprite_cache[key] = sprite
+        while len(_sprite_cache) > SPRITE_CACHE_SIZE:
+            _sprite_cache.popitem(last=False)
+    return sprite
+
+
+def sticker_position(anchor, x_norm, y_norm, canvas_w, canvas_h, w, h, margin=STICKER_MARGIN):
+    """
+    Top-left pixel of a sticker (clamped inside the canvas)
+
+    Args:
+        anchor: 'custom' (x_norm/y_norm) or (horizontal, vertical) from parse_sticker_anchor
+    """
+    if anchor == 'custom':
+        x_pos = int(x_norm * canvas_w)
+        y_pos = int(y_norm * canvas_h)
+    else:
+        h_anchor, v_anchor = anchor
+        x_pos = {'left': margin, 'center': (canvas_w - w) // 2}.get(h_anchor, canvas_w - w - margin)
+        y_pos = {'top': margin, 'center': (canvas_h - h) // 2}.get(v_anchor, canvas_h - h - margin)
+    return max(0, min(x_pos, canvas_w - w)), max(0, min(y_pos, canvas_h - h))
+
+
+def blend_frame(canvas, entry, x, y, buf=None):
+    """
+    Blend one prepared sticker frame into canvas (BGR uint8, in place)
+
+    Args:
+        entry: Frame from StickerSprite.frames
+        buf: Optional uint16 (h, w, 3) scratch buffer, reused between calls
+
+    Returns:
+        tuple: (x1, y1, x2, y2) of the blended area, or None if off-canvas
+    """
+    bgr, premul, inv_alpha = entry
+    h, w = bgr.shape[:2]
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(canvas.shape[1], x + w), min(canvas.shape[0], y + h)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    roi = canvas[y1:y2, x1:x2]
+    sy, sx = slice(y1 - y, y2 - y), slice(x1 - x, x2 - x)
+    if inv_alpha is None:
+        roi[...] = bgr[sy, sx]
+    else:
+        if buf is None:
+            buf = np.empty((h, w, 3), dtype=np.uint16)
+        out = buf[:y2 - y1, :x2 - x1]
+        np.multiply(roi, inv_alpha[sy, sx], out=out)
+        out += premul[sy, sx]
+        out >>= 8
+        roi[...] = out
+    return x1, y1, x2, y2
+
+
+class StickerLayer:
+    """Stickers placed on one canvas size, each with its own scratch buffer"""
+
+    def __init__(self, specs, canvas_w, canvas_h):
+        """
+        Args:
+            specs: Iterable of objects with path, scale, anchor, x, y (see effects_preview.StickerSpec)
+        """
+        self.placements = []
+        for spec in specs:
+            try:
+                sprite = load_sprite(spec.path, max(1, int(canvas_w * spec.scale)))
+            except Exception as e:
+                print(f"Sticker load failed ({spec.path}): {e}")
+                continue
+            if sprite.width > canvas_w or sprite.height > canvas_h:
+                continue
+            x, y = sticker_position(spec.anchor, spec.x, spec.y, canvas_w, canvas_h, sprite.width, sprite.height)
+            buf = np.empty((sprite.height, sprite.width, 3), dtype=np.uint16)
+            self.placements.append((sprite, x, y, buf))
+        self.animated = any(p[0].animated for p in self.placements)
+
+    def __bool__(self):
+        return bool(self.placements)
+
+    def draw(self, canvas, t=0.0):
+        """
+        Composite all stickers (in order) for preview time t
+
+        Returns:
+            tuple: Box of the last sticker (the one being edited), or None
+        """
+        box = None
+        for sprite, x, y, buf in self.placements:
+            box = blend_frame(canvas, sprite.frame_at(t), x, y, buf)
+        return box
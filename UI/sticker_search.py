@@ -0,0 +1,96 @@
+# Sticker Search Index
+# Offline full-text search over the sticker library:
+#   - documents: display name + metadata (title, search query, tags) kept per sticker
+#   - inverted index token -> names, prefix lookups through a sorted token list (bisect)
+#   - Vietnamese diacritics are folded, so "meo" finds "mèo"
+
+import re
+import bisect
+import unicodedata
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase ASCII tokens of text (diacritics removed)"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).lower().replace('đ', 'd'))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text)
+
+
+class StickerIndex:
+    """Inverted index of sticker names"""
+
+    def __init__(self):
+        self._postings = {}     # token -> set of names
+        self._docs = {}         # name -> set of tokens
+        self._order = {}        # name -> insertion number (ties keep library order)
+        self._sorted_tokens = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, name, *texts):
+        """Index (or re-index) a sticker under all words of texts"""
+        if name in self._docs:
+            self.remove(name)
+        tokens = set()
+        for text in texts:
+            if isinstance(text, (list, tuple, set)):
+                for part in text:
+                    tokens.update(tokenize(part))
+            else:
+                tokens.update(tokenize(text))
+        self._docs[name] = tokens
+        self._order.setdefault(name, len(self._order))
+        for token in tokens:
+            if token not in self._postings:
+                self._postings[token] = set()
+                self._sorted_tokens = None
+            self._postings[token].add(name)
+
+    def remove(self, name):
+        for token in self._docs.pop(name, ()):
+            names = self._postings.get(token)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._postings[token]
+                    self._sorted_tokens = None
+
+    def _prefix_matches(self, prefix):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = self._sorted_tokens
+        i = bisect.bisect_left(tokens, prefix)
+        names = set()
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            names |= self._postings[tokens[i]]
+            i += 1
+        return names
+
+    def search(self, query, limit=None):
+        """
+        Names matching every word of query (word prefixes count)
+
+        Returns:
+            list: Best matches first (exact words before prefixes), then library order
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        result = None
+        for word in words:
+            names = self._prefix_matches(word)
+            result = names if result is None else result & names
+            if not result:
+                return []
+
+        def rank(name):
+            doc = self._docs[name]
+            return (-sum(1 for word in words if word in doc), self._order[name])
+
+        ranked = sorted(result, key=rank)
+        return ranked[:limit] if limit else ranked
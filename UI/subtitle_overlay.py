@@ -0,0 +1,49 @@
+# Subtitle Overlay
+# Draws the SubtitleTrack of the previewed file on the preview canvas:
+#   - the cue at the preview time is looked up with SubtitleTrack.cue_at (bisect)
+#   - each cue is rasterized once per canvas size (utils.subtitle_model.render_cue) and
+#     blended with the sticker compositor's integer blend, so playback only blends
+
+import numpy as np
+
+from UI.sticker_compositor import prepare_frame, blend_frame
+from utils.subtitle_model import render_cue
+
+
+class SubtitleLayer:
+    """Subtitles of one track on one canvas size"""
+
+    def __init__(self, track, style, offset, canvas_w, canvas_h):
+        """
+        Args:
+            track: SubtitleTrack (cue times relative to the trimmed window)
+            style: SubtitleStyle used by the export
+            offset: Trim start in seconds (preview time - offset = cue time)
+        """
+        self.track = track
+        self.style = style
+        self.offset = offset
+        self.canvas_w, self.canvas_h = canvas_w, canvas_h
+        self._index = None
+        self._placed = None  # (prepared frame, x, y, scratch buffer) of the current cue
+
+    def __bool__(self):
+        return bool(self.track)
+
+    def draw(self, canvas, t=0.0):
+        index = self.track.cue_at(t - self.offset)
+        if index is None:
+            return
+        if index != self._index:
+            self._index = index
+            try:
+                image, x, y = render_cue(self.track.cues[index].text, self.style, self.canvas_w, self.canvas_h)
+                entry = prepare_frame(np.asarray(image))
+                h, w = entry[0].shape[:2]
+                self._placed = (entry, x, y, np.empty((h, w, 3), dtype=np.uint16))
+            except Exception as e:
+                print(f"Subtitle preview error: {e}")
+                self._placed = None
+        if self._placed:
+            entry, x, y, buf = self._placed
+            blend_frame(canvas, entry, x, y, buf)
@@ -0,0 +1,94 @@
+"""Benchmark Whisper inference profiles: realtime factor (RTF) and WER
+
+Usage:
+    python benchmark_asr_profiles.py <clip> <reference.txt> [language] [profile ...]
+
+    clip           Short local test clip (video or audio, 30-60s is enough)
+    reference.txt  Correct transcript of the clip (plain text)
+    language       Language code, e.g. 'vi' or 'en' (default: auto)
+
+RTF = processing time / audio duration (lower is faster, < 1.0 = faster than realtime).
+The first run of each profile includes model loading, so it is reported separately.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.asr_profiles import ASR_PROFILES, word_error_rate
+from utils.subtitle_generator import (
+    decode_audio_pcm, write_wav_pcm, transcribe_with_whisper, get_whisper_backend
+)
+
+
+def benchmark_profile(audio_path, audio_duration, reference, language, profile):
+    """Run one profile twice (cold + warm) and return stats"""
+    t0 = time.time()
+    segments, info = transcribe_with_whisper(audio_path, language=language, profile=profile)
+    cold = time.time() - t0
+
+    t0 = time.time()
+    segments, info = transcribe_with_whisper(audio_path, language=language, profile=profile)
+    warm = time.time() - t0
+
+    hypothesis = " ".join(seg['text'] for seg in (segments or []))
+    return {
+        'profile': profile,
+        'model': (info or {}).get('model_size', '?'),
+        'cold_s': cold,
+        'warm_s': warm,
+        'rtf': warm / audio_duration if audio_duration else 0,
+        'wer': word_error_rate(reference, hypothesis),
+        'segments': len(segments or []),
+    }
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return 1
+
+    clip_path, ref_path = sys.argv[1], sys.argv[2]
+    language = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != 'auto' else None
+    profiles = sys.argv[4:] or list(ASR_PROFILES.keys())
+
+    with open(ref_path, 'r', encoding='utf-8') as f:
+        reference = f.read()
+
+    pcm = decode_audio_pcm(clip_path)
+    if not pcm:
+        print(f"❌ Could not decode audio from {clip_path}")
+        return 1
+    audio_duration = len(pcm) / 32000.0  # 16kHz * 2 bytes
+
+    audio_path = os.path.join(tempfile.gettempdir(), "asr_benchmark.wav")
+    write_wav_pcm(pcm, audio_path)
+
+    print(f"\n{'='*60}")
+    print(f"ASR PROFILE BENCHMARK - {os.path.basename(clip_path)} ({audio_duration:.1f}s)")
+    print(f"Backend: {get_whisper_backend()} | Language: {language or 'auto'}")
+    print(f"{'='*60}\n")
+
+    results = []
+    for profile in profiles:
+        print(f"▶ {profile}...")
+        results.append(benchmark_profile(audio_path, audio_duration, reference, language, profile))
+
+    print(f"\n{'Profile':<10} {'Model':<8} {'Cold(s)':>8} {'Warm(s)':>8} {'RTF':>6} {'WER':>7} {'Segs':>5}")
+    print("-" * 58)
+    for r in results:
+        print(f"{r['profile']:<10} {r['model']:<8} {r['cold_s']:>8.2f} {r['warm_s']:>8.2f} "
+              f"{r['rtf']:>6.3f} {r['wer'] * 100:>6.1f}% {r['segments']:>5}")
+
+    try:
+        os.remove(audio_path)
+    except OSError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
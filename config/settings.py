@@ -10,6 +10,22 @@ UPDATE_URL = "https://gist.githubusercontent.com/nguyenduyducds/85850359601efe74
 DEFAULT_INPUT_DIR = "input/"
 DEFAULT_OUTPUT_DIR = "output/"
 SRT_FILES_DIR = "srt_files"
+CACHE_DIR = "cache"
+TRANSCRIPT_CACHE_DIR = "cache/transcripts"
+MEDIA_CATALOG_DIR = "cache/media"
+PROXY_CACHE_DIR = "cache/proxies"
+PROXY_CACHE_MAX_MB = 4096  # Preview proxies, least recently used are deleted first
+LUT_CACHE_DIR = "cache/luts"
+STICKER_CACHE_DIR = "cache/stickers"
+TEXT_CACHE_DIR = "cache/text"
+OUTRO_CACHE_DIR = "cache/outros"
+FONTCONFIG_CACHE_DIR = "cache/fontconfig"
+GIPHY_CACHE_DIR = "cache/giphy"
+GIPHY_SEARCH_TTL_S = 3600  # Cached search results
+GIPHY_PREVIEW_TTL_S = 7 * 86400  # Cached preview thumbnails
+GIPHY_TEMP_MAX_MB = 256  # temp_stickers downloads, least recently used are deleted first
+GIPHY_CACHE_MAX_MB = 64  # cache/giphy (searches + previews): expired entries, then oldest, are deleted
+STICKER_LOCAL_MIN_RESULTS = 6  # Fewer offline matches than this -> search Giphy too
 
 # Video settings
 DEFAULT_START_TIME = 0
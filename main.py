@@ -149,4 +149,7 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Required for the preview engine process in the frozen (PyInstaller) build
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
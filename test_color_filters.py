@@ -1,16 +1,18 @@
 """Test valid FFmpeg color filters"""
 
+import os
 import subprocess
 import sys
 
-# Test each color filter
-filters_to_test = {
-    "Black & White": "hue=s=0",
-    "Sepia": "colorchannelmixer=.393:.769:.189:0:.349:.686:.168:0:.272:.534:.131",
-    "Vintage": "eq=contrast=1.1:brightness=-0.05:saturation=0.8,colorbalance=rs=0.1:gs=-0.05:bs=-0.1",
-    "Cold": "colorbalance=rs=-0.2:gs=-0.1:bs=0.3,eq=saturation=1.2",
-    "Warm": "colorbalance=rs=0.3:gs=-0.1:bs=-0.3,eq=saturation=1.1"
-}
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.color_lut import COLOR_PRESETS, lut3d_filter
+
+# Export applies every preset (+ brightness) as a single lut3d filter
+filters_to_test = {key: lut3d_filter(key) for key in COLOR_PRESETS}
+filters_to_test["Brightness 1.2"] = lut3d_filter(None, 1.2)
+filters_to_test["Cinematic + Brightness 0.8"] = lut3d_filter('cinematic', 0.8)
 
 print("Testing FFmpeg Color Filters...\n")
 
@@ -0,0 +1,137 @@
+"""
+Test the Giphy client against a local HTTP stand-in (no network, no API key)
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.giphy_api import GiphyAPI
+
+IMAGE_BYTES = b"GIF89a" + b"\x00" * 64
+hits = {}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        hits[path] = hits.get(path, 0) + 1
+        if path == "/search":
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            body = json.dumps({"data": [
+                {"id": f"s{i}", "title": f"Sticker {i}", "images": {
+                    "fixed_height_small": {"url": f"{base}/preview/{i}.gif"},
+                    "original": {"url": f"{base}/full/{i}.gif?cid=x"}
+                }} for i in range(6)
+            ]}).encode()
+        else:
+            body = IMAGE_BYTES
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_client():
+    server = HTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    tmp = tempfile.mkdtemp()
+    api = GiphyAPI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/search",
+                   cache_dir=os.path.join(tmp, "cache"), temp_dir=os.path.join(tmp, "temp_stickers"))
+    return api, server
+
+
+def test_search_and_previews_are_cached():
+    api, server = make_client()
+    try:
+        results = api.search_stickers("cat", limit=6)
+        assert len(results) == 6 and results[0]['id'] == "s0"
+        assert api.search_stickers("cat", limit=6) == results
+        assert hits["/search"] == 1  # Second search served from the disk cache
+
+        got = []
+        token = api.new_search()
+        assert api.fetch_previews(results, lambda i, item, data: got.append((i, data)), token) == 6
+        assert [i for i, _ in got] == list(range(6)) and got[0][1] == IMAGE_BYTES
+        api.fetch_previews(results, lambda *a: None, api.new_search())
+        assert hits["/preview/0.gif"] == 1
+    finally:
+        api.close()
+        server.shutdown()
+    print("✅ Cache test passed")
+
+
+def test_new_search_cancels_previews():
+    api, server = make_client()
+    try:
+        results = api.search_stickers("dog", limit=6)
+        token = api.new_search()
+        api.new_search()  # Replaces it before the thumbnails arrive
+        got = []
+        assert api.fetch_previews(results, lambda *a: got.append(a), token) == 0 and not got
+    finally:
+        api.close()
+        server.shutdown()
+    print("✅ Cancel test passed")
+
+
+def test_close_during_search():
+    api, server = make_client()
+    try:
+        results = api.search_stickers("bird", limit=6)
+        api.close()  # Dialog closed before the thumbnails were requested
+        assert api.fetch_previews(results, lambda *a: None) == 0
+    finally:
+        server.shutdown()
+    print("✅ Close test passed")
+
+
+def test_temp_stickers_are_capped():
+    api, server = make_client()
+    try:
+        api.temp_max_bytes = len(IMAGE_BYTES) * 2
+        paths = [api.download_sticker(f"http://127.0.0.1:{server.server_port}/full/{i}.gif?cid=x", f"s{i}") for i in range(4)]
+        assert all(paths) and paths[0].endswith("s0.gif")
+        assert len(os.listdir(api.temp_dir)) == 2
+        assert os.path.exists(paths[-1])  # Newest download is kept
+    finally:
+        api.close()
+        server.shutdown()
+    print("✅ Temp cap test passed")
+
+
+def test_cache_dir_is_pruned():
+    api, server = make_client()
+    try:
+        old = time.time() - 2 * 86400
+        for name, age in [("old.json", old), ("old.bin", old), ("stale.bin.1.tmp", time.time() - 7200),
+                          ("a.bin", old + 10), ("b.bin", old + 20), ("c.json", time.time())]:
+            path = api.cache_dir / name
+            path.write_bytes(IMAGE_BYTES)
+            os.utime(path, (age, age))
+        api.cache_max_bytes = len(IMAGE_BYTES) * 2
+        api._prune_cache_dir()
+        # Expired search result and temp file go first, then the oldest previews to fit the cap
+        assert sorted(os.listdir(api.cache_dir)) == ["b.bin", "c.json"]
+    finally:
+        api.close()
+        server.shutdown()
+    print("✅ Cache prune test passed")
+
+
+if __name__ == "__main__":
+    test_search_and_previews_are_cached()
+    test_new_search_cancels_previews()
+    test_close_during_search()
+    test_temp_stickers_are_capped()
+    test_cache_dir_is_pruned()
@@ -0,0 +1,93 @@
+"""
+Test chunked Google speech fallback with a local stand-in recognizer (no network)
+"""
+
+import sys
+import os
+import wave
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from utils.subtitle_generator import iter_silence_chunks, generate_subtitles_with_google
+
+
+SAMPLE_RATE = 16000
+
+
+def make_test_wav(path, pattern):
+    """pattern: list of (seconds, is_tone) - tone = 'speech', else silence"""
+    parts = []
+    for sec, is_tone in pattern:
+        n = int(sec * SAMPLE_RATE)
+        if is_tone:
+            t = np.arange(n) / SAMPLE_RATE
+            parts.append((np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16))
+        else:
+            parts.append(np.zeros(n, dtype=np.int16))
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(np.concatenate(parts).tobytes())
+
+
+class FakeRecognizer:
+    """Returns the chunk start time as text, fails the first call of every chunk"""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def recognize(self, pcm, sample_rate, language):
+        key = len(pcm)
+        with self.lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            first = self.calls[key] == 1
+        if first:
+            raise ConnectionError("simulated timeout")
+        return f"chunk {len(pcm) // 2 / sample_rate:.1f}s"
+
+
+def test_chunks_cut_at_pauses():
+    """Chunks end inside pauses and cover the whole file without gaps"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        # 16s speech, 1s pause, 16s speech, 1s pause, 5s speech
+        make_test_wav(path, [(16, True), (1, False), (16, True), (1, False), (5, True)])
+
+        chunks = list(iter_silence_chunks(path, target_sec=15, max_sec=25))
+        assert len(chunks) == 3, [c[:2] for c in chunks]
+        assert chunks[0][0] == 0.0
+        for prev, cur in zip(chunks, chunks[1:]):
+            assert abs(prev[1] - cur[0]) < 1e-6  # contiguous
+        assert 16.0 <= chunks[0][1] <= 17.0      # cut inside the first pause
+        assert abs(chunks[-1][1] - 39.0) < 0.01
+    print("✅ Chunking test passed")
+
+
+def test_timed_cues_with_retry():
+    """Each chunk becomes one timed cue, transient errors are retried (no file written)"""
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            path = os.path.join(tmp, "speech.wav")
+            make_test_wav(path, [(16, True), (1, False), (16, True), (1, False), (5, True)])
+
+            segments = generate_subtitles_with_google(path, recognizer=FakeRecognizer(), max_workers=2)
+            assert segments and len(segments) == 3
+            assert segments[0]['start'] == 0.0 and 16.0 <= segments[0]['end'] <= 17.0
+            assert all(seg['text'] for seg in segments)
+            assert os.listdir(tmp) == ["speech.wav"]
+        finally:
+            os.chdir(old_cwd)
+    print("✅ Timed cue test passed")
+
+
+if __name__ == "__main__":
+    test_chunks_cut_at_pauses()
+    test_timed_cues_with_retry()
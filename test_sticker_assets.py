@@ -0,0 +1,83 @@
+"""
+Test sticker asset positions and the static sticker layer
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from utils.sticker_assets import static_sticker_position, composite_static_stickers, prepare_sticker_asset
+
+
+def test_positions_match_overlay_expressions():
+    """Same pixels as overlay's W-w-20 / H*y expressions (truncated, even)"""
+    W, H, w, h = 1080, 1920, 216, 100
+    assert static_sticker_position("Góc phải dưới", 0, 0, W, H, w, h) == (844, 1800)
+    assert static_sticker_position("Góc trái trên", 0, 0, W, H, w, h) == (20, 20)
+    assert static_sticker_position("Chính giữa (Center)", 0, 0, W, H, w, h) == (432, 910)
+    assert static_sticker_position("Tùy chỉnh (Custom)", 0.5, 0.25, W, H, w, h) == (540, 480)
+    assert static_sticker_position("Tùy chỉnh (Custom)", 0.3333, 0.1, W, H, w, h) == (358, 192)
+    print("✅ Position test passed")
+
+
+def test_layer_is_cropped_and_composited():
+    """Two stickers -> one PNG covering both, with their pixels at the right offsets"""
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            red = os.path.abspath("red.png")
+            blue = os.path.abspath("blue.png")
+            Image.new('RGBA', (40, 20), (255, 0, 0, 255)).save(red)
+            Image.new('RGBA', (10, 10), (0, 0, 255, 128)).save(blue)
+
+            path, x, y = composite_static_stickers([(red, 100, 50), (blue, 130, 60)], 320, 240)
+            assert (x, y) == (100, 50)
+            with Image.open(path) as layer:
+                assert layer.size == (40, 20)
+                assert layer.getpixel((0, 0)) == (255, 0, 0, 255)
+                r, g, b, a = layer.getpixel((35, 15))
+                assert a == 255 and b > 0 and r > 0  # Blue blended over red
+
+            # Off-canvas part is cut away
+            path, x, y = composite_static_stickers([(red, -10, 0), (blue, 300, 230)], 320, 240)
+            with Image.open(path) as layer:
+                assert (x, y) == (0, 0) and layer.size == (310, 240)
+        finally:
+            os.chdir(old_cwd)
+    print("✅ Layer test passed")
+
+
+def test_cached_asset_has_size():
+    """Second export reuses the asset PNG and still gets width/height for positioning"""
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            src = os.path.abspath("logo.png")
+            Image.new('RGBA', (200, 100), (0, 255, 0, 255)).save(src)
+
+            first = prepare_sticker_asset(src, 81)
+            second = prepare_sticker_asset(src, 81)  # Asset already on disk
+            assert first == second and second['path'] == first['path']
+            assert (second['width'], second['height']) == (80, 40)
+
+            # Same inputs as the export's flush_static_stickers
+            x, y = static_sticker_position("Góc phải dưới", 0, 0, 320, 240, second['width'], second['height'])
+            assert (x, y) == (220, 180)
+            path, lx, ly = composite_static_stickers([(second['path'], x, y), (second['path'], 20, 20)], 320, 240)
+            assert os.path.exists(path) and (lx, ly) == (20, 20)
+        finally:
+            os.chdir(old_cwd)
+    print("✅ Cached asset test passed")
+
+
+if __name__ == "__main__":
+    test_positions_match_overlay_expressions()
+    test_layer_is_cropped_and_composited()
+    test_cached_asset_has_size()
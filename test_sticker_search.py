@@ -0,0 +1,43 @@
+"""
+Test the offline sticker search index
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from UI.sticker_search import StickerIndex, tokenize
+
+
+def test_tokenize_folds_diacritics():
+    assert tokenize("Con Mèo đáng yêu!") == ["con", "meo", "dang", "yeu"]
+    assert tokenize("") == []
+    print("✅ Tokenize test passed")
+
+
+def test_search_ranks_and_filters():
+    index = StickerIndex()
+    index.add("a1.gif", "a1", "Happy Cat Dancing", "cat", ["happy", "cat", "dance"])
+    index.add("b2.gif", "b2", "Catch the ball", "ball", [])
+    index.add("c3.png", "c3", "Sad dog", "dog", ["sad"])
+
+    assert index.search("cat") == ["a1.gif", "b2.gif"]  # Exact word before the prefix match
+    assert index.search("happy cat") == ["a1.gif"]  # Every word must match
+    assert index.search("do") == ["c3.png"]
+    assert index.search("cat dog") == []
+    assert index.search("   ") == []
+
+    # Re-index replaces the old words
+    index.add("c3.png", "c3", "Sad cat")
+    assert index.search("dog") == []
+    assert index.search("cat", limit=1) == ["a1.gif"]
+    index.remove("a1.gif")
+    assert index.search("happy") == []
+    print("✅ Search test passed")
+
+
+if __name__ == "__main__":
+    test_tokenize_folds_diacritics()
+    test_search_ranks_and_filters()
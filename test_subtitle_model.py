@@ -0,0 +1,61 @@
+"""
+Test the subtitle model (segments -> cues -> styled ASS file)
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.subtitle_model import SubtitleTrack, subtitle_style_from_settings
+
+
+SEGMENTS = [
+    {'start': 2.5, 'end': 4.0, 'text': ' second {cue}', 'words': []},
+    {'start': 0.0, 'end': 2.0, 'text': 'first', 'words': [{'start': 0.1, 'end': 0.6, 'word': 'first'}]},
+    {'start': 4.0, 'end': 5.0, 'text': '   ', 'words': []},
+]
+
+
+def test_cues_and_lookup():
+    track = SubtitleTrack.from_segments(SEGMENTS)
+    assert len(track) == 2 and track.cues[0].text == "first"  # Sorted, empty text dropped
+    assert track.cues[0].words[0].word == "first"
+    assert track.cue_at(1.0) == 0 and track.cue_at(2.2) is None and track.cue_at(3.9) == 1
+    assert track.cue_at(-1) is None and track.cue_at(4.0) is None
+    assert SubtitleTrack.from_segments(track.to_segments()) == track
+    print("✅ Cue test passed")
+
+
+def test_ass_has_style_and_escaped_text():
+    track = SubtitleTrack.from_segments(SEGMENTS)
+    ass = track.to_ass(subtitle_style_from_settings({'subtitle_font_size': 14}))
+    assert "Style: Default,Arial,14,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,-1," in ass
+    assert "Dialogue: 0,0:00:00.00,0:00:02.00,Default,,0,0,0,,first\n" in ass
+    assert "Dialogue: 0,0:00:02.50,0:00:04.00,Default,,0,0,0,,second \\{cue\\}\n" in ass
+    print("✅ ASS test passed")
+
+
+def test_ass_file_is_content_addressed():
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            style = subtitle_style_from_settings({})
+            track = SubtitleTrack.from_segments(SEGMENTS)
+            path = track.write_ass(style)
+            assert path and path.endswith(".ass") and os.path.exists(path)
+            assert SubtitleTrack.from_segments(SEGMENTS).write_ass(style) == path  # Same job content -> same file
+            assert track.write_ass(style._replace(font_size=20)) != path
+            assert SubtitleTrack().write_ass(style) is None
+        finally:
+            os.chdir(old_cwd)
+    print("✅ ASS file test passed")
+
+
+if __name__ == "__main__":
+    test_cues_and_lookup()
+    test_ass_has_style_and_escaped_text()
+    test_ass_file_is_content_addressed()
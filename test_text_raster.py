@@ -0,0 +1,53 @@
+"""
+Test the shared text rasterizer (preview + export text layer)
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.text_raster import TextStyle, layout_text, render_text_layer, text_layer_png
+
+
+STYLE = TextStyle("Arial (Mặc định)", 60, "white", "center", True, "black", 20)
+
+
+def test_layout_positions():
+    center = layout_text("Thanks for watching!", STYLE, 1080, 1920)
+    assert center.x == (1080 - center.width) // 2
+    assert center.y == (1920 - center.height) // 2
+    bottom = layout_text("Thanks for watching!", STYLE._replace(position="bottom"), 1080, 1920)
+    assert bottom.y + bottom.height == 1920 * 4 // 5
+    print("✅ Layout test passed")
+
+
+def test_layer_is_cached_and_boxed():
+    layer, x, y = render_text_layer("Subscribe!", STYLE, 1080, 1920)
+    assert render_text_layer("Subscribe!", STYLE, 1080, 1920)[0] is layer  # Second call is a lookup
+    assert x % 2 == 0 and y % 2 == 0
+    assert layer.getpixel((1, 1))[3] == int(255 * 0.7)  # Box corner, 70% opacity
+    no_box, _, _ = render_text_layer("Subscribe!", STYLE._replace(box=False), 1080, 1920)
+    assert no_box.getpixel((0, 0))[3] == 0
+    print("✅ Layer test passed")
+
+
+def test_png_for_export():
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            path, x, y = text_layer_png("Bye", STYLE, 1280, 720)
+            assert os.path.exists(path) and (x, y) == render_text_layer("Bye", STYLE, 1280, 720)[1:]
+            assert text_layer_png("Bye", STYLE, 1280, 720)[0] == path
+        finally:
+            os.chdir(old_cwd)
+    print("✅ PNG test passed")
+
+
+if __name__ == "__main__":
+    test_layout_positions()
+    test_layer_is_cached_and_boxed()
+    test_png_for_export()
@@ -0,0 +1,86 @@
+"""
+Test transcript cache keys and round-trip
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.transcript_cache import (
+    audio_fingerprint, make_transcript_key, save_transcript, load_transcript,
+    peek_transcript_cached, _source_key, _write_json, _cache_dir
+)
+from utils.subtitle_generator import get_whisper_backend
+from utils.asr_profiles import get_asr_profile
+
+
+def test_key_depends_on_all_parts():
+    """Key must change with audio, language, model size and backend"""
+    fp = audio_fingerprint(b'\x00\x01' * 1000)
+    base = make_transcript_key(fp, 'vi', 'small', 'faster-whisper')
+
+    assert base == make_transcript_key(fp, 'vi', 'small', 'faster-whisper')
+    assert base != make_transcript_key(audio_fingerprint(b'\x00\x02' * 1000), 'vi', 'small', 'faster-whisper')
+    assert base != make_transcript_key(fp, 'en', 'small', 'faster-whisper')
+    assert base != make_transcript_key(fp, 'vi', 'medium', 'faster-whisper')
+    assert base != make_transcript_key(fp, 'vi', 'small', 'openai-whisper')
+    assert make_transcript_key(fp, None, 'small', 'x') == make_transcript_key(fp, 'auto', 'small', 'x')
+    print("✅ Key test passed")
+
+
+def test_round_trip():
+    """Segments with word timings survive save/load"""
+    segments = [{
+        'start': 0.5, 'end': 2.0, 'text': 'Xin chào',
+        'words': [{'start': 0.5, 'end': 1.0, 'word': 'Xin'}, {'start': 1.1, 'end': 2.0, 'word': 'chào'}]
+    }]
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            key = make_transcript_key(audio_fingerprint(b'abc'), 'vi', 'small', 'faster-whisper')
+            assert load_transcript(key) is None
+            save_transcript(key, segments)
+            assert load_transcript(key) == segments
+
+            # Empty transcript (no speech) is cached too
+            empty_key = make_transcript_key(audio_fingerprint(b'def'), 'vi', 'small', 'faster-whisper')
+            save_transcript(empty_key, [])
+            assert load_transcript(empty_key) == []
+        finally:
+            os.chdir(old_cwd)
+    print("✅ Round-trip test passed")
+
+
+def test_peek_uses_source_index_only():
+    """Peek finds a transcript by file fingerprint + trim window without decoding the file"""
+    segments = [{'start': 0.0, 'end': 1.0, 'text': 'hello', 'words': []}]
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            video = os.path.join(tmp, "clip.mp4")
+            with open(video, 'wb') as f:
+                f.write(b'not a real video')
+            assert peek_transcript_cached(video, 0, 10, language='vi') is None
+
+            profile, prof = get_asr_profile(None)
+            audio_fp = audio_fingerprint(b'pcm')
+            save_transcript(make_transcript_key(audio_fp, 'vi', prof['model_size'], get_whisper_backend(), profile), segments)
+            _write_json(os.path.join(_cache_dir(), f"src_{_source_key(video, 0, 10)}.json"), {'audio_fp': audio_fp})
+
+            assert peek_transcript_cached(video, 0, 10, language='vi') == segments
+            assert peek_transcript_cached(video, 5, 10, language='vi') is None   # Other trim window
+            assert peek_transcript_cached(video, 0, 10, language='en') is None   # Other language
+        finally:
+            os.chdir(old_cwd)
+    print("✅ Peek test passed")
+
+
+if __name__ == "__main__":
+    test_key_depends_on_all_parts()
+    test_round_trip()
+    test_peek_uses_source_index_only()
@@ -0,0 +1,95 @@
+"""Whisper inference profiles (speed vs accuracy) + WER helper for the benchmark"""
+
+import re
+
+
+DEFAULT_ASR_PROFILE = "balanced"
+
+# compute_type is picked per device: (cuda, cpu)
+ASR_PROFILES = {
+    # Greedy decoding, no word timings, small model - fastest, good enough for drafts
+    "draft": {
+        "model_size": "base",
+        "beam_size": 1,
+        "best_of": 1,
+        "word_timestamps": False,
+        "vad_filter": True,
+        "condition_on_previous_text": False,
+        "compute_type": ("int8", "int8"),
+    },
+    # Default for TikTok/Shorts batches
+    "balanced": {
+        "model_size": "small",
+        "beam_size": 3,
+        "best_of": 3,
+        "word_timestamps": True,
+        "vad_filter": True,
+        "condition_on_previous_text": True,
+        "compute_type": ("float16", "int8"),
+    },
+    # Slowest, best text + word timings (YouTube long-form)
+    "accurate": {
+        "model_size": "medium",
+        "beam_size": 5,
+        "best_of": 5,
+        "word_timestamps": True,
+        "vad_filter": False,
+        "condition_on_previous_text": True,
+        "compute_type": ("float16", "int8_float32"),
+    },
+}
+
+
+def get_asr_profile(name=None):
+    """
+    Resolve a profile name (also accepts UI labels like "draft (Nhanh)")
+
+    Returns:
+        tuple: (profile_name, profile_dict)
+    """
+    parts = (name or "").split()
+    key = parts[0].lower() if parts else DEFAULT_ASR_PROFILE
+    if key not in ASR_PROFILES:
+        key = DEFAULT_ASR_PROFILE
+    return key, ASR_PROFILES[key]
+
+
+def get_compute_type(profile, device):
+    """compute_type for faster-whisper on the given device ('cuda'/'cpu')"""
+    cuda_type, cpu_type = profile["compute_type"]
+    return cuda_type if device == "cuda" else cpu_type
+
+
+def _normalize_words(text):
+    text = re.sub(r"[^\w\s']", " ", (text or "").lower())
+    return text.split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word Error Rate = (substitutions + deletions + insertions) / reference words
+
+    Args:
+        reference: Ground-truth transcript
+        hypothesis: ASR output
+
+    Returns:
+        float: WER (0.0 = perfect)
+    """
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein distance over words (single row DP)
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(
+                prev[j] + 1,            # deletion
+                cur[j - 1] + 1,         # insertion
+                prev[j - 1] + (r != h)  # substitution
+            )
+        prev = cur
+    return prev[-1] / len(ref)
@@ -0,0 +1,216 @@
+"""Shared colour engine - every filter preset + brightness baked into one 3D LUT
+
+The same NumPy transform generates:
+  - a 33x33x33 .cube file for export (one ffmpeg lut3d filter instead of chained eq/colorbalance/colorchannelmixer)
+  - a 64-level uint8 table for the preview (one vectorized lookup per frame)
+so the preview matches the exported colours.
+
+The transforms follow ffmpeg's eq (YUV contrast/brightness/saturation),
+colorbalance (shadows/midtones/highlights by lightness) and colorchannelmixer,
+which is what the export used before.
+"""
+
+import os
+import threading
+
+from config.settings import LUT_CACHE_DIR
+
+
+CUBE_SIZE = 33
+PREVIEW_LEVELS = 64  # 6 bits per channel -> 262144-entry table (768 KB)
+
+# Each preset is a list of steps applied in order (same order as the old ffmpeg chains)
+COLOR_PRESETS = {
+    'bw':        [('hue_s0',)],
+    'sepia':     [('mixer', ((.393, .769, .189), (.349, .686, .168), (.272, .534, .131)))],
+    'vintage':   [('eq', dict(contrast=1.1, brightness=-0.05, saturation=0.8)),
+                  ('balance', dict(rs=0.1, gs=-0.05, bs=-0.1))],
+    'cold':      [('balance', dict(rs=-0.2, gs=-0.1, bs=0.3)),
+                  ('eq', dict(saturation=1.2))],
+    'warm':      [('balance', dict(rs=0.3, gs=-0.1, bs=-0.3)),
+                  ('eq', dict(saturation=1.1))],
+    'vivid':     [('eq', dict(saturation=1.5, contrast=1.1))],
+    'cinematic': [('balance', dict(rs=-0.1, bs=0.2, rh=0.2, bh=-0.1)),  # Teal & Orange look
+                  ('eq', dict(contrast=1.1, saturation=1.1))],
+    'dreamy':    [('balance', dict(rs=0.1, bs=0.1)),
+                  ('eq', dict(contrast=0.9, brightness=0.05, saturation=0.8))],
+    'dramatic':  [('eq', dict(contrast=1.3, saturation=0.6, brightness=-0.05))],
+    'cyberpunk': [('balance', dict(rs=-0.2, gs=-0.1, bs=0.4, rh=0.2, gh=-0.1, bh=0.2)),  # Neon Blue/Purple vibe
+                  ('eq', dict(contrast=1.2, saturation=1.4))],
+}
+
+_FILTER_LABELS = [
+    ('bw', ("Đen Trắng", "B&W")),
+    ('sepia', ("Sepia", "Cổ điển")),
+    ('vintage', ("Vintage", "Phim cũ")),
+    ('cold', ("Cold", "Lạnh")),
+    ('warm', ("Warm", "Ấm")),
+    ('vivid', ("Vivid", "Rực rỡ")),
+    ('cinematic', ("Cinematic", "Điện ảnh")),
+    ('dreamy', ("Dreamy", "Mộng mơ")),
+    ('dramatic', ("Dramatic", "Kịch tính")),
+    ('cyberpunk', ("Cyberpunk",)),
+]
+
+_preview_tables = {}
+_LUT_LOCK = threading.Lock()
+
+
+def parse_color_filter(name):
+    """Map a Vietnamese/English filter label to a preset key (None = no filter)"""
+    if not name or "None" in name or "Gốc" in name:
+        return None
+    for key, labels in _FILTER_LABELS:
+        if any(label in name for label in labels):
+            return key
+    return None
+
+
+# === TRANSFORMS (float RGB in 0..1, shape (..., 3)) ===
+
+def _luma(rgb):
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def _eq(rgb, contrast=1.0, brightness=0.0, saturation=1.0):
+    """ffmpeg eq: contrast/brightness on luma, saturation on chroma (BT.601)"""
+    import numpy as np
+    y = _luma(rgb)
+    u = (rgb[..., 2] - y) * 0.564
+    v = (rgb[..., 0] - y) * 0.713
+    y = (y - 0.5) * contrast + 0.5 + brightness
+    u = u * saturation
+    v = v * saturation
+    r = y + 1.403 * v
+    g = y - 0.344 * u - 0.714 * v
+    b = y + 1.773 * u
+    return np.clip(np.stack([r, g, b], axis=-1), 0.0, 1.0)
+
+
+def _balance(rgb, rs=0.0, gs=0.0, bs=0.0, rm=0.0, gm=0.0, bm=0.0, rh=0.0, gh=0.0, bh=0.0):
+    """ffmpeg colorbalance: shift shadows/midtones/highlights weighted by pixel lightness"""
+    import numpy as np
+    a, b, scale = 4.0, 0.333, 0.7
+    light = (rgb.max(axis=-1) + rgb.min(axis=-1)) / 2.0
+    w_s = np.clip((b - light) * a + 0.5, 0, 1) * scale
+    w_m = np.clip((light - b) * a + 0.5, 0, 1) * np.clip((1.0 - light - b) * a + 0.5, 0, 1) * scale
+    w_h = np.clip((light + b - 1) * a + 0.5, 0, 1) * scale
+    out = np.empty_like(rgb)
+    for c, (s, m, h) in enumerate(((rs, rm, rh), (gs, gm, gh), (bs, bm, bh))):
+        out[..., c] = rgb[..., c] + s * w_s + m * w_m + h * w_h
+    return np.clip(out, 0.0, 1.0)
+
+
+def _mixer(rgb, matrix):
+    """ffmpeg colorchannelmixer (rows = output R, G, B)"""
+    import numpy as np
+    return np.clip(rgb @ np.asarray(matrix, dtype=rgb.dtype).T, 0.0, 1.0)
+
+
+def apply_color_transform(rgb, key=None, brightness=1.0):
+    """
+    Apply brightness then a colour preset to float RGB values
+
+    Args:
+        rgb: numpy float array (..., 3) in 0..1
+        key: Preset key from COLOR_PRESETS (None = none)
+        brightness: Brightness setting (1.0 = unchanged, applied like eq=brightness=b-1)
+
+    Returns:
+        numpy array: Transformed RGB (same shape)
+    """
+    if brightness != 1.0:
+        rgb = _eq(rgb, brightness=brightness - 1.0)
+    for step in COLOR_PRESETS.get(key, []):
+        kind = step[0]
+        if kind == 'hue_s0':
+            rgb = _eq(rgb, saturation=0.0)
+        elif kind == 'mixer':
+            rgb = _mixer(rgb, step[1])
+        elif kind == 'eq':
+            rgb = _eq(rgb, **step[1])
+        elif kind == 'balance':
+            rgb = _balance(rgb, **step[1])
+    return rgb
+
+
+def is_identity(key, brightness):
+    return key not in COLOR_PRESETS and abs(brightness - 1.0) < 1e-6
+
+
+# === EXPORT: .cube FILE ===
+
+def _lut_dir():
+    path = os.path.join(os.getcwd(), LUT_CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_cube_file(key, brightness=1.0, size=CUBE_SIZE):
+    """
+    Path to the cached .cube LUT for a preset + brightness (generated on first use)
+
+    Returns:
+        str: Absolute path, or None if the combination is a no-op
+    """
+    import numpy as np
+    if is_identity(key, brightness):
+        return None
+    path = os.path.join(_lut_dir(), f"{key or 'none'}_b{brightness:.2f}_{size}.cube")
+    if os.path.exists(path):
+        return path
+
+    # .cube order: red changes fastest, then green, then blue
+    ramp = np.linspace(0.0, 1.0, size)
+    b, g, r = np.meshgrid(ramp, ramp, ramp, indexing='ij')
+    rgb = apply_color_transform(np.stack([r, g, b], axis=-1).reshape(-1, 3), key, brightness)
+
+    lines = [f'TITLE "{key or "none"} brightness {brightness:.2f}"', f"LUT_3D_SIZE {size}"]
+    lines += [f"{v[0]:.6f} {v[1]:.6f} {v[2]:.6f}" for v in rgb]
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def lut3d_filter(key, brightness=1.0):
+    """ffmpeg filter string for the preset ('' if nothing to do)"""
+    path = get_cube_file(key, brightness)
+    if not path:
+        return ""
+    # Windows path: C:\path\to\file -> C\:/path/to/file (FFmpeg filter syntax)
+    escaped = os.path.abspath(path).replace('\\', '/').replace(':', '\\:')
+    return f"lut3d=file='{escaped}'"
+
+
+# === PREVIEW: QUANTIZED LOOKUP TABLE ===
+
+def get_preview_table(key, brightness=1.0):
+    """
+    uint8 table for BGR frames: index = (b>>2)*4096 + (g>>2)*64 + (r>>2) -> transformed BGR
+
+    Returns:
+        numpy array (64**3, 3), or None if the combination is a no-op
+    """
+    import numpy as np
+    if is_identity(key, brightness):
+        return None
+    cache_key = (key, round(brightness, 3))
+    with _LUT_LOCK:
+        table = _preview_tables.get(cache_key)
+    if table is not None:
+        return table
+
+    n = PREVIEW_LEVELS
+    step = 256 // n
+    centers = (np.arange(n) * step + (step - 1) / 2.0) / 255.0
+    b, g, r = np.meshgrid(centers, centers, centers, indexing='ij')
+    rgb = apply_color_transform(np.stack([r, g, b], axis=-1).reshape(-1, 3), key, brightness)
+    table = np.ascontiguousarray((rgb[:, ::-1] * 255.0 + 0.5).astype(np.uint8))  # RGB -> BGR
+
+    with _LUT_LOCK:
+        if len(_preview_tables) > 16:
+            _preview_tables.clear()
+        _preview_tables[cache_key] = table
+    return table
@@ -1,27 +1,162 @@
 import requests
 import os
-import shutil
+import json
+import time
+import hashlib
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import (
+    GIPHY_CACHE_DIR, GIPHY_SEARCH_TTL_S, GIPHY_PREVIEW_TTL_S, GIPHY_TEMP_MAX_MB, GIPHY_CACHE_MAX_MB
+)
 
 # GIPHY PUBLIC BETA KEY (Verify if it still works, otherwise user needs their own)
 # This is a widely known public beta key, often rate limited but good for dev/test.
-GIPHY_API_KEY = "rkDGgXPThsDXJcBnkPc290uPwZoJAXa8" 
+GIPHY_API_KEY = "rkDGgXPThsDXJcBnkPc290uPwZoJAXa8"
 # Alternative: User should ideally provide their own key in settings.
 
+SEARCH_TIMEOUT = 10
+PREVIEW_TIMEOUT = 10
+DOWNLOAD_TIMEOUT = 30
+PREVIEW_WORKERS = 6  # Concurrent thumbnail downloads per client
+
+# One keep-alive connection pool for the whole app (search, previews and downloads share it)
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared requests.Session with a connection pool sized for the preview workers"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=PREVIEW_WORKERS + 2)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Cancels the work of one search (set when a newer search replaces it)"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise SearchCancelled()
+
+
 class GiphyAPI:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None, cache_dir=None, temp_dir=None):
         self.api_key = api_key if api_key else GiphyAPI.get_api_key()
-        self.base_url = "https://api.giphy.com/v1/stickers/search"
-        self.temp_dir = Path("temp_stickers")
+        self.base_url = base_url or "https://api.giphy.com/v1/stickers/search"
+        self.temp_dir = Path(temp_dir or "temp_stickers")
         self.temp_dir.mkdir(exist_ok=True)
+        self.cache_dir = Path(cache_dir or os.path.join(os.getcwd(), GIPHY_CACHE_DIR))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_max_bytes = GIPHY_TEMP_MAX_MB * 1024 * 1024
+        self.cache_max_bytes = GIPHY_CACHE_MAX_MB * 1024 * 1024
+        self.session = get_session()
+
+        self._token = None
+        self._token_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="GiphyPreview")
+        self._pool.submit(self._prune_cache_dir)  # Off the UI thread, once per client
 
     @staticmethod
     def get_api_key():
         # Standard Giphy Public Beta Key
         return "Gc7131jiJuvI7IdN0HZ1D7nh0ow5BU6g"
 
-    def search_stickers(self, query, limit=12):
-        """Search for stickers on Giphy"""
+    # === CANCELLATION ===
+    def new_search(self):
+        """Cancel the running search (and its thumbnail downloads); returns the token of the new one"""
+        with self._token_lock:
+            if self._token is not None:
+                self._token.cancel()
+            self._token = CancelToken()
+            return self._token
+
+    def close(self):
+        """Cancel pending work and stop the preview workers (dialog closed)"""
+        with self._token_lock:
+            if self._token is not None:
+                self._token.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # === HTTP CACHE ===
+    def _cache_path(self, key, ext):
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.{ext}"
+
+    @staticmethod
+    def _read_fresh(path, ttl):
+        """Cached bytes if the entry is younger than ttl seconds, else None"""
+        try:
+            if time.time() - path.stat().st_mtime > ttl:
+                return None
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def _prune_cache_dir(self):
+        """Delete expired (or orphaned .tmp) cache entries, then the oldest until cache_dir fits in cache_max_bytes"""
+        ttls = {'.json': GIPHY_SEARCH_TTL_S, '.bin': GIPHY_PREVIEW_TTL_S}
+        try:
+            now = time.time()
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    # Leftover .tmp files get the search TTL (another client may still be writing one)
+                    ttl = ttls.get(os.path.splitext(entry.name)[1], GIPHY_SEARCH_TTL_S)
+                    if now - st.st_mtime > ttl:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= self.cache_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        except Exception as e:
+            print(f"Giphy cache cleanup error: {e}")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # === SEARCH ===
+    def search_stickers(self, query, limit=12, token=None):
+        """Search for stickers on Giphy (results cached for GIPHY_SEARCH_TTL_S)"""
         try:
             params = {
                 "api_key": self.api_key,
@@ -30,10 +165,15 @@ class GiphyAPI:
                 "rating": "g",
                 "lang": "en"
             }
+            cache_file = self._cache_path(f"{self.base_url}|{query.lower()}|{limit}", "json")
+            cached = self._read_fresh(cache_file, GIPHY_SEARCH_TTL_S)
+            if cached is not None:
+                return json.loads(cached.decode('utf-8'))
+
             print(f"[DEBUG] Giphy Search URL: {self.base_url}")
-            # print(f"[DEBUG] Params: {params}") # Don't print key in prod logs usually, but for debug ok
-            
-            response = requests.get(self.base_url, params=params)
+            response = self.session.get(self.base_url, params=params, timeout=SEARCH_TIMEOUT)
+            if token is not None:
+                token.check()
             if response.status_code == 200:
                 data = response.json()
                 results = []
@@ -42,65 +182,132 @@ class GiphyAPI:
                     # and original url for download
                     images = item.get('images', {})
                     preview_url = images.get('fixed_height_small', {}).get('url')
-                    # Prefer standard static image for editing if available, else gif
                     # Use 'original' for best quality
-                    full_url = images.get('original', {}).get('url')
-                    
+                    original = images.get('original', {})
+                    full_url = original.get('url')
+
                     if preview_url and full_url:
+                        # Slug is "words-of-the-title-<id>": its words become search tags
+                        slug_words = (item.get('slug') or '').split('-')[:-1]
                         results.append({
                             'id': item.get('id'),
                             'title': item.get('title'),
                             'preview_url': preview_url,
-                            'full_url': full_url
+                            'full_url': full_url,
+                            'query': query,
+                            'tags': [w for w in slug_words if w],
+                            'width': int(original.get('width') or 0),
+                            'height': int(original.get('height') or 0)
                         })
+                self._write_atomic(cache_file, json.dumps(results, ensure_ascii=False).encode('utf-8'))
                 return results
             else:
                 print(f"Giphy API Error: {response.status_code}")
-                try: print(f"Response: {response.text}") 
+                try: print(f"Response: {response.text}")
                 except: pass
                 return []
+        except SearchCancelled:
+            return []
         except Exception as e:
             print(f"Search Error: {e}")
             return []
 
+    # === PREVIEWS ===
+    def fetch_preview(self, url, token=None):
+        """Preview image bytes (disk cache first), or None if failed/cancelled"""
+        try:
+            if token is not None:
+                token.check()
+            cache_file = self._cache_path(url, "bin")
+            data = self._read_fresh(cache_file, GIPHY_PREVIEW_TTL_S)
+            if data is not None:
+                return data
+            response = self.session.get(url, timeout=PREVIEW_TIMEOUT)
+            if token is not None:
+                token.check()
+            if response.status_code != 200:
+                return None
+            self._write_atomic(cache_file, response.content)
+            return response.content
+        except SearchCancelled:
+            return None
+        except Exception as e:
+            print(f"Preview Error: {e}")
+            return None
+
+    def fetch_previews(self, results, on_preview, token=None):
+        """
+        Download preview images concurrently (bounded pool), in result order
+
+        Args:
+            results: Items from search_stickers
+            on_preview: Called as on_preview(index, item, data) from a worker thread
+            token: CancelToken; cancelled searches stop delivering previews
+
+        Returns:
+            int: Number of previews delivered (0 if cancelled or the client was closed)
+        """
+        futures = []
+        try:
+            for i, item in enumerate(results):
+                if token is not None and token.cancelled:
+                    return 0
+                url = item.get('preview_url')
+                if url:
+                    futures.append((i, item, self._pool.submit(self.fetch_preview, url, token)))
+        except RuntimeError:
+            # close() shut the pool down while this search was still running (dialog closed)
+            return 0
+
+        delivered = 0
+        for i, item, future in futures:
+            try:
+                data = future.result()
+            except Exception:
+                data = None
+            if token is not None and token.cancelled:
+                break
+            if data:
+                on_preview(i, item, data)
+                delivered += 1
+        return delivered
+
+    # === DOWNLOAD ===
     def download_sticker(self, url, sticker_id):
-        """Download sticker to temp file"""
+        """Download sticker to temp file (temp_stickers is kept under GIPHY_TEMP_MAX_MB)"""
         try:
             print(f"[DEBUG] Download start: {sticker_id}")
-            print(f"[DEBUG] URL: {url}")
-            
+
             # Remove query parameters from URL before extracting extension
             url_without_params = url.split('?')[0] if '?' in url else url
             url_without_params = url_without_params.split('&')[0] if '&' in url_without_params else url_without_params
-            
+
             # Extract extension from clean URL
             ext = url_without_params.split('.')[-1]
             if not ext or len(ext) > 4:  # Invalid extension
                 ext = "gif"
-            
-            print(f"[DEBUG] Extension: {ext}")
-            
+
             # Clean filename - only use sticker_id and extension
             filename = f"{sticker_id}.{ext}"
             filepath = self.temp_dir / filename
-            
-            print(f"[DEBUG] Target path: {filepath}")
-            
-            # If already downloaded, return path
+
+            # If already downloaded, mark as recently used and return path
             if filepath.exists():
+                os.utime(filepath, None)
                 print(f"[DEBUG] Already exists, returning: {filepath}")
                 return str(filepath)
-            
-            # Download the file
-            print(f"[DEBUG] Downloading...")
-            response = requests.get(url, stream=True, timeout=30)
+
+            response = self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
             print(f"[DEBUG] Response status: {response.status_code}")
-            
+
             if response.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    response.raw.decode_content = True
-                    shutil.copyfileobj(response.raw, f)
-                
+                tmp_path = filepath.with_name(f"{filename}.{threading.get_ident()}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+                os.replace(tmp_path, filepath)
+                self._trim_temp_dir(keep=filepath)
+
                 print(f"[DEBUG] ✅ Download success: {filepath}")
                 return str(filepath)
             else:
@@ -111,3 +318,28 @@ class GiphyAPI:
             import traceback
             traceback.print_exc()
             return None
+
+    def _trim_temp_dir(self, keep=None):
+        """Delete least recently used downloads until temp_stickers fits in temp_max_bytes"""
+        try:
+            entries = []
+            total = 0
+            with os.scandir(self.temp_dir) as it:
+                for entry in it:
+                    if entry.is_file():
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= self.temp_max_bytes:
+                    break
+                if keep is not None and os.path.samefile(path, keep):
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        except Exception as e:
+            print(f"Temp sticker cleanup error: {e}")
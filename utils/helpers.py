@@ -74,3 +74,27 @@ def get_video_files(directory):
             video_files.append(file)
     
     return sorted(video_files)
+
+
+def file_fingerprint(path, chunk_size=1024 * 1024):
+    """Cheap content fingerprint of a file (size + head/tail hash), no full read
+
+    Args:
+        path (str): File path
+        chunk_size (int): Bytes hashed from the start and the end of the file
+
+    Returns:
+        str: Hex digest, or None if the file can't be read
+    """
+    import hashlib
+    try:
+        size = os.path.getsize(path)
+        h = hashlib.sha1(str(size).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read(chunk_size))
+            if size > chunk_size * 2:
+                f.seek(-chunk_size, os.SEEK_END)
+                h.update(f.read(chunk_size))
+        return h.hexdigest()
+    except OSError:
+        return None
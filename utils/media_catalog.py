@@ -0,0 +1,245 @@
+"""Media catalog - per-file facts that are expensive to compute, stored once
+
+Entries are keyed by the content fingerprint of the source file (see
+helpers.file_fingerprint), so renaming/moving a clip keeps its entry.
+Currently holds the video keyframe index used by the preview player to
+seek: jump to the nearest preceding keyframe, then decode forward.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import bisect
+import shutil
+import threading
+import subprocess
+
+from config.settings import MEDIA_CATALOG_DIR
+
+
+CATALOG_VERSION = 1
+
+_CATALOG_LOCK = threading.Lock()
+_memory_entries = {}    # fingerprint -> entry dict (avoids re-reading JSON on every seek)
+_index_queue = queue.Queue()
+_index_pending = set()  # Absolute paths queued or being indexed
+_index_worker = None
+
+
+def _catalog_dir():
+    path = os.path.join(os.getcwd(), MEDIA_CATALOG_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
+def get_ffprobe_path():
+    """ffprobe next to the bundled ffmpeg, or from PATH. None if missing"""
+    ffmpeg_path = _get_ffmpeg_path()
+    folder, name = os.path.split(ffmpeg_path)
+    if folder:
+        candidate = os.path.join(folder, name.replace('ffmpeg', 'ffprobe'))
+        if os.path.exists(candidate):
+            return candidate
+    return shutil.which('ffprobe')
+
+
+def load_entry(video_path):
+    """Catalog entry for a file ({} if unknown)"""
+    from .helpers import file_fingerprint
+    fp = file_fingerprint(video_path)
+    if not fp:
+        return {}
+    with _CATALOG_LOCK:
+        if fp in _memory_entries:
+            return _memory_entries[fp]
+    try:
+        with open(os.path.join(_catalog_dir(), f"{fp}.json"), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if entry.get('version') != CATALOG_VERSION:
+            entry = {}
+    except (OSError, ValueError):
+        entry = {}
+    with _CATALOG_LOCK:
+        _memory_entries[fp] = entry
+    return entry
+
+
+def update_entry(video_path, **fields):
+    """Merge fields into the file's entry and persist it (atomic write)"""
+    from .helpers import file_fingerprint
+    fp = file_fingerprint(video_path)
+    if not fp:
+        return None
+    entry = dict(load_entry(video_path))
+    entry.update(fields)
+    entry['version'] = CATALOG_VERSION
+    entry['source'] = os.path.basename(video_path)
+    entry['updated'] = time.time()
+
+    path = os.path.join(_catalog_dir(), f"{fp}.json")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with _CATALOG_LOCK:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        _memory_entries[fp] = entry
+    return entry
+
+
+# === KEYFRAME INDEX ===
+
+def _run(cmd, timeout):
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=timeout,
+                          creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
+
+
+def _keyframes_ffprobe(video_path, timeout):
+    """Keyframe pts (seconds) from ffprobe -show_packets (demux only, no decoding)"""
+    ffprobe_path = get_ffprobe_path()
+    if not ffprobe_path:
+        return None
+    cmd = [ffprobe_path, '-v', 'error', '-select_streams', 'v:0', '-show_packets',
+           '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path]
+    result = _run(cmd, timeout)
+    if result.returncode != 0:
+        return None
+
+    keyframes, first_pts = [], None
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2:
+            continue
+        try:
+            pts = float(parts[0])
+        except ValueError:
+            continue  # pts_time=N/A
+        first_pts = pts if first_pts is None else min(first_pts, pts)
+        if 'K' in parts[1]:
+            keyframes.append(pts)
+    return keyframes, first_pts or 0.0
+
+
+def _keyframes_framecrc(video_path, timeout):
+    """Same as _keyframes_ffprobe using ffmpeg -c copy -f framecrc (bundled ffmpeg has no ffprobe)"""
+    cmd = [_get_ffmpeg_path(), '-hide_banner', '-v', 'error', '-i', video_path,
+           '-map', '0:v:0', '-c', 'copy', '-f', 'framecrc', '-']
+    result = _run(cmd, timeout)
+    if result.returncode != 0:
+        return None
+
+    # "#tb 0: 1/15360" then "0, dts, pts, duration, size, 0xcrc[, F=0x0]" (F= only on non-key packets)
+    time_base = None
+    keyframes, first_pts = [], None
+    for line in result.stdout.splitlines():
+        if line.startswith('#tb 0:'):
+            num, den = line.split(':', 1)[1].strip().split('/')
+            time_base = float(num) / float(den)
+            continue
+        if line.startswith('#') or time_base is None:
+            continue
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < 6:
+            continue
+        try:
+            pts = int(parts[2]) * time_base
+        except ValueError:
+            continue
+        first_pts = pts if first_pts is None else min(first_pts, pts)
+        flags = next((p for p in parts[6:] if p.startswith('F=')), None)
+        if flags is None or int(flags[2:], 16) & 1:
+            keyframes.append(pts)
+    return keyframes, first_pts or 0.0
+
+
+def build_keyframe_index(video_path, log_callback=None, timeout=300):
+    """
+    Scan the video stream's packets and store keyframe times in the catalog
+
+    Args:
+        video_path: Path to video file
+        log_callback: Optional callback function for logging
+        timeout: Max seconds for the demux pass
+
+    Returns:
+        list: Sorted keyframe times in seconds from the start of the stream, or None
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    t0 = time.time()
+    result = None
+    for scan in (_keyframes_ffprobe, _keyframes_framecrc):
+        try:
+            result = scan(video_path, timeout)
+        except Exception as e:
+            result = None
+            print(f"Keyframe scan ({scan.__name__}) failed: {e}")
+        if result and result[0]:
+            break
+    if not result or not result[0]:
+        log(f"⚠️ Keyframe index failed: {os.path.basename(video_path)}")
+        return None
+
+    keyframes, first_pts = result
+    keyframes = sorted(round(max(0.0, pts - first_pts), 4) for pts in keyframes)
+    try:
+        update_entry(video_path, keyframes=keyframes)
+    except OSError as e:
+        log(f"⚠️ Could not write media catalog: {e}")
+    log(f"🗂️ Keyframe index: {os.path.basename(video_path)} - {len(keyframes)} keyframes ({time.time() - t0:.2f}s)")
+    return keyframes
+
+
+def get_keyframe_index(video_path):
+    """Cached keyframe times (seconds) or None if not indexed yet"""
+    return load_entry(video_path).get('keyframes')
+
+
+def nearest_keyframe(keyframes, seconds):
+    """Latest keyframe time at or before seconds (0.0 if none)"""
+    if not keyframes:
+        return 0.0
+    i = bisect.bisect_right(keyframes, seconds + 1e-6) - 1
+    return keyframes[i] if i >= 0 else 0.0
+
+
+def _index_worker_loop():
+    while True:
+        video_path = _index_queue.get()
+        try:
+            if get_keyframe_index(video_path) is None:
+                build_keyframe_index(video_path)
+        except Exception as e:
+            print(f"Keyframe index error: {e}")
+        finally:
+            with _CATALOG_LOCK:
+                _index_pending.discard(os.path.abspath(video_path))
+
+
+def schedule_keyframe_index(video_path):
+    """
+    Queue a background keyframe scan (one file at a time, skipped if already indexed)
+
+    Safe to call from the UI thread - fingerprinting happens in the worker.
+    """
+    global _index_worker
+    key = os.path.abspath(video_path)
+    with _CATALOG_LOCK:
+        if key in _index_pending:
+            return
+        _index_pending.add(key)
+        if _index_worker is None or not _index_worker.is_alive():
+            _index_worker = threading.Thread(target=_index_worker_loop, daemon=True)
+            _index_worker.start()
+    _index_queue.put(video_path)
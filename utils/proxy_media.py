@@ -0,0 +1,227 @@
+"""Preview proxies - small all-intra copies of heavy sources (4K, HEVC, ...)
+
+Generated in the background at low priority right after a file is added to
+the media list. The preview player opens the proxy instead of the source
+when one exists; export always reads the original file.
+
+Proxies live in cache/proxies named by the source content fingerprint and
+the folder is capped in size (least recently used proxies are deleted first).
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import subprocess
+
+from config.settings import PROXY_CACHE_DIR, PROXY_CACHE_MAX_MB
+
+
+PROXY_SHORT_SIDE = 540
+# Sources at or below this many pixels in a non-heavy codec decode fast enough as-is
+PROXY_MIN_PIXELS = 1920 * 1080
+HEAVY_CODECS = ('hevc', 'h265', 'vp9', 'av1', 'prores', 'mpeg2video')
+
+_PROXY_LOCK = threading.Lock()
+_proxy_queue = queue.Queue()
+_proxy_pending = set()  # Absolute paths queued or being converted
+_proxy_worker = None
+_current_process = None
+
+
+def _proxy_dir():
+    path = os.path.join(os.getcwd(), PROXY_CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
+def needs_proxy(video_info):
+    """True if the source is expensive to decode for preview (from get_video_info)"""
+    if not video_info:
+        return False
+    pixels = video_info.get('width', 0) * video_info.get('height', 0)
+    codec = (video_info.get('video_codec') or '').lower()
+    return pixels > PROXY_MIN_PIXELS or codec in HEAVY_CODECS
+
+
+def _proxy_file(fingerprint):
+    return os.path.join(_proxy_dir(), f"{fingerprint}.mp4")
+
+
+def get_proxy_path(video_path):
+    """Path of a finished proxy for video_path, or None (marks the proxy as recently used)"""
+    from .helpers import file_fingerprint
+    fp = file_fingerprint(video_path)
+    if not fp:
+        return None
+    path = _proxy_file(fp)
+    if not os.path.exists(path):
+        return None
+    try:
+        os.utime(path, None)  # LRU: last use = mtime
+    except OSError:
+        pass
+    return path
+
+
+def enforce_cache_limit(max_mb=PROXY_CACHE_MAX_MB, keep=None):
+    """Delete least recently used proxies until the folder fits in max_mb"""
+    entries = []
+    for name in os.listdir(_proxy_dir()):
+        if not name.endswith('.mp4') or name.endswith('.tmp.mp4'):
+            continue
+        path = os.path.join(_proxy_dir(), name)
+        try:
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            pass
+
+    total = sum(size for _, size, _ in entries)
+    limit = max_mb * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        if keep and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass  # In use by the preview - try again next time
+
+
+def build_proxy(video_path, log_callback=None):
+    """
+    Encode a 540p all-intra H.264 proxy (every frame is a keyframe -> instant seeks)
+
+    Args:
+        video_path: Source video
+        log_callback: Optional callback function for logging
+
+    Returns:
+        str: Proxy path, or None on failure
+    """
+    global _current_process
+
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    from .helpers import file_fingerprint
+    fp = file_fingerprint(video_path)
+    if not fp:
+        return None
+    out_path = _proxy_file(fp)
+    if os.path.exists(out_path):
+        return out_path
+    tmp_path = out_path[:-4] + '.tmp.mp4'
+
+    s = PROXY_SHORT_SIDE
+    cmd = [
+        _get_ffmpeg_path(), '-y', '-hide_banner', '-v', 'error',
+        '-i', video_path,
+        '-map', '0:v:0', '-an', '-sn',
+        '-vf', f"scale='if(gt(iw,ih),-2,{s})':'if(gt(iw,ih),{s},-2)'",
+        '-fps_mode', 'passthrough',  # Same frame count as the source so seek positions match
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'fastdecode',
+        '-g', '1', '-crf', '23', '-pix_fmt', 'yuv420p',
+        '-threads', '2',
+        tmp_path
+    ]
+
+    # Lowest priority: proxies must never slow down exports or the UI
+    creation_flags = 0
+    preexec_fn = None
+    if sys.platform == 'win32':
+        creation_flags = subprocess.CREATE_NO_WINDOW | 0x00000040  # IDLE_PRIORITY_CLASS
+    else:
+        preexec_fn = lambda: os.nice(15)
+
+    t0 = time.time()
+    try:
+        with _PROXY_LOCK:
+            _current_process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                                creationflags=creation_flags, preexec_fn=preexec_fn)
+        _, stderr = _current_process.communicate()
+        returncode = _current_process.returncode
+    except Exception as e:
+        returncode, stderr = -1, str(e).encode()
+    finally:
+        with _PROXY_LOCK:
+            _current_process = None
+
+    if returncode != 0 or not os.path.exists(tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        log(f"⚠️ Proxy failed: {os.path.basename(video_path)} ({stderr.decode(errors='ignore')[-200:].strip()})")
+        return None
+
+    os.replace(tmp_path, out_path)
+    enforce_cache_limit(keep=out_path)
+    log(f"🎞️ Proxy ready: {os.path.basename(video_path)} ({time.time() - t0:.1f}s)")
+    return out_path
+
+
+def _proxy_worker_loop():
+    while True:
+        video_path, log_callback = _proxy_queue.get()
+        try:
+            if os.path.exists(video_path) and get_proxy_path(video_path) is None:
+                build_proxy(video_path, log_callback=log_callback)
+        except Exception as e:
+            print(f"Proxy error: {e}")
+        finally:
+            with _PROXY_LOCK:
+                _proxy_pending.discard(os.path.abspath(video_path))
+
+
+def schedule_proxy(video_path, video_info=None, log_callback=None):
+    """
+    Queue background proxy generation if the source is heavy (one file at a time)
+
+    Args:
+        video_path: Source video
+        video_info: Result of get_video_info() (skips the check when None)
+        log_callback: Optional callback function for logging
+    """
+    global _proxy_worker
+    if video_info is not None and not needs_proxy(video_info):
+        return
+    key = os.path.abspath(video_path)
+    with _PROXY_LOCK:
+        if key in _proxy_pending:
+            return
+        _proxy_pending.add(key)
+        if _proxy_worker is None or not _proxy_worker.is_alive():
+            _proxy_worker = threading.Thread(target=_proxy_worker_loop, daemon=True)
+            _proxy_worker.start()
+    _proxy_queue.put((video_path, log_callback))
+
+
+def cancel_proxy_jobs():
+    """Drop queued proxies and stop the running encode (app exit / file delete)"""
+    while True:
+        try:
+            video_path, _ = _proxy_queue.get_nowait()
+        except queue.Empty:
+            break
+        with _PROXY_LOCK:
+            _proxy_pending.discard(os.path.abspath(video_path))
+    with _PROXY_LOCK:
+        if _current_process is not None:
+            try:
+                _current_process.kill()
+            except Exception:
+                pass
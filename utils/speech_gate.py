@@ -0,0 +1,149 @@
+"""Speech-presence gate - cheap check that runs before any ASR model is loaded
+
+Decodes a few short windows of the audio track at 16kHz and looks at
+vectorized spectral features. Music-only or silent tracks are rejected so
+Whisper is never loaded for them.
+"""
+
+import time
+
+from .subtitle_generator import decode_audio_pcm
+
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 512            # 32ms @ 16kHz
+VOICE_BAND = (300, 3400)    # Hz - telephone band, carries most speech energy
+
+# Tunable thresholds (check the gate logs when adjusting)
+SILENCE_DBFS = -45.0        # Frames quieter than this are ignored
+MAX_FLATNESS = 0.40         # Noise-like frames are flat (close to 1.0)
+MIN_VOICE_RATIO = 0.50      # Share of frame energy inside VOICE_BAND
+MIN_VOICED_FRACTION = 0.15  # Share of loud frames that look like speech
+MIN_ENERGY_STD_DB = 4.0     # Speech has syllabic energy modulation, sustained music doesn't
+
+
+def analyze_speech_window(samples, sample_rate=SAMPLE_RATE):
+    """
+    Compute speech features for one window of mono audio
+
+    Args:
+        samples: numpy int16/float array of mono samples
+        sample_rate: Sample rate of samples
+
+    Returns:
+        dict: loud_fraction, voiced_fraction, flatness, voice_ratio, energy_std_db, is_speech
+    """
+    import numpy as np
+
+    n_frames = len(samples) // FRAME_SIZE
+    stats = {
+        'loud_fraction': 0.0,
+        'voiced_fraction': 0.0,
+        'flatness': 1.0,
+        'voice_ratio': 0.0,
+        'energy_std_db': 0.0,
+        'is_speech': False,
+    }
+    if n_frames < 4:
+        return stats
+
+    frames = np.asarray(samples[:n_frames * FRAME_SIZE], dtype=np.float32).reshape(n_frames, FRAME_SIZE)
+    frames /= 32768.0
+
+    # Frame energy (dBFS)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10
+    energy_db = 20.0 * np.log10(rms)
+    loud = energy_db > SILENCE_DBFS
+    stats['loud_fraction'] = float(loud.mean())
+    if not loud.any():
+        return stats
+
+    # Power spectrum of loud frames only
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames[loud] * window, axis=1)) ** 2 + 1e-12
+
+    # Spectral flatness: geometric mean / arithmetic mean
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    # Energy share inside the voice band
+    freqs = np.fft.rfftfreq(FRAME_SIZE, d=1.0 / sample_rate)
+    band = (freqs >= VOICE_BAND[0]) & (freqs <= VOICE_BAND[1])
+    voice_ratio = power[:, band].sum(axis=1) / power.sum(axis=1)
+
+    voiced = (flatness < MAX_FLATNESS) & (voice_ratio > MIN_VOICE_RATIO)
+
+    stats['voiced_fraction'] = float(voiced.mean())
+    stats['flatness'] = float(np.median(flatness))
+    stats['voice_ratio'] = float(np.median(voice_ratio))
+    stats['energy_std_db'] = float(np.std(energy_db[loud]))
+    stats['is_speech'] = (
+        stats['voiced_fraction'] >= MIN_VOICED_FRACTION
+        and stats['energy_std_db'] >= MIN_ENERGY_STD_DB
+    )
+    return stats
+
+
+def detect_speech_presence(video_path, start_time=0, duration=0, num_windows=4,
+                           window_sec=3.0, log_callback=None):
+    """
+    Decide whether a clip is likely to contain speech before running ASR
+
+    Args:
+        video_path: Path to video file
+        start_time: Start of the window that will be transcribed (seconds)
+        duration: Length of that window in seconds (0 = until end of file)
+        num_windows: Number of windows sampled evenly across the range
+        window_sec: Length of each sampled window in seconds
+        log_callback: Optional callback function for logging
+
+    Returns:
+        bool: True if speech is likely (or the gate could not decide), False to skip ASR
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    t0 = time.time()
+    try:
+        import numpy as np
+    except ImportError:
+        return True
+
+    if not duration or duration <= 0:
+        try:
+            from .video_processor import get_video_info
+            info = get_video_info(video_path)
+            duration = max(0, (info or {}).get('duration', 0) - start_time)
+        except Exception:
+            duration = 0
+
+    # Short clips: one window covering everything
+    if duration <= window_sec * num_windows:
+        offsets = [start_time]
+        window_sec = duration if duration > 0 else window_sec * num_windows
+    else:
+        step = duration / num_windows
+        offsets = [start_time + step * i + (step - window_sec) / 2 for i in range(num_windows)]
+
+    decoded_any = False
+    for i, offset in enumerate(offsets):
+        pcm = decode_audio_pcm(video_path, start_time=offset, duration=window_sec, sample_rate=SAMPLE_RATE)
+        if not pcm:
+            continue
+        decoded_any = True
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        stats = analyze_speech_window(samples)
+        log(f"   🔎 Speech gate [{offset:.1f}s]: voiced={stats['voiced_fraction']:.2f} "
+            f"flat={stats['flatness']:.2f} voice_band={stats['voice_ratio']:.2f} "
+            f"energy_std={stats['energy_std_db']:.1f}dB loud={stats['loud_fraction']:.2f}")
+        if stats['is_speech']:
+            log(f"   🗣️ Speech gate: speech likely ({i + 1}/{len(offsets)} windows, {time.time() - t0:.2f}s)")
+            return True
+
+    if not decoded_any:
+        # Could not decode - don't block ASR on a gate failure
+        log(f"   ⚠️ Speech gate: audio decode failed, running ASR anyway ({time.time() - t0:.2f}s)")
+        return True
+
+    log(f"   🔇 Speech gate: no speech detected ({len(offsets)} windows, {time.time() - t0:.2f}s)")
+    return False
@@ -0,0 +1,240 @@
+"""Sticker assets for export - pre-scaled once per (sticker content, target width)
+
+Before, every job fed the original sticker through `-stream_loop -1` and ran
+`format=yuva420p,scale=...` on every output frame. Assets are built once and reused
+across jobs and batches:
+  - static images (PNG/JPG/single-frame GIF/WebP): one RGBA PNG at the final size,
+    overlaid with eof_action=repeat so ffmpeg decodes it once per job
+  - animations (GIF/APNG/video): one pre-scaled loop in FFV1/yuva420p (lossless,
+    alpha kept, already in the overlay's pixel format), read with -stream_loop -1
+
+Several static stickers of one job are composited into a single transparent layer
+(cropped to their bounding box), so export runs one overlay instead of one per sticker.
+
+Assets live in cache/stickers named by the sticker's content hash and width.
+"""
+
+import os
+import sys
+import hashlib
+import threading
+import subprocess
+
+from config.settings import STICKER_CACHE_DIR
+
+
+VIDEO_STICKER_EXTS = ('.mp4', '.mov', '.webm', '.mkv', '.avi')
+
+_ASSET_LOCK = threading.Lock()
+_hash_cache = {}      # (abspath, size, mtime) -> sha1
+_building = {}        # asset path -> Event (another thread is building it)
+
+
+def _asset_dir():
+    path = os.path.join(os.getcwd(), STICKER_CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
+def sticker_hash(path):
+    """SHA1 of the sticker file content (memoized per path/size/mtime)"""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime)
+    digest = _hash_cache.get(key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _hash_cache[key] = digest
+    return digest
+
+
+def is_animated(path):
+    """True for video stickers and multi-frame GIF/PNG/WebP"""
+    if path.lower().endswith(VIDEO_STICKER_EXTS):
+        return True
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            return bool(getattr(img, 'is_animated', False)) and getattr(img, 'n_frames', 1) > 1
+    except Exception:
+        return False
+
+
+def _build_static(path, width, out_path):
+    from PIL import Image
+    with Image.open(path) as img:
+        img.seek(0)
+        rgba = img.convert('RGBA')
+    height = max(2, int(round(width * rgba.height / rgba.width / 2)) * 2)
+    rgba = rgba.resize((width, height), Image.Resampling.LANCZOS)
+    tmp_path = f"{out_path}.{threading.get_ident()}.tmp.png"
+    rgba.save(tmp_path, 'PNG')
+    os.replace(tmp_path, out_path)
+
+
+def _build_animated(path, width, out_path, ffmpeg_path=None):
+    tmp_path = f"{out_path}.{threading.get_ident()}.tmp.mkv"
+    cmd = [
+        ffmpeg_path or _get_ffmpeg_path(), '-y', '-hide_banner', '-v', 'error',
+        '-i', path,
+        '-an', '-sn',
+        '-vf', f"scale={width}:-2:flags=lanczos,format=yuva420p",
+        '-c:v', 'ffv1',
+        tmp_path
+    ]
+    result = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=120,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+    )
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise RuntimeError(result.stderr.decode('utf-8', errors='ignore')[-300:])
+    os.replace(tmp_path, out_path)
+
+
+def prepare_sticker_asset(path, width, ffmpeg_path=None, log_callback=None):
+    """
+    Pre-scaled export asset for a sticker (built on first use, then cached)
+
+    Args:
+        path: Sticker file (image, GIF or short video)
+        width: Final width in output pixels (even)
+        ffmpeg_path: FFmpeg binary used for animated stickers
+
+    Returns:
+        dict: {'path', 'animated'} (+ 'width'/'height' for static assets),
+              or None if the asset can't be built (use the original)
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    try:
+        width = max(2, int(width) // 2 * 2)
+        animated = is_animated(path)
+        ext = 'mkv' if animated else 'png'
+        out_path = os.path.join(_asset_dir(), f"{sticker_hash(path)[:16]}_{width}.{ext}")
+
+        # One builder per asset: parallel jobs of a batch wait for it instead of encoding it again
+        with _ASSET_LOCK:
+            done = _building.get(out_path)
+            owner = done is None and not os.path.exists(out_path)
+            if owner:
+                done = threading.Event()
+                _building[out_path] = done
+        if not owner:
+            if done is not None:
+                done.wait(timeout=120)
+            # Cached asset (or built by another job): same info as a fresh build
+            return _asset_info(out_path, animated) if os.path.exists(out_path) else None
+
+        try:
+            if animated:
+                _build_animated(path, width, out_path, ffmpeg_path)
+            else:
+                _build_static(path, width, out_path)
+            log(f"   🖼️ Sticker asset: {os.path.basename(path)} -> {width}px ({'loop' if animated else 'PNG'})")
+        finally:
+            with _ASSET_LOCK:
+                _building.pop(out_path, None)
+            done.set()
+        return _asset_info(out_path, animated)
+    except Exception as e:
+        log(f"   ⚠️ Sticker asset failed, using original: {e}")
+        return None
+
+
+def _asset_info(out_path, animated):
+    info = {'path': out_path, 'animated': animated}
+    if not animated:
+        from PIL import Image
+        with Image.open(out_path) as img:
+            info['width'], info['height'] = img.size
+    return info
+
+
+def static_sticker_position(pos, x, y, canvas_w, canvas_h, w, h, margin=20):
+    """
+    Pixel position of a sticker, same as the export's overlay x/y expressions
+
+    overlay truncates x/y and aligns them to even pixels for yuv420p output.
+    """
+    if "Custom" in pos or "Tùy chỉnh" in pos:
+        px, py = canvas_w * round(float(x), 4), canvas_h * round(float(y), 4)
+    else:
+        px, py = canvas_w - w - margin, canvas_h - h - margin  # Default: Bottom-Right
+        if "Top" in pos or "trên" in pos:
+            py = margin
+        elif "Center" in pos or "giữa" in pos:
+            py = (canvas_h - h) / 2
+        if "Left" in pos or "trái" in pos:
+            px = margin
+        elif "Center" in pos or "giữa" in pos:
+            px = (canvas_w - w) / 2
+    return int(px) & ~1, int(py) & ~1
+
+
+def composite_static_stickers(layers, canvas_w, canvas_h, log_callback=None):
+    """
+    Composite static sticker assets into one transparent layer (cached)
+
+    Args:
+        layers: List of (asset_path, x, y) in overlay order
+        canvas_w, canvas_h: Output video size
+
+    Returns:
+        tuple: (png_path, x, y) of the layer cropped to the stickers' bounding box, or None
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    try:
+        from PIL import Image
+
+        # Visible part of each sticker, bounding box origin aligned to even pixels
+        boxes = []
+        for path, x, y in layers:
+            with Image.open(path) as img:
+                w, h = img.size
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(canvas_w, x + w), min(canvas_h, y + h)
+            if x2 > x1 and y2 > y1:
+                boxes.append((path, x, y, x1, y1, x2, y2))
+        if not boxes:
+            return None
+        bx = min(b[3] for b in boxes) & ~1
+        by = min(b[4] for b in boxes) & ~1
+        bw = max(b[5] for b in boxes) - bx
+        bh = max(b[6] for b in boxes) - by
+
+        key = hashlib.sha1(repr((canvas_w, canvas_h, [(os.path.basename(p), x, y) for p, x, y in layers])).encode()).hexdigest()
+        out_path = os.path.join(_asset_dir(), f"layer_{key[:16]}.png")
+        if not os.path.exists(out_path):
+            canvas = Image.new('RGBA', (bw, bh), (0, 0, 0, 0))
+            for path, x, y, x1, y1, x2, y2 in boxes:
+                with Image.open(path) as img:
+                    sticker = img.convert('RGBA')
+                canvas.alpha_composite(sticker, dest=(x1 - bx, y1 - by), source=(x1 - x, y1 - y, x2 - x, y2 - y))
+            tmp_path = f"{out_path}.{threading.get_ident()}.tmp.png"
+            canvas.save(tmp_path, 'PNG')
+            os.replace(tmp_path, out_path)
+            log(f"   🖼️ {len(layers)} sticker tĩnh -> 1 lớp overlay ({bw}x{bh})")
+        return out_path, bx, by
+    except Exception as e:
+        log(f"   ⚠️ Sticker layer failed, overlaying one by one: {e}")
+        return None
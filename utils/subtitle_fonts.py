@@ -0,0 +1,197 @@
+"""Fonts for burned-in subtitles - one fontconfig cache shared by every ffmpeg job
+
+libass starts fontconfig inside each ffmpeg process. Without a usable config/cache
+(typical for Windows ffmpeg builds) fontconfig rescans every system font on each job,
+which costs seconds of startup per video. Instead:
+  - cache/fontconfig/fonts.conf includes the system/ffmpeg fontconfig setup (aliases and
+    substitutions stay the same) and adds the bundled assets/fonts folder, the system
+    font folders, a persistent <cachedir> and no periodic rescans
+  - ffmpeg runs with FONTCONFIG_FILE pointing at it, and `fontsdir` adds the bundled fonts
+  - warm_up_subtitle_fonts() builds the cache once (app start / batch start) and logs
+    the subtitle filter start-up time before and after
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from xml.sax.saxutils import escape
+
+from config.settings import FONTCONFIG_CACHE_DIR
+
+
+FONT_EXTS = ('.ttf', '.otf', '.ttc')
+# Default fontconfig setups (Linux, Homebrew Intel/Apple Silicon); Windows ffmpeg builds usually have none
+SYSTEM_FONTCONFIG_FILES = ('/etc/fonts/fonts.conf', '/usr/local/etc/fonts/fonts.conf', '/opt/homebrew/etc/fonts/fonts.conf')
+
+_warm_lock = threading.Lock()
+_warmed = False
+timings = {}  # 'default' / 'first_build' / 'warm' -> seconds of one tiny subtitle render
+
+
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
+def bundled_fonts_dir():
+    """assets/fonts (next to the app, or inside the PyInstaller bundle)"""
+    base = getattr(sys, '_MEIPASS', None) or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, 'assets', 'fonts')
+
+
+def has_bundled_fonts():
+    folder = bundled_fonts_dir()
+    try:
+        return any(name.lower().endswith(FONT_EXTS) for name in os.listdir(folder))
+    except OSError:
+        return False
+
+
+def _system_fontconfig():
+    """fonts.conf fontconfig would load without our override (None if there is none)"""
+    candidates = []
+    if os.environ.get('FONTCONFIG_FILE'):
+        candidates.append(os.environ['FONTCONFIG_FILE'])
+    if os.environ.get('FONTCONFIG_PATH'):
+        candidates.append(os.path.join(os.environ['FONTCONFIG_PATH'], 'fonts.conf'))
+    candidates += SYSTEM_FONTCONFIG_FILES
+    own = os.path.abspath(os.path.join(os.getcwd(), FONTCONFIG_CACHE_DIR, 'fonts.conf'))
+    for path in candidates:
+        if os.path.isfile(path) and os.path.abspath(path) != own:
+            return path
+    return None
+
+
+def _config_dir():
+    path = os.path.join(os.getcwd(), FONTCONFIG_CACHE_DIR)
+    os.makedirs(os.path.join(path, 'cache'), exist_ok=True)
+    return path
+
+
+def ensure_fontconfig():
+    """Write cache/fontconfig/fonts.conf if missing or outdated; returns its path"""
+    from utils.text_raster import font_directories
+
+    config_dir = _config_dir()
+    dirs = ([bundled_fonts_dir()] if has_bundled_fonts() else []) + font_directories()
+    system_conf = _system_fontconfig()
+    lines = [
+        '<?xml version="1.0"?>',
+        '<!DOCTYPE fontconfig SYSTEM "fonts.dtd">',
+        '<fontconfig>',
+        # First writable cachedir receives the cache, so ours goes before the included ones
+        f'  <cachedir>{escape(os.path.join(config_dir, "cache").replace(os.sep, "/"))}</cachedir>',
+    ]
+    if system_conf:
+        # System config pulls in its conf.d (aliases/substitutions for "Arial" etc.)
+        lines.append(f'  <include ignore_missing="yes">{escape(system_conf.replace(os.sep, "/"))}</include>')
+    else:
+        lines.append('  <include ignore_missing="yes">conf.d</include>')
+    lines += [f'  <dir>{escape(d.replace(os.sep, "/"))}</dir>' for d in dirs]
+    lines += [
+        '  <config><rescan><int>0</int></rescan></config>',
+        '</fontconfig>',
+    ]
+    content = '\n'.join(lines) + '\n'
+
+    conf_path = os.path.join(config_dir, 'fonts.conf')
+    try:
+        with open(conf_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return conf_path
+    except OSError:
+        pass
+    tmp_path = f"{conf_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, conf_path)
+    return conf_path
+
+
+def subtitle_env():
+    """Environment for ffmpeg processes that burn subtitles (None: keep the default one)"""
+    try:
+        conf_path = ensure_fontconfig()
+    except Exception as e:
+        print(f"Fontconfig setup failed: {e}")
+        return None
+    env = os.environ.copy()
+    env['FONTCONFIG_FILE'] = conf_path
+    env['FONTCONFIG_PATH'] = os.path.dirname(conf_path)
+    return env
+
+
+def fontsdir_option():
+    """`:fontsdir=...` for the subtitles filter when fonts are bundled ("" otherwise)"""
+    if not has_bundled_fonts():
+        return ""
+    escaped = bundled_fonts_dir().replace('\\', '/').replace(':', '\\:')
+    return f":fontsdir='{escaped}'"
+
+
+def _time_subtitle_render(ffmpeg_path, srt_path, env):
+    srt_escaped = srt_path.replace('\\', '/').replace(':', '\\:')
+    cmd = [
+        ffmpeg_path, '-hide_banner', '-v', 'error',
+        '-f', 'lavfi', '-i', 'color=c=black:s=320x240:d=0.2',
+        '-vf', f"subtitles=filename='{srt_escaped}'{fontsdir_option()}",
+        '-f', 'null', '-'
+    ]
+    start = time.perf_counter()
+    result = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=180, env=env,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='ignore')[-300:])
+    return time.perf_counter() - start
+
+
+def warm_up_subtitle_fonts(ffmpeg_path=None, log_callback=None):
+    """
+    Build the shared fontconfig cache once per app run (later calls return immediately;
+    a failed attempt is retried by the next call, e.g. at batch start)
+
+    The first build also times a subtitle render with ffmpeg's default fontconfig
+    setup, so the log shows the per-job start-up cost before and after.
+    """
+    global _warmed
+
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+        else:
+            print(msg)
+
+    with _warm_lock:
+        if _warmed:
+            return timings
+        try:
+            ffmpeg_path = ffmpeg_path or _get_ffmpeg_path()
+            config_dir = _config_dir()
+            srt_path = os.path.join(config_dir, 'warmup.srt')
+            if not os.path.exists(srt_path):
+                with open(srt_path, 'w', encoding='utf-8') as f:
+                    f.write("1\n00:00:00,000 --> 00:00:00,200\nAa Ăâ Đê\n")
+
+            first_build = not os.listdir(os.path.join(config_dir, 'cache'))
+            env = subtitle_env()
+            if first_build:
+                timings['default'] = _time_subtitle_render(ffmpeg_path, srt_path, None)
+                timings['first_build'] = _time_subtitle_render(ffmpeg_path, srt_path, env)
+            timings['warm'] = _time_subtitle_render(ffmpeg_path, srt_path, env)
+            _warmed = True
+
+            if first_build:
+                log(f"🔤 Font cache phụ đề: trước {timings['default']:.2f}s/job -> sau {timings['warm']:.2f}s/job "
+                    f"(build 1 lần {timings['first_build']:.2f}s)")
+            else:
+                log(f"🔤 Font cache phụ đề sẵn sàng ({timings['warm']:.2f}s/job)")
+        except Exception as e:
+            log(f"⚠️ Font cache warm-up failed: {e}")
+        return timings
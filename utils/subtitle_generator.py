@@ -2,10 +2,25 @@
 
 import os
 import sys
+import time
 import threading
 
 
-def generate_subtitles_with_whisper(audio_path, language='en', model_size='small', log_callback=None):
+# faster-whisper models stay loaded between files (load = several seconds)
+_FW_MODEL_CACHE = {}
+_FW_MODEL_LOCK = threading.Lock()
+
+
+def get_whisper_backend():
+    """Return the Whisper backend that transcribe_with_whisper() will use"""
+    try:
+        import faster_whisper  # noqa: F401
+        return 'faster-whisper'
+    except ImportError:
+        return 'openai-whisper'
+
+
+def generate_subtitles_with_whisper(audio_path, language='en', model_size='small', log_callback=None, profile=None):
     """
     Generate subtitles using Whisper AI
     
@@ -14,103 +29,109 @@ def generate_subtitles_with_whisper(audio_path, language='en', model_size='small
         language: Language code ('en', 'vi', etc.)
         model_size: Whisper model size ('tiny', 'small', 'medium', 'large')
         log_callback: Optional callback function for logging
+        profile: Inference profile ('draft', 'balanced', 'accurate')
         
     Returns:
-        str: Path to generated SRT file, or None if failed
+        SubtitleTrack: Timed cues (empty if no speech), or None if failed
+    """
+    from .subtitle_model import SubtitleTrack
+    segments, _info = transcribe_with_whisper(audio_path, language, model_size, log_callback, profile=profile)
+    return SubtitleTrack.from_segments(segments) if segments is not None else None
+
+
+def _get_faster_whisper_model(model_size, device, compute_type, log):
+    """Load (or reuse) a faster-whisper model"""
+    from faster_whisper import WhisperModel
+
+    cache_key = (model_size, device, compute_type)
+    with _FW_MODEL_LOCK:
+        model = _FW_MODEL_CACHE.get(cache_key)
+        if model is None:
+            log(f"   🚀 Initializing Faster-Whisper (CTranslate2) '{model_size}' on {device.upper()} [{compute_type}]...")
+            # cache_dir=None uses default huggingface cache
+            model = WhisperModel(model_size, device=device, compute_type=compute_type)
+            _FW_MODEL_CACHE[cache_key] = model
+        else:
+            log(f"   ⚡ Using cached Faster-Whisper model ({model_size}, {compute_type})...")
+    return model
+
+
+def transcribe_with_whisper(audio_path, language='en', model_size=None, log_callback=None, profile=None):
+    """
+    Transcribe audio with Whisper AI (faster-whisper first, OpenAI Whisper fallback)
+    
+    Args:
+        audio_path: Path to audio file
+        language: Language code ('en', 'vi', etc.)
+        model_size: Whisper model size (None = the profile's model)
+        log_callback: Optional callback function for logging
+        profile: Inference profile ('draft', 'balanced', 'accurate'), see utils/asr_profiles.py
+        
+    Returns:
+        tuple: (segments, info) - segments is a list of
+               {'start', 'end', 'text', 'words': [{'start', 'end', 'word'}]} dicts,
+               info is {'backend', 'model_size', 'profile', 'language'}. (None, None) on error.
     """
     def log(msg):
         if log_callback:
             log_callback(msg)
     
+    from .asr_profiles import get_asr_profile, get_compute_type
+    profile_name, prof = get_asr_profile(profile)
+    model_size = model_size or prof['model_size']
+    
     acquired_semaphore = False
     try:
         # Limit concurrent Whisper instances
-        if not hasattr(generate_subtitles_with_whisper, "semaphore"):
-            generate_subtitles_with_whisper.semaphore = threading.Semaphore(1)
+        if not hasattr(transcribe_with_whisper, "semaphore"):
+            transcribe_with_whisper.semaphore = threading.Semaphore(1)
         
-        generate_subtitles_with_whisper.semaphore.acquire()
+        transcribe_with_whisper.semaphore.acquire()
         acquired_semaphore = True
 
         # --- ATTEMPT FASTER-WHISPER (NVIDIA OPTIMIZED) ---
         try:
-            from faster_whisper import WhisperModel
+            import faster_whisper  # noqa: F401 - ImportError triggers the fallback below
             import torch
             
             # Check CUDA
             device = "cuda" if torch.cuda.is_available() else "cpu"
-            compute_type = "float16" if device == "cuda" else "int8"
-            
-            log(f"   🚀 Initializing Faster-Whisper (CTranslate2) on {device.upper()} [{compute_type}]...")
+            compute_type = get_compute_type(prof, device)
             
             # Load Model (CTranslate2 is much faster on GPU)
-            # cache_dir=None uses default huggingface cache
-            model = WhisperModel(model_size, device=device, compute_type=compute_type)
+            model = _get_faster_whisper_model(model_size, device, compute_type, log)
             
-            log(f"   🎤 Transcribing audio (Faster-Whisper)...")
+            log(f"   🎤 Transcribing audio (Faster-Whisper, profile '{profile_name}')...")
             
             segments_gen, info = model.transcribe(
                 audio_path, 
-                beam_size=5, 
+                beam_size=prof['beam_size'],
+                best_of=prof['best_of'],
                 language=language if language and language != 'auto' else None,
-                word_timestamps=True
+                word_timestamps=prof['word_timestamps'],
+                vad_filter=prof['vad_filter'],
+                condition_on_previous_text=prof['condition_on_previous_text']
             )
             
-            # Collect segments (generator to list)
+            # Collect segments (generator to list), keeping word timings for the cache
             all_segments = []
-            total_words = 0
-            
             for seg in segments_gen:
                 text = seg.text.strip()
                 if not text: continue
                 
-                # Faster-Whisper segment format is slightly different but compatible for basic usage
-                # seg.words is available if word_timestamps=True
-                
+                words = []
                 if seg.words:
-                    total_words += len(seg.words)
-                    # Use existing logic for word-level chunks if needed
-                    # For now, let's keep it simple or map to the same logic
-                    # Mapping Faster-Whisper 'Word' object to dict for consistency with below logic?
-                    # Actually, let's just use the segment directly for simplicity in this replacement,
-                    # OR adapt the chunking logic if strictly needed.
-                    # The user wants SPEED. Segment level is usually fine.
-                    # But if we want word-level precision for karaoke styles, we need words.
-                    
-                    # Let's just output segment for now to ensure robustness
-                    all_segments.append((seg.start, seg.end, text))
-                    log(f"   📝 [{seg.start:.1f}s]: {text[:30]}...")
-                else:
-                    all_segments.append((seg.start, seg.end, text))
-                    log(f"   📝 [{seg.start:.1f}s]: {text[:30]}...")
+                    words = [{'start': w.start, 'end': w.end, 'word': w.word} for w in seg.words]
+                all_segments.append({'start': seg.start, 'end': seg.end, 'text': text, 'words': words})
+                log(f"   📝 [{seg.start:.1f}s]: {text[:30]}...")
             
-            # Generate SRT
             if all_segments:
-                thread_id = threading.get_ident()
-                srt_dir = os.path.join(os.getcwd(), "srt_files")
-                os.makedirs(srt_dir, exist_ok=True)
-                srt_path = os.path.join(srt_dir, f"temp_subs_{thread_id}.srt")
-                
-                with open(srt_path, 'w', encoding='utf-8') as f:
-                    for idx, (start, end, text) in enumerate(all_segments, 1):
-                        h = int(start // 3600)
-                        m = int((start % 3600) // 60)
-                        s = int(start % 60)
-                        ms = int((start % 1) * 1000)
-                        h2 = int(end // 3600)
-                        m2 = int((end % 3600) // 60)
-                        s2 = int(end % 60)
-                        ms2 = int((end % 1) * 1000)
-                        f.write(f"{idx}\n")
-                        f.write(f"{h:02d}:{m:02d}:{s:02d},{ms:03d} --> {h2:02d}:{m2:02d}:{s2:02d},{ms2:03d}\n")
-                        f.write(f"{text}\n\n")
-                
-                log(f"   ✅ SRT Created (Faster-Whisper): {len(all_segments)} segments")
+                log(f"   ✅ Transcribed (Faster-Whisper): {len(all_segments)} segments")
                 log(f"   🎯 Detected Language: {info.language} (Probability: {info.language_probability:.2f})")
-                return srt_path
-            
             else:
                 log("   ⚠️ No segments generated.")
-                return None
+            return all_segments, {'backend': 'faster-whisper', 'model_size': model_size,
+                                  'profile': profile_name, 'language': info.language}
 
         except ImportError:
             log("   ⚠️ 'faster-whisper' library not found. Falling back to standard OpenAI Whisper...")
@@ -182,7 +203,11 @@ def generate_subtitles_with_whisper(audio_path, language='en', model_size='small
             if sys.stdout is None: sys.stdout = open(os.devnull, 'w')
             
             try:
-                transcribe_params = {'verbose': False, 'word_timestamps': True}
+                transcribe_params = {'verbose': False, 'word_timestamps': prof['word_timestamps'],
+                                     'condition_on_previous_text': prof['condition_on_previous_text']}
+                if prof['beam_size'] > 1:
+                    transcribe_params['beam_size'] = prof['beam_size']
+                    transcribe_params['best_of'] = prof['best_of']
                 if language: transcribe_params['language'] = language
                 try:
                     result = model.transcribe(audio_path, **transcribe_params)
@@ -194,96 +219,347 @@ def generate_subtitles_with_whisper(audio_path, language='en', model_size='small
             
             # Collect Segments (Standard Logic)
             all_segments = []
-            total_words = 0
             for seg in result.get('segments', []):
                 text = seg.get('text', '').strip()
                 if not text: continue
-                # Simple segment logic for fallback
-                all_segments.append((seg.get('start', 0), seg.get('end', 0), text))
+                words = [
+                    {'start': w.get('start', 0), 'end': w.get('end', 0), 'word': w.get('word', '')}
+                    for w in seg.get('words', []) or []
+                ]
+                all_segments.append({'start': seg.get('start', 0), 'end': seg.get('end', 0), 'text': text, 'words': words})
                 log(f"   📝 [{seg.get('start', 0):.1f}s]: {text[:30]}...")
 
-            # Generate SRT
             if all_segments:
-                thread_id = threading.get_ident()
-                srt_dir = os.path.join(os.getcwd(), "srt_files")
-                os.makedirs(srt_dir, exist_ok=True)
-                srt_path = os.path.join(srt_dir, f"temp_subs_{thread_id}.srt")
-                
-                with open(srt_path, 'w', encoding='utf-8') as f:
-                    for idx, (start, end, text) in enumerate(all_segments, 1):
-                        h = int(start // 3600)
-                        m = int((start % 3600) // 60)
-                        s = int(start % 60)
-                        ms = int((start % 1) * 1000)
-                        h2 = int(end // 3600)
-                        m2 = int((end % 3600) // 60)
-                        s2 = int(end % 60)
-                        ms2 = int((end % 1) * 1000)
-                        f.write(f"{idx}\n")
-                        f.write(f"{h:02d}:{m:02d}:{s:02d},{ms:03d} --> {h2:02d}:{m2:02d}:{s2:02d},{ms2:03d}\n")
-                        f.write(f"{text}\n\n")
-                
-                log(f"   ✅ SRT Created (Standard): {len(all_segments)} segments")
-                return srt_path
-            else:
-                return None
+                log(f"   ✅ Transcribed (Standard): {len(all_segments)} segments")
+            return all_segments, {'backend': 'openai-whisper', 'model_size': model_size,
+                                  'profile': profile_name, 'language': result.get('language', language)}
 
     except Exception as e:
         log(f"   ❌ Whisper error: {e}")
         import traceback
         log(f"   Traceback: {traceback.format_exc()}")
-        return None
+        return None, None
     finally:
         if 'acquired_semaphore' in locals() and acquired_semaphore:
-            generate_subtitles_with_whisper.semaphore.release()
+            transcribe_with_whisper.semaphore.release()
+
+
+def _split_long_clip(samples, sample_rate=16000, max_sec=30.0, min_sec=20.0):
+    """Split a clip into <=30s pieces (one Whisper window each), cutting at the quietest 100ms"""
+    import numpy as np
+
+    pieces = []
+    max_len = int(max_sec * sample_rate)
+    min_len = int(min_sec * sample_rate)
+    hop = sample_rate // 10
+    pos = 0
+    while len(samples) - pos > max_len:
+        search = samples[pos + min_len:pos + max_len]
+        n = len(search) // hop
+        energy = np.abs(search[:n * hop].reshape(n, hop)).mean(axis=1)
+        cut = pos + min_len + int(np.argmin(energy)) * hop + hop // 2
+        pieces.append((pos, cut))
+        pos = cut
+    pieces.append((pos, len(samples)))
+    return pieces
 
 
-def generate_subtitles_with_google(audio_path, language='en-US', log_callback=None):
+def transcribe_batch_with_whisper(items, language=None, profile=None, batch_size=8, log_callback=None):
+    """
+    Transcribe many short clips in one batched faster-whisper run
+
+    Clips are concatenated with short silence gaps, cut into <=30s windows
+    that never cross a clip boundary, decoded as padded batches and the
+    segments are split back out per clip (times relative to each clip).
+
+    Args:
+        items: List of (key, pcm) - pcm is mono s16le @16kHz (decode_audio_pcm)
+        language: Language code, or None to detect once for the whole batch
+        profile: Inference profile ('draft', 'balanced', 'accurate')
+        batch_size: Windows decoded together on the GPU/CPU
+        log_callback: Optional callback function for logging
+
+    Returns:
+        dict: {key: segments} or None if batched inference is unavailable
+              (old faster-whisper / OpenAI Whisper) - caller falls back to per-file
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    try:
+        import numpy as np
+        import torch
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        log("   ⚠️ Batched ASR needs faster-whisper >= 1.1 - using per-file transcription")
+        return None
+
+    from .asr_profiles import get_asr_profile, get_compute_type
+
+    if not items:
+        return {}
+
+    sample_rate = 16000
+    gap = np.zeros(sample_rate // 2, dtype=np.float32)
+    profile_name, prof = get_asr_profile(profile)
+
+    # 1. Build one long buffer + window table (in samples)
+    parts = []
+    clip_spans = []       # (key, start_sample, end_sample)
+    clip_timestamps = []  # Whisper windows
+    pos = 0
+    for key, pcm in items:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        for s, e in _split_long_clip(samples, sample_rate):
+            clip_timestamps.append({'start': pos + s, 'end': pos + e})
+        clip_spans.append((key, pos, pos + len(samples)))
+        parts.append(samples)
+        parts.append(gap)
+        pos += len(samples) + len(gap)
+    audio = np.concatenate(parts)
+
+    acquired = False
+    try:
+        # Share the single-instance limit with per-file transcription
+        if not hasattr(transcribe_with_whisper, "semaphore"):
+            transcribe_with_whisper.semaphore = threading.Semaphore(1)
+        transcribe_with_whisper.semaphore.acquire()
+        acquired = True
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = _get_faster_whisper_model(prof['model_size'], device, get_compute_type(prof, device), log)
+        pipeline = BatchedInferencePipeline(model=model)
+
+        # 2. Language: fixed channel language = no detection at all,
+        #    auto = detect ONCE for the whole batch instead of once per file
+        if not language or language == 'auto':
+            first_key, first_start, first_end = clip_spans[0]
+            language, prob, _ = model.detect_language(audio[first_start:min(first_end, first_start + 30 * sample_rate)])
+            log(f"   🎯 Batch language: {language} (Probability: {prob:.2f}) - detected once for {len(items)} clips")
+
+        t0 = time.time()
+        log(f"   🎤 Batch transcribing {len(items)} clips ({len(audio) / sample_rate:.0f}s audio, "
+            f"{len(clip_timestamps)} windows, batch={batch_size}, profile '{profile_name}')...")
+
+        segments_gen, _info = pipeline.transcribe(
+            audio,
+            language=language,
+            beam_size=prof['beam_size'],
+            word_timestamps=prof['word_timestamps'],
+            vad_filter=False,
+            clip_timestamps=clip_timestamps,
+            batch_size=batch_size
+        )
+
+        # 3. Split segments back per clip (times relative to the clip)
+        results = {key: [] for key, _, _ in clip_spans}
+        starts = [start for _, start, _ in clip_spans]
+        import bisect
+        for seg in segments_gen:
+            text = seg.text.strip()
+            if not text:
+                continue
+            mid = (seg.start + seg.end) / 2 * sample_rate
+            idx = max(0, bisect.bisect_right(starts, mid) - 1)
+            key, clip_start, clip_end = clip_spans[idx]
+            offset = clip_start / sample_rate
+            clip_len = (clip_end - clip_start) / sample_rate
+            words = [
+                {'start': max(0.0, w.start - offset), 'end': min(clip_len, w.end - offset), 'word': w.word}
+                for w in (seg.words or [])
+            ]
+            results[key].append({
+                'start': max(0.0, seg.start - offset),
+                'end': min(clip_len, seg.end - offset),
+                'text': text,
+                'words': words,
+            })
+
+        elapsed = time.time() - t0
+        log(f"   ✅ Batch ASR done: {len(items)} clips in {elapsed:.1f}s "
+            f"(RTF {elapsed / max(1e-6, len(audio) / sample_rate):.3f})")
+        return results
+
+    except Exception as e:
+        log(f"   ❌ Batch ASR error: {e} - falling back to per-file transcription")
+        return None
+    finally:
+        if acquired:
+            transcribe_with_whisper.semaphore.release()
+
+
+# Whisper language code -> Google locale
+GOOGLE_LANGUAGE_CODES = {
+    'vi': 'vi-VN',
+    'en': 'en-US',
+    'ja': 'ja-JP',
+    'ko': 'ko-KR',
+    'zh': 'zh-CN',
+}
+
+
+class GoogleSpeechRecognizer:
+    """
+    Recognizer backend for generate_subtitles_with_google()
+
+    Any object with the same recognize() method can be passed instead
+    (e.g. a local stand-in for tests without network access).
+    """
+
+    def __init__(self):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, pcm, sample_rate, language):
+        """
+        Recognize one chunk of mono s16le PCM
+
+        Returns:
+            str: Recognized text ('' if nothing was understood)
+
+        Raises:
+            Exception: On network/API errors (the caller retries)
+        """
+        audio_data = self._sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self._recognizer.recognize_google(audio_data, language=language) or ''
+        except self._sr.UnknownValueError:
+            return ''
+
+
+def iter_silence_chunks(audio_path, target_sec=15.0, max_sec=25.0, min_silence_sec=0.3,
+                        silence_dbfs=-40.0):
+    """
+    Stream a mono 16-bit WAV file in chunks cut at pauses
+
+    A chunk is closed at the first pause of min_silence_sec after target_sec,
+    or at the quietest 30ms frame if no pause appears before max_sec.
+    Only one chunk (plus one read block) is kept in memory.
+
+    Yields:
+        tuple: (start_sec, end_sec, pcm_bytes, sample_rate)
+    """
+    import wave
+    import numpy as np
+
+    with wave.open(audio_path, 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError("Expected mono 16-bit WAV (use extract_audio_from_video)")
+        sample_rate = wf.getframerate()
+        frame_len = int(sample_rate * 0.03)
+        min_silence_frames = max(1, int(min_silence_sec / 0.03))
+        target_frames = int(target_sec / 0.03)
+        max_frames = int(max_sec / 0.03)
+        threshold = 32768.0 * (10 ** (silence_dbfs / 20.0))
+
+        buf = np.zeros(0, dtype=np.int16)
+        chunk_start = 0  # in samples
+        eof = False
+
+        while not eof or len(buf):
+            # Read ~1s blocks until the buffer can hold a full chunk
+            while not eof and len(buf) < max_frames * frame_len:
+                block = wf.readframes(sample_rate)
+                if not block:
+                    eof = True
+                    break
+                buf = np.concatenate([buf, np.frombuffer(block, dtype=np.int16)])
+
+            n_frames = len(buf) // frame_len
+            if eof and n_frames <= target_frames:
+                cut = len(buf)
+            else:
+                frames = buf[:n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+                rms = np.sqrt(np.mean(frames * frames, axis=1))
+                silent = rms < threshold
+
+                cut_frame = None
+                run = 0
+                for i in range(target_frames, min(n_frames, max_frames)):
+                    run = run + 1 if silent[i] else 0
+                    if run >= min_silence_frames:
+                        cut_frame = i - run // 2  # middle of the pause
+                        break
+                if cut_frame is not None:
+                    cut = cut_frame * frame_len
+                elif eof and n_frames <= max_frames:
+                    cut = len(buf)  # No pause in the remainder: it fits in one chunk
+                else:
+                    lo, hi = target_frames, min(n_frames, max_frames)
+                    cut = (lo + int(np.argmin(rms[lo:hi])) if hi > lo else n_frames) * frame_len
+
+            chunk = buf[:cut]
+            buf = buf[cut:]
+            if len(chunk):
+                yield (chunk_start / sample_rate, (chunk_start + len(chunk)) / sample_rate,
+                       chunk.tobytes(), sample_rate)
+            chunk_start += len(chunk)
+
+
+def generate_subtitles_with_google(audio_path, language='en-US', log_callback=None,
+                                   recognizer=None, max_workers=4, max_retries=3):
     """
     Generate subtitles using Google Speech Recognition
     
+    The audio is streamed in pause-aligned chunks which are recognized
+    concurrently (bounded pool, retry with backoff). Each chunk becomes one
+    timed segment.
+    
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to audio file (mono 16-bit WAV)
         language: Language code ('en-US', 'vi-VN', etc.)
         log_callback: Optional callback function for logging
+        recognizer: Object with recognize(pcm, sample_rate, language) -> str
+                    (default: GoogleSpeechRecognizer)
+        max_workers: Concurrent recognition requests
+        max_retries: Attempts per chunk before it is skipped
         
     Returns:
-        str: Path to generated SRT file, or None if failed
+        list: {'start', 'end', 'text', 'words'} segments (same shape as Whisper's), or None if failed
     """
+    import concurrent.futures
+    import random
+
     def log(msg):
         if log_callback:
             log_callback(msg)
     
+    def recognize_chunk(start, end, pcm, sample_rate):
+        for attempt in range(max_retries):
+            try:
+                return start, end, recognizer.recognize(pcm, sample_rate, language).strip()
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    log(f"   ⚠️ Chunk [{start:.1f}s] failed after {max_retries} attempts: {e}")
+                    return start, end, ''
+                time.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.25))
+    
     try:
-        import speech_recognition as sr
+        if recognizer is None:
+            recognizer = GoogleSpeechRecognizer()
         
-        recognizer = sr.Recognizer()
+        log(f"   🎤 Recognizing speech with Google (chunked, {max_workers} workers)...")
         
-        log(f"   🎤 Recognizing speech with Google...")
+        segments = []
+        pending = set()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk in iter_silence_chunks(audio_path):
+                pending.add(executor.submit(recognize_chunk, *chunk))
+                # Bound in-flight chunks so long files don't pile up in memory
+                if len(pending) >= max_workers * 2:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    segments.extend(f.result() for f in done)
+            segments.extend(f.result() for f in pending)
         
-        with sr.AudioFile(audio_path) as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio_data = recognizer.record(source)
-        
-        text = recognizer.recognize_google(audio_data, language=language)
-        
-        if text:
-            thread_id = threading.get_ident()
-            srt_dir = os.path.join(os.getcwd(), "srt_files")
-            os.makedirs(srt_dir, exist_ok=True)
-            
-            srt_path = os.path.join(srt_dir, f"temp_subs_{thread_id}.srt")
-            
-            # Simple SRT with full text
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                f.write("1\n")
-                f.write("00:00:00,000 --> 00:00:10,000\n")
-                f.write(f"{text}\n\n")
-            
-            log(f"   ✅ SRT created with Google Speech Recognition")
-            return srt_path
+        segments = [
+            {'start': start, 'end': end, 'text': text, 'words': []}
+            for start, end, text in sorted(segments) if text
+        ]
         
-        return None
+        log(f"   ✅ Google Speech Recognition: {len(segments)} cues")
+        return segments
         
     except Exception as e:
         log(f"   ❌ Google Speech Recognition error: {e}")
@@ -341,3 +617,64 @@ def extract_audio_from_video(video_path, output_audio_path, log_callback=None):
     
     log(f"   ✅ Audio extracted")
     return True
+
+
+def decode_audio_pcm(video_path, start_time=0, duration=None, sample_rate=16000):
+    """
+    Decode a window of the audio track straight into memory (no temp file)
+
+    Args:
+        video_path: Path to video file
+        start_time: Window start in seconds
+        duration: Window length in seconds (None/0 = until end of file)
+        sample_rate: Output sample rate (16kHz matches Whisper)
+
+    Returns:
+        bytes: Raw mono PCM s16le samples (empty bytes if decode failed)
+    """
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        ffmpeg_path = get_ffmpeg_exe()
+    except:
+        ffmpeg_path = 'ffmpeg'
+
+    import subprocess
+
+    cmd = [ffmpeg_path, '-v', 'error', '-nostdin']
+    if start_time and start_time > 0:
+        cmd.extend(['-ss', str(start_time)])
+    cmd.extend(['-i', video_path])
+    if duration and duration > 0:
+        cmd.extend(['-t', str(duration)])
+    cmd.extend([
+        '-vn', '-sn', '-dn',
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ar', str(sample_rate),
+        '-ac', '1',
+        'pipe:1'
+    ])
+
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        if result.returncode != 0:
+            return b''
+        return result.stdout
+    except Exception:
+        return b''
+
+
+def write_wav_pcm(pcm, output_audio_path, sample_rate=16000):
+    """Write raw mono PCM s16le bytes (from decode_audio_pcm) to a WAV file"""
+    import wave
+    with wave.open(output_audio_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return output_audio_path
@@ -0,0 +1,237 @@
+"""Subtitle model - one transcript object shared by the export and the preview
+
+Transcription (Whisper per-file/batch, Google fallback, transcript cache) produces
+segment dicts. SubtitleTrack turns them into immutable timed cues (word timings kept)
+and serializes them once to an ASS file with the style already in the [V4+ Styles]
+section - no temp SRT file and no force_style parsing in the subtitles filter:
+  - the ASS file is named by content (cues + style) and lives next to the transcripts
+    in cache/transcripts, so re-renders reuse it and concurrent jobs never share a
+    mutable file
+  - the preview looks the current cue up with cue_at() and draws it with render_cue()
+"""
+
+import os
+import bisect
+import hashlib
+import threading
+import collections
+
+from config.settings import TRANSCRIPT_CACHE_DIR
+
+
+# Script resolution ffmpeg gives SRT input: FontSize/Outline/MarginV keep the meaning they had with force_style
+PLAY_RES_X = 384
+PLAY_RES_Y = 288
+MARGIN_H = 10
+# ASS font size is the line height (ascent + descent); PIL sizes the em box (Arial: ~1.15 em per line)
+ASS_LINE_HEIGHT_EM = 1.15
+CUE_CACHE_SIZE = 16
+
+SubtitleWord = collections.namedtuple('SubtitleWord', 'start end word')
+SubtitleCue = collections.namedtuple('SubtitleCue', 'start end text words')
+
+# Style of the burned-in subtitles (colours are ASS BBGGRR hex, like the old force_style values)
+SubtitleStyle = collections.namedtuple(
+    'SubtitleStyle', 'font_name font_size color outline outline_color bold margin_v'
+)
+
+_lock = threading.Lock()
+_cues = collections.OrderedDict()   # (text, style, canvas) -> (RGBA image, x, y)
+
+
+def subtitle_style_from_settings(settings):
+    """SubtitleStyle from the job settings (same defaults as the old force_style)"""
+    return SubtitleStyle(
+        font_name=settings.get('subtitle_font', 'Arial'),
+        font_size=int(settings.get('subtitle_font_size', 14)),
+        color=str(settings.get('subtitle_color', 'FFFFFF')).upper(),
+        outline=int(settings.get('subtitle_outline', 3)),
+        outline_color=str(settings.get('subtitle_outline_color', '000000')).upper(),
+        bold=bool(settings.get('subtitle_bold', True)),
+        margin_v=int(settings.get('subtitle_margin_v', 10))
+    )
+
+
+def _ass_time(t):
+    cs = int(round(max(0.0, t) * 100))
+    return f"{cs // 360000}:{(cs // 6000) % 60:02d}:{(cs // 100) % 60:02d}.{cs % 100:02d}"
+
+
+def _ass_text(text):
+    # Backslash sequences (\N, \h...) and {override} blocks must not come from the transcript
+    text = text.replace('\\', '\\\u2060').replace('{', '\\{').replace('}', '\\}')
+    return '\\N'.join(line.strip() for line in text.splitlines() if line.strip())
+
+
+class SubtitleTrack:
+    """Timed cues of one transcript (immutable; times are relative to the trimmed window)"""
+
+    def __init__(self, cues=()):
+        self.cues = tuple(cues)
+        self._starts = [cue.start for cue in self.cues]
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Track from {'start', 'end', 'text', 'words'} dicts (transcriber / transcript cache output)"""
+        cues = []
+        for seg in segments or []:
+            text = (seg.get('text') or '').strip()
+            if not text:
+                continue
+            start = max(0.0, float(seg.get('start') or 0))
+            end = max(start, float(seg.get('end') or start))
+            words = tuple(
+                SubtitleWord(float(w.get('start') or 0), float(w.get('end') or 0), w.get('word', ''))
+                for w in seg.get('words') or []
+            )
+            cues.append(SubtitleCue(start, end, text, words))
+        cues.sort(key=lambda cue: cue.start)
+        return cls(cues)
+
+    def to_segments(self):
+        """Segment dicts for the transcript cache (inverse of from_segments)"""
+        return [
+            {'start': cue.start, 'end': cue.end, 'text': cue.text,
+             'words': [w._asdict() for w in cue.words]}
+            for cue in self.cues
+        ]
+
+    def __len__(self):
+        return len(self.cues)
+
+    def __eq__(self, other):
+        return isinstance(other, SubtitleTrack) and self.cues == other.cues
+
+    def __hash__(self):
+        return hash(self.cues)
+
+    def cue_at(self, t):
+        """Index of the cue shown at time t (the latest started one), or None"""
+        i = bisect.bisect_right(self._starts, t) - 1
+        if i >= 0 and t < self.cues[i].end:
+            return i
+        return None
+
+    # === ASS EXPORT ===
+    def to_ass(self, style):
+        """ASS script of the track with style as its Default style"""
+        bold = -1 if style.bold else 0
+        lines = [
+            '[Script Info]',
+            'ScriptType: v4.00+',
+            f'PlayResX: {PLAY_RES_X}',
+            f'PlayResY: {PLAY_RES_Y}',
+            'ScaledBorderAndShadow: yes',
+            'WrapStyle: 0',
+            'YCbCr Matrix: None',
+            '',
+            '[V4+ Styles]',
+            'Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, '
+            'Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, '
+            'Shadow, Alignment, MarginL, MarginR, MarginV, Encoding',
+            f'Style: Default,{style.font_name},{style.font_size},&H00{style.color},&H00{style.color},'
+            f'&H00{style.outline_color},&H00000000,{bold},0,0,0,100,100,0,0,1,{style.outline},0,2,'
+            f'{MARGIN_H},{MARGIN_H},{style.margin_v},1',
+            '',
+            '[Events]',
+            'Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text',
+        ]
+        for cue in self.cues:
+            lines.append(f'Dialogue: 0,{_ass_time(cue.start)},{_ass_time(cue.end)},Default,,0,0,0,,{_ass_text(cue.text)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_ass(self, style, log_callback=None):
+        """
+        ASS file of the track for the subtitles filter (cached by content in cache/transcripts)
+
+        Returns:
+            str: Path to the .ass file, or None if the track is empty or writing failed
+        """
+        def log(msg):
+            if log_callback:
+                log_callback(msg)
+
+        if not self.cues:
+            return None
+        try:
+            content = self.to_ass(style)
+            key = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            cache_dir = os.path.join(os.getcwd(), TRANSCRIPT_CACHE_DIR)
+            os.makedirs(cache_dir, exist_ok=True)
+            out_path = os.path.join(cache_dir, f"subs_{key[:20]}.ass")
+            if not os.path.exists(out_path):
+                tmp_path = f"{out_path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(tmp_path, out_path)
+            return out_path
+        except Exception as e:
+            log(f"   ⚠️ Could not write subtitle file: {e}")
+            return None
+
+
+# === PREVIEW RASTER ===
+
+def _rgb(ass_hex, alpha=255):
+    """RGBA tuple for an ASS BBGGRR hex colour"""
+    try:
+        value = ass_hex[-6:].rjust(6, '0')
+        return (int(value[4:6], 16), int(value[2:4], 16), int(value[0:2], 16), alpha)
+    except ValueError:
+        return (255, 255, 255, alpha)
+
+
+def _wrap(text, font, max_width):
+    """Greedy word wrap (libass WrapStyle 0 also breaks at spaces)"""
+    lines = []
+    for paragraph in text.splitlines() or ['']:
+        line = ''
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def render_cue(text, style, canvas_w, canvas_h):
+    """
+    Cue text drawn like libass would for a canvas, cropped to its bounding box (memoized)
+
+    Returns:
+        tuple: (PIL RGBA image, x, y) - bottom-centred with the style's vertical margin
+    """
+    key = (text, style, canvas_w, canvas_h)
+    with _lock:
+        cached = _cues.get(key)
+        if cached is not None:
+            _cues.move_to_end(key)
+            return cached
+
+    from PIL import Image, ImageDraw
+    from utils.text_raster import get_font
+
+    scale_x, scale_y = canvas_w / PLAY_RES_X, canvas_h / PLAY_RES_Y
+    font = get_font(style.font_name, max(1, int(style.font_size * scale_y / ASS_LINE_HEIGHT_EM)))
+    stroke = max(0, int(round(style.outline * scale_y)))
+    text = _wrap(text, font, canvas_w - 2 * MARGIN_H * scale_x)
+
+    draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align='center', stroke_width=stroke)
+    layer = Image.new('RGBA', (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(layer).multiline_text(
+        (-left, -top), text, font=font, align='center',
+        fill=_rgb(style.color), stroke_width=stroke, stroke_fill=_rgb(style.outline_color)
+    )
+    x = (canvas_w - layer.width) // 2
+    y = canvas_h - int(style.margin_v * scale_y) - layer.height
+
+    result = (layer, x, y)
+    with _lock:
+        _cues[key] = result
+        while len(_cues) > CUE_CACHE_SIZE:
+            _cues.popitem(last=False)
+    return result
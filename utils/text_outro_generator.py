@@ -4,6 +4,10 @@ Text Outro Generator - Create customizable text outro videos
 
 import subprocess
 import os
+import re
+import json
+import hashlib
+import threading
 from pathlib import Path
 
 
@@ -83,6 +87,12 @@ def create_text_outro_video(
             y_pos = "(h-text_h)/2"
         
         # 3. Text with optional animation
+        from utils.text_raster import resolve_font
+        font_path = resolve_font(font_family)
+        font_opt = ""
+        if font_path:
+            font_opt = "fontfile='" + font_path.replace('\\', '/').replace(':', '\\:') + "':"
+
         # Escape special characters in text
         safe_text = text.replace("'", "'\\\\\\''").replace(":", "\\:")
         
@@ -90,7 +100,7 @@ def create_text_outro_video(
             # Fade in first 1s, fade out last 1s
             fade_duration = min(1.0, duration / 3)
             text_filter = f"drawtext=text='{safe_text}':" \
-                         f"fontfile=/Windows/Fonts/arial.ttf:" \
+                         f"{font_opt}" \
                          f"fontsize={font_size}:" \
                          f"fontcolor={font_color}:" \
                          f"x={x_pos}:y={y_pos}:" \
@@ -99,7 +109,7 @@ def create_text_outro_video(
         elif animation == "slide_up":
             # Slide up from bottom
             text_filter = f"drawtext=text='{safe_text}':" \
-                         f"fontfile=/Windows/Fonts/arial.ttf:" \
+                         f"{font_opt}" \
                          f"fontsize={font_size}:" \
                          f"fontcolor={font_color}:" \
                          f"x={x_pos}:" \
@@ -108,7 +118,7 @@ def create_text_outro_video(
         elif animation == "slide_down":
             # Slide down from top
             text_filter = f"drawtext=text='{safe_text}':" \
-                         f"fontfile=/Windows/Fonts/arial.ttf:" \
+                         f"{font_opt}" \
                          f"fontsize={font_size}:" \
                          f"fontcolor={font_color}:" \
                          f"x={x_pos}:" \
@@ -116,7 +126,7 @@ def create_text_outro_video(
         
         else:  # no animation
             text_filter = f"drawtext=text='{safe_text}':" \
-                         f"fontfile=/Windows/Fonts/arial.ttf:" \
+                         f"{font_opt}" \
                          f"fontsize={font_size}:" \
                          f"fontcolor={font_color}:" \
                          f"x={x_pos}:y={y_pos}"
@@ -163,6 +173,217 @@ def create_text_outro_video(
         return None
 
 
+# === CACHED OUTRO CLIP (append mode) ===
+# The clip only depends on the text settings and the main output's stream parameters,
+# so it is rendered once per (text settings, encode fingerprint) and reused by every job
+# and later batches. It is encoded to match the main output (codec/profile, size, pixel
+# format, frame rate, timescale, audio layout) so `-c copy` concat stays valid.
+
+OUTRO_CACHE_VERSION = 1
+_OUTRO_LOCK = threading.Lock()
+_outro_building = {}  # clip path -> Event (another job is rendering it)
+
+
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
+def probe_encode_params(video_path):
+    """
+    Stream parameters of an encoded output that concat -c copy has to match
+
+    Returns:
+        dict: vcodec, profile, width, height, pix_fmt, fps, timescale, acodec, sample_rate, channels
+              (audio keys None without audio), or None if probing failed
+    """
+    from utils.media_catalog import get_ffprobe_path
+
+    ffprobe = get_ffprobe_path()
+    try:
+        if ffprobe:
+            result = subprocess.run(
+                [ffprobe, '-v', 'error', '-show_streams', '-of', 'json', video_path],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+            streams = json.loads(result.stdout.decode('utf-8', errors='ignore') or '{}').get('streams', [])
+            video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+            audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+            if not video:
+                return None
+            return {
+                'vcodec': video.get('codec_name'),
+                'profile': (video.get('profile') or '').lower(),
+                'width': int(video['width']),
+                'height': int(video['height']),
+                'pix_fmt': video.get('pix_fmt') or 'yuv420p',
+                'fps': video.get('r_frame_rate') or '30/1',
+                'timescale': int(str(video.get('time_base', '1/15360')).split('/')[-1]),
+                'acodec': audio.get('codec_name') if audio else None,
+                'sample_rate': int(audio.get('sample_rate', 48000)) if audio else None,
+                'channels': int(audio.get('channels', 2)) if audio else None,
+            }
+
+        # No ffprobe: parse `ffmpeg -i` banner
+        result = subprocess.run(
+            [_get_ffmpeg_path(), '-hide_banner', '-i', video_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+        output = result.stderr.decode('utf-8', errors='ignore')
+        video = re.search(r'Video: (\w+)(?: \(([^)]*)\))?.*?, (\w+)(?:\([^)]*\))?, (\d+)x(\d+)', output)
+        if not video:
+            return None
+        fps = re.search(r'(\d+(?:\.\d+)?) fps', output)
+        tbn = re.search(r'(\d+(?:\.\d+)?)k? tbn', output)
+        audio = re.search(r'Audio: (\w+).*?, (\d+) Hz, (mono|stereo|[\d.]+)', output)
+        return {
+            'vcodec': video.group(1),
+            'profile': (video.group(2) or '').lower(),
+            'width': int(video.group(4)),
+            'height': int(video.group(5)),
+            'pix_fmt': video.group(3),
+            'fps': fps.group(1) if fps else '30',
+            'timescale': int(float(tbn.group(1)) * (1000 if 'k tbn' in tbn.group(0) else 1)) if tbn else 15360,
+            'acodec': audio.group(1) if audio else None,
+            'sample_rate': int(audio.group(2)) if audio else None,
+            'channels': ({'mono': 1, 'stereo': 2}.get(audio.group(3)) or int(float(audio.group(3)))) if audio else None,
+        }
+    except Exception as e:
+        print(f"Probe error: {e}")
+        return None
+
+
+def _encoder_args(params):
+    """Video/audio encoder args that reproduce the main output's stream parameters"""
+    args = []
+    if params['vcodec'] == 'hevc':
+        args += ['-c:v', 'libx265', '-tag:v', 'hvc1']
+    else:
+        args += ['-c:v', 'libx264']
+        if params['profile'] in ('baseline', 'main', 'high'):
+            args += ['-profile:v', params['profile']]
+    args += ['-preset', 'fast', '-pix_fmt', params['pix_fmt'], '-r', str(params['fps']),
+             '-video_track_timescale', str(params['timescale'])]
+    if params['acodec']:
+        audio_encoder = {'mp3': 'libmp3lame', 'opus': 'libopus'}.get(params['acodec'], 'aac')
+        args += ['-c:a', audio_encoder, '-ar', str(params['sample_rate']), '-ac', str(params['channels'])]
+    return args
+
+
+def get_cached_text_outro(settings, params, log_callback=None):
+    """
+    Text outro clip matching an output's encode parameters (rendered once, then cached)
+
+    Args:
+        settings: Job settings (outro_text_* keys)
+        params: probe_encode_params() of the main output
+
+    Returns:
+        str: Path of the cached clip, or None if it could not be rendered
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    from config.settings import OUTRO_CACHE_DIR
+    from utils.text_raster import text_style_from_settings, text_layer_png, resolve_font
+
+    try:
+        text = settings.get('outro_text_content', '').strip()
+        duration = float(settings.get('outro_text_duration', 5))
+        animation = settings.get('outro_text_animation', 'fade')
+        style = text_style_from_settings(settings)
+        bg_color = settings.get('outro_text_bg_color', 'black')
+        if bg_color == 'transparent':
+            bg_color = 'black'
+
+        key = hashlib.sha1(repr((
+            OUTRO_CACHE_VERSION, text, tuple(style), bg_color, duration, animation,
+            resolve_font(style.font_name), sorted(params.items())
+        )).encode('utf-8')).hexdigest()
+        cache_dir = os.path.join(os.getcwd(), OUTRO_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        clip_path = os.path.join(cache_dir, f"outro_{key[:16]}.mp4")
+
+        # One renderer per clip: parallel jobs of a batch wait for it
+        with _OUTRO_LOCK:
+            done = _outro_building.get(clip_path)
+            owner = done is None and not os.path.exists(clip_path)
+            if owner:
+                done = threading.Event()
+                _outro_building[clip_path] = done
+        if not owner:
+            if done is not None:
+                done.wait(timeout=300)
+            if os.path.exists(clip_path):
+                log("   ♻️ Text outro: dùng lại clip đã render")
+                return clip_path
+            return None
+
+        try:
+            width, height = params['width'], params['height']
+            layer = text_layer_png(text, style, width, height, log_callback)
+            if not layer:
+                return None
+            png_path, tx, ty = layer
+
+            # Text layer animation (same effects as the drawtext version)
+            fade = min(1.0, duration / 3)
+            text_chain = "format=rgba"
+            y_expr = str(ty)
+            if animation == 'fade':
+                text_chain += (f",fade=t=in:st=0:d={fade}:alpha=1"
+                               f",fade=t=out:st={duration - fade}:d={fade}:alpha=1")
+            elif animation == 'slide_up':
+                y_expr = f"'H-(H-{ty})*min(t/{duration},1)'"
+            elif animation == 'slide_down':
+                y_expr = f"'{ty}*min(t/{duration},1)'"
+
+            cmd = [
+                _get_ffmpeg_path(), '-y', '-hide_banner', '-v', 'error',
+                '-f', 'lavfi', '-i', f"color=c={bg_color}:s={width}x{height}:r={params['fps']}:d={duration}",
+                '-loop', '1', '-t', str(duration), '-i', png_path,
+            ]
+            if params['acodec']:
+                layout = 'mono' if params['channels'] == 1 else 'stereo'
+                cmd += ['-f', 'lavfi', '-t', str(duration), '-i', f"anullsrc=r={params['sample_rate']}:cl={layout}"]
+            cmd += [
+                '-filter_complex', f"[1:v]{text_chain}[txt];[0:v][txt]overlay={tx}:{y_expr}:shortest=1,setsar=1[v]",
+                '-map', '[v]'
+            ]
+            if params['acodec']:
+                cmd += ['-map', '2:a']
+            cmd += _encoder_args(params) + ['-t', str(duration)]
+
+            tmp_path = f"{clip_path}.{threading.get_ident()}.tmp.mp4"
+            result = subprocess.run(
+                cmd + [tmp_path], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+            if result.returncode != 0 or not os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                log(f"   ❌ Text outro render failed: {result.stderr.decode('utf-8', errors='ignore')[-200:]}")
+                return None
+            os.replace(tmp_path, clip_path)
+            log(f"   🎬 Text outro rendered once for this batch ({width}x{height}, {params['vcodec']})")
+            return clip_path
+        finally:
+            with _OUTRO_LOCK:
+                _outro_building.pop(clip_path, None)
+            done.set()
+    except Exception as e:
+        log(f"   ❌ Error creating cached text outro: {e}")
+        return None
+
+
 # Test function
 if __name__ == "__main__":
     # Test creating a text outro
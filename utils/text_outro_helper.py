@@ -7,6 +7,14 @@ import subprocess
 import tempfile
 
 
+def _get_ffmpeg_path():
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        return 'ffmpeg'
+
+
 def add_text_outro_to_video(
     input_video_path,
     output_video_path,
@@ -56,38 +64,42 @@ def add_text_outro_to_video(
 
 
 def add_append_text_outro(input_video_path, output_video_path, settings, text_content, log):
-    """Original logic: Create black video + Concat"""
+    """Create the outro clip (cached per batch, encoded like the main output) + Concat"""
     log("   📝 Creating text outro (Append mode)...")
     
-    from utils.text_outro_generator import create_text_outro_video
+    from utils.text_outro_generator import create_text_outro_video, probe_encode_params, get_cached_text_outro
     
-    # Create text outro video
-    text_outro_path = os.path.join(
-        tempfile.gettempdir(),
-        f"text_outro_{os.path.basename(input_video_path)}"
-    )
+    # Same text settings + same encode parameters -> same clip for every job
+    text_outro_path = None
+    is_cached_clip = False
+    params = probe_encode_params(input_video_path)
+    if params:
+        text_outro_path = get_cached_text_outro(settings, params, log)
+        is_cached_clip = text_outro_path is not None
     
-    # Get video dimensions
-    width = 1080
-    height = 1920
-    
-    result = create_text_outro_video(
-        text=text_content,
-        duration=settings.get('outro_text_duration', 5),
-        output_path=text_outro_path,
-        width=width,
-        height=height,
-        font_size=settings.get('outro_text_font_size', 60),
-        font_color=settings.get('outro_text_font_color', 'white'),
-        bg_color=settings.get('outro_text_bg_color', 'black'),
-        position=settings.get('outro_text_position', 'center'),
-        animation=settings.get('outro_text_animation', 'fade'),
-        log_callback=log
-    )
-    
-    if not result or not os.path.exists(text_outro_path):
-        log("   ❌ Failed to create text outro")
-        return False
+    if not text_outro_path:
+        # Fallback: per-file drawtext clip (old behaviour)
+        text_outro_path = os.path.join(
+            tempfile.gettempdir(),
+            f"text_outro_{os.path.basename(input_video_path)}"
+        )
+        result = create_text_outro_video(
+            text=text_content,
+            duration=settings.get('outro_text_duration', 5),
+            output_path=text_outro_path,
+            width=params['width'] if params else 1080,
+            height=params['height'] if params else 1920,
+            font_size=settings.get('outro_text_font_size', 60),
+            font_color=settings.get('outro_text_font_color', 'white'),
+            bg_color=settings.get('outro_text_bg_color', 'black'),
+            position=settings.get('outro_text_position', 'center'),
+            animation=settings.get('outro_text_animation', 'fade'),
+            log_callback=log
+        )
+        
+        if not result or not os.path.exists(text_outro_path):
+            log("   ❌ Failed to create text outro")
+            return False
     
     log("   🔗 Concatenating text outro to video...")
     
@@ -106,7 +118,7 @@ def add_append_text_outro(input_video_path, output_video_path, settings, text_co
     
     # Concat videos
     concat_cmd = [
-        'ffmpeg',
+        _get_ffmpeg_path(),
         '-f', 'concat',
         '-safe', '0',
         '-i', concat_list,
@@ -124,9 +136,9 @@ def add_append_text_outro(input_video_path, output_video_path, settings, text_co
     
     success = (result.returncode == 0 and os.path.exists(output_video_path))
     
-    # Cleanup temp files
+    # Cleanup temp files (the cached clip is kept for the next jobs)
     try:
-        if os.path.exists(text_outro_path): os.remove(text_outro_path)
+        if not is_cached_clip and os.path.exists(text_outro_path): os.remove(text_outro_path)
         if os.path.exists(concat_list): os.remove(concat_list)
     except: pass
     
@@ -0,0 +1,270 @@
+"""Text layout + rasterization shared by the text-outro preview and the export
+
+The preview used to load the font from disk and lay the text out on every keystroke,
+while export drew it with ffmpeg drawtext and hard-coded C:/Windows/Fonts paths.
+Both now go through this module:
+  - fonts are resolved once per name (Windows, macOS and Linux font folders) and
+    ImageFont objects are cached per (file, size)
+  - layouts are memoized by (text, style, canvas size)
+  - the text (shadow + optional box) is rendered into an RGBA layer cropped to its
+    bounding box; the preview composites it, export overlays the cached PNG with
+    enable='between(t, start, end)'
+"""
+
+import os
+import sys
+import hashlib
+import threading
+import collections
+
+from config.settings import TEXT_CACHE_DIR
+
+
+# Font files per family name, first existing one wins (Liberation/DejaVu are metric-compatible Linux stand-ins)
+FONT_FILES = {
+    "arial": ["arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSans.ttf"],
+    "segoe ui": ["segoeui.ttf", "DejaVuSans.ttf"],
+    "times new roman": ["times.ttf", "Times New Roman.ttf", "LiberationSerif-Regular.ttf", "DejaVuSerif.ttf"],
+    "tahoma": ["tahoma.ttf", "DejaVuSans.ttf"],
+    "verdana": ["verdana.ttf", "Verdana.ttf", "DejaVuSans.ttf"],
+    "impact": ["impact.ttf", "Impact.ttf", "LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf"],
+}
+DEFAULT_FAMILY = "arial"
+
+COLORS = {
+    'white': (255, 255, 255, 255),
+    'black': (0, 0, 0, 255),
+    'red': (255, 0, 0, 255),
+    'blue': (0, 0, 255, 255),
+    'green': (0, 255, 0, 255),
+    'yellow': (255, 255, 0, 255),
+    'cyan': (0, 255, 255, 255),
+    'magenta': (255, 0, 255, 255)
+}
+BOX_OPACITY = 0.7      # Same as the old drawtext boxcolor=<color>@0.7
+SHADOW_OFFSET = 2
+LAYER_CACHE_SIZE = 32
+
+# Style of one text layer (hashable: part of the cache keys)
+TextStyle = collections.namedtuple(
+    'TextStyle', 'font_name font_size color position box box_color padding'
+)
+TextLayout = collections.namedtuple('TextLayout', 'x y width height offset_x offset_y')
+
+_lock = threading.Lock()
+_font_paths = {}                          # family -> font file or None
+_fonts = {}                               # (font file, size) -> ImageFont
+_layouts = {}                             # (text, font file, size, canvas, position) -> TextLayout
+_layers = collections.OrderedDict()       # (text, style, canvas) -> (RGBA image, x, y)
+_font_dirs = None
+
+
+def text_style_from_settings(settings, scale=1.0):
+    """TextStyle of the outro text from the job/GUI settings (font size scaled for previews)"""
+    return TextStyle(
+        font_name=settings.get('outro_text_font', 'Arial (Mặc định)'),
+        font_size=max(1, int(int(settings.get('outro_text_font_size', 60)) * scale)),
+        color=settings.get('outro_text_font_color', 'white'),
+        position=settings.get('outro_text_position', 'center'),
+        box=bool(settings.get('outro_text_box', False)),
+        box_color=settings.get('outro_text_bg_color', 'black'),
+        padding=max(0, int(int(settings.get('outro_text_box_padding', 15)) * scale))
+    )
+
+
+def font_directories():
+    """System/user font folders of this OS that exist (cached)"""
+    global _font_dirs
+    if _font_dirs is None:
+        dirs = []
+        if sys.platform == 'win32':
+            dirs.append(os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts'))
+            local = os.environ.get('LOCALAPPDATA')
+            if local:
+                dirs.append(os.path.join(local, 'Microsoft', 'Windows', 'Fonts'))
+        elif sys.platform == 'darwin':
+            dirs += ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+        else:
+            dirs += ['/usr/share/fonts', '/usr/local/share/fonts',
+                     os.path.expanduser('~/.local/share/fonts'), os.path.expanduser('~/.fonts')]
+        _font_dirs = [d for d in dirs if os.path.isdir(d)]
+    return _font_dirs
+
+
+def _find_font_file(filename):
+    for directory in font_directories():
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+        # Linux keeps fonts in per-package subfolders
+        for root, _, files in os.walk(directory):
+            if filename in files:
+                return os.path.join(root, filename)
+    return None
+
+
+def resolve_font(font_name):
+    """
+    Font file for a UI font name like "Arial (Mặc định)" (cached per family)
+
+    Returns:
+        str: Absolute font path, or None if no candidate is installed
+    """
+    family = DEFAULT_FAMILY
+    lowered = (font_name or '').lower()
+    for key in FONT_FILES:
+        if key in lowered:
+            family = key
+            break
+
+    with _lock:
+        if family in _font_paths:
+            return _font_paths[family]
+    path = None
+    for filename in FONT_FILES[family]:
+        path = _find_font_file(filename)
+        if path:
+            break
+    with _lock:
+        _font_paths[family] = path
+    return path
+
+
+def get_font(font_name, size):
+    """Cached ImageFont for a UI font name and pixel size"""
+    from PIL import ImageFont
+
+    path = resolve_font(font_name)
+    key = (path, size)
+    with _lock:
+        font = _fonts.get(key)
+    if font is None:
+        try:
+            font = ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+        except Exception as e:
+            print(f"Font load error: {e}")
+            font = ImageFont.load_default()
+        with _lock:
+            _fonts[key] = font
+    return font
+
+
+def parse_color(color, alpha=255):
+    """RGBA tuple for a color name / #hex (None for 'transparent')"""
+    if color == 'transparent':
+        return None
+    if color in COLORS:
+        return COLORS[color][:3] + (alpha,)
+    try:
+        from PIL import ImageColor
+        return ImageColor.getrgb(color)[:3] + (alpha,)
+    except Exception:
+        return (255, 255, 255, alpha)
+
+
+def layout_text(text, style, canvas_w, canvas_h):
+    """
+    Position of the text ink box on the canvas (memoized)
+
+    Returns:
+        TextLayout: x/y/width/height of the ink box, offset_x/offset_y to pass to draw.text
+    """
+    font = get_font(style.font_name, style.font_size)
+    key = (text, resolve_font(style.font_name), style.font_size, canvas_w, canvas_h, style.position)
+    with _lock:
+        layout = _layouts.get(key)
+    if layout is not None:
+        return layout
+
+    from PIL import Image, ImageDraw
+    draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align='center')
+    text_w, text_h = right - left, bottom - top
+
+    x = (canvas_w - text_w) // 2
+    if style.position == 'top':
+        y = canvas_h // 5
+    elif style.position == 'bottom':
+        y = canvas_h * 4 // 5 - text_h
+    else:
+        y = (canvas_h - text_h) // 2
+    layout = TextLayout(x, y, text_w, text_h, -left, -top)
+
+    with _lock:
+        if len(_layouts) > 256:
+            _layouts.clear()
+        _layouts[key] = layout
+    return layout
+
+
+def render_text_layer(text, style, canvas_w, canvas_h):
+    """
+    Text (shadow + optional box) rendered for a canvas, cropped to its bounding box (memoized)
+
+    Returns:
+        tuple: (PIL RGBA image, x, y) - x/y on the canvas, aligned to even pixels
+    """
+    key = (text, style, canvas_w, canvas_h)
+    with _lock:
+        cached = _layers.get(key)
+        if cached is not None:
+            _layers.move_to_end(key)
+            return cached
+
+    from PIL import Image, ImageDraw
+
+    layout = layout_text(text, style, canvas_w, canvas_h)
+    font = get_font(style.font_name, style.font_size)
+    box_rgba = parse_color(style.box_color, int(255 * BOX_OPACITY)) if style.box else None
+    pad = style.padding if box_rgba else 0
+
+    # Layer bounds: ink box + padding + shadow, clipped to the canvas
+    x1 = max(0, layout.x - pad) & ~1
+    y1 = max(0, layout.y - pad) & ~1
+    x2 = min(canvas_w, layout.x + layout.width + max(pad, SHADOW_OFFSET))
+    y2 = min(canvas_h, layout.y + layout.height + max(pad, SHADOW_OFFSET))
+    layer = Image.new('RGBA', (max(1, x2 - x1), max(1, y2 - y1)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+
+    tx, ty = layout.x - x1, layout.y - y1
+    if box_rgba:
+        draw.rectangle([tx - pad, ty - pad, tx + layout.width + pad, ty + layout.height + pad], fill=box_rgba)
+    origin_x, origin_y = tx + layout.offset_x, ty + layout.offset_y
+    draw.multiline_text((origin_x + SHADOW_OFFSET, origin_y + SHADOW_OFFSET), text, font=font, fill=(0, 0, 0, 255), align='center')
+    draw.multiline_text((origin_x, origin_y), text, font=font, fill=parse_color(style.color) or COLORS['white'], align='center')
+
+    result = (layer, x1, y1)
+    with _lock:
+        _layers[key] = result
+        while len(_layers) > LAYER_CACHE_SIZE:
+            _layers.popitem(last=False)
+    return result
+
+
+def text_layer_png(text, style, canvas_w, canvas_h, log_callback=None):
+    """
+    Text layer saved as a PNG for ffmpeg overlay (cached in cache/text by content)
+
+    Returns:
+        tuple: (png_path, x, y), or None if rendering failed (caller falls back to drawtext)
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    try:
+        key = hashlib.sha1(repr((text, tuple(style), canvas_w, canvas_h, resolve_font(style.font_name))).encode('utf-8')).hexdigest()
+        cache_dir = os.path.join(os.getcwd(), TEXT_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        out_path = os.path.join(cache_dir, f"text_{key[:16]}.png")
+
+        layer, x, y = render_text_layer(text, style, canvas_w, canvas_h)
+        if not os.path.exists(out_path):
+            tmp_path = f"{out_path}.{threading.get_ident()}.tmp.png"
+            layer.save(tmp_path, 'PNG')
+            os.replace(tmp_path, out_path)
+            log(f"   🔤 Text layer: {layer.width}x{layer.height} at ({x},{y})")
+        return out_path, x, y
+    except Exception as e:
+        log(f"   ⚠️ Text layer failed, using drawtext: {e}")
+        return None
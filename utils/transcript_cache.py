@@ -0,0 +1,326 @@
+"""Persistent transcript cache
+
+Transcripts are keyed by a fingerprint of the decoded audio of the trimmed
+window plus language, model size and backend. Re-rendering the same source
+with another preset/aspect ratio/sticker reuses the segments (with word
+timings) instead of running Whisper again.
+
+A second, cheaper index maps (source file fingerprint, window) to the audio
+fingerprint, so repeated renders of the same file don't even decode audio.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from config.settings import TRANSCRIPT_CACHE_DIR
+
+
+CACHE_VERSION = 1
+
+# Batch ASR limits (seconds of 16kHz audio held in memory per batch)
+BATCH_MAX_CLIP_SEC = 120
+BATCH_MAX_AUDIO_SEC = 600
+
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_dir():
+    path = os.path.join(os.getcwd(), TRANSCRIPT_CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    # Atomic write: worker threads may write the same key concurrently
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def audio_fingerprint(pcm):
+    """SHA1 of decoded PCM samples (from decode_audio_pcm)"""
+    return hashlib.sha1(pcm).hexdigest()
+
+
+def make_transcript_key(audio_fp, language, model_size, backend, profile=None):
+    """Cache key for one transcript (profile changes decoding, so it is part of the key)"""
+    raw = f"v{CACHE_VERSION}|{audio_fp}|{language or 'auto'}|{model_size}|{backend}|{profile or 'balanced'}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _source_key(video_path, start_time, duration):
+    from .helpers import file_fingerprint
+    file_fp = file_fingerprint(video_path)
+    if not file_fp:
+        return None
+    raw = f"{file_fp}|{float(start_time or 0):.3f}|{float(duration or 0):.3f}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def load_transcript(key):
+    """Return cached segments for key, or None on miss"""
+    data = _read_json(os.path.join(_cache_dir(), f"{key}.json"))
+    if not data or data.get('version') != CACHE_VERSION:
+        return None
+    return data.get('segments')
+
+
+def save_transcript(key, segments, meta=None):
+    """Store segments (list of {'start','end','text','words'}) under key"""
+    data = {
+        'version': CACHE_VERSION,
+        'created': time.time(),
+        'meta': meta or {},
+        'segments': segments or [],
+    }
+    with _CACHE_LOCK:
+        _write_json(os.path.join(_cache_dir(), f"{key}.json"), data)
+
+
+def _lookup_by_source(video_path, start_time, duration, language, model_size, backend, profile):
+    """
+    Fast path: same source file + same window seen before (nothing decoded)
+
+    Returns:
+        tuple: (segments or None, transcript key or None, src index path or None)
+    """
+    src_key = _source_key(video_path, start_time, duration)
+    src_path = os.path.join(_cache_dir(), f"src_{src_key}.json") if src_key else None
+    if src_path:
+        src = _read_json(src_path)
+        if src and src.get('audio_fp'):
+            key = make_transcript_key(src['audio_fp'], language, model_size, backend, profile)
+            return load_transcript(key), key, src_path
+    return None, None, src_path
+
+
+def peek_transcript_cached(video_path, start_time=0, duration=0, language=None,
+                           model_size=None, profile=None):
+    """
+    Cached transcript by source file fingerprint + trim window only
+
+    Runs no ffmpeg at all, so callers can check it before probing the file or
+    running the speech gate.
+
+    Returns:
+        list: Cached segments ([] = cached as no speech), or None on a miss
+    """
+    from .subtitle_generator import get_whisper_backend
+    from .asr_profiles import get_asr_profile
+
+    profile, prof = get_asr_profile(profile)
+    segments, _key, _src_path = _lookup_by_source(video_path, start_time, duration, language,
+                                                  model_size or prof['model_size'],
+                                                  get_whisper_backend(), profile)
+    return segments
+
+
+def _lookup_cached(video_path, start_time, duration, language, model_size, backend, profile, log):
+    """
+    Cache lookup shared by the per-file and batch paths
+
+    Returns:
+        tuple: (segments, pcm, key) - segments is None on a miss, pcm is None
+               on a fast-path hit (nothing decoded) or if decoding failed
+    """
+    from .subtitle_generator import decode_audio_pcm
+
+    # 1. Fast path: same source file + same window seen before
+    segments, key, src_path = _lookup_by_source(video_path, start_time, duration, language,
+                                                model_size, backend, profile)
+    if segments is not None:
+        log(f"   ⚡ Transcript cache HIT ({len(segments)} segments) - skipping Whisper")
+        return segments, None, key
+
+    # 2. Decode the trimmed window once, fingerprint the samples
+    t0 = time.time()
+    pcm = decode_audio_pcm(video_path, start_time=start_time, duration=duration)
+    if not pcm:
+        log(f"   ⚠️ Audio extraction failed: {os.path.basename(video_path)}")
+        return None, None, None
+
+    audio_fp = audio_fingerprint(pcm)
+    if src_path:
+        try:
+            with _CACHE_LOCK:
+                _write_json(src_path, {'audio_fp': audio_fp})
+        except OSError:
+            pass
+
+    key = make_transcript_key(audio_fp, language, model_size, backend, profile)
+    segments = load_transcript(key)
+    if segments is not None:
+        log(f"   ⚡ Transcript cache HIT by audio fingerprint ({len(segments)} segments, {time.time() - t0:.2f}s)")
+        return segments, None, key
+
+    log(f"   🎵 Audio decoded ({len(pcm) / 32000:.1f}s) - transcript cache MISS")
+    return None, pcm, key
+
+
+def get_transcript_cached(video_path, start_time=0, duration=0, language=None,
+                          model_size=None, log_callback=None, profile=None):
+    """
+    Transcribe the trimmed window of a video, going through the transcript cache
+
+    On a hit, no audio is extracted and no model is loaded.
+
+    Args:
+        video_path: Path to video file
+        start_time: Trim start in seconds (same as the export)
+        duration: Trim length in seconds (0 = until end of file)
+        language: Language code or None for auto-detect
+        model_size: Whisper model size (None = the profile's model)
+        log_callback: Optional callback function for logging
+        profile: Inference profile ('draft', 'balanced', 'accurate')
+
+    Returns:
+        list: Segments with word timings ([] if no speech), or None on error
+    """
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    from .subtitle_generator import get_whisper_backend, write_wav_pcm, transcribe_with_whisper
+    from .asr_profiles import get_asr_profile
+
+    backend = get_whisper_backend()
+    profile, prof = get_asr_profile(profile)
+    model_size = model_size or prof['model_size']
+
+    segments, pcm, key = _lookup_cached(video_path, start_time, duration, language,
+                                        model_size, backend, profile, log)
+    if segments is not None or pcm is None:
+        return segments
+
+    # Miss: reuse the decoded samples for Whisper instead of extracting again
+    audio_temp = os.path.join(_cache_dir(), f"temp_audio_{threading.get_ident()}.wav")
+    try:
+        write_wav_pcm(pcm, audio_temp)
+        segments, info = transcribe_with_whisper(audio_temp, language=language,
+                                                 model_size=model_size, log_callback=log_callback,
+                                                 profile=profile)
+    finally:
+        if os.path.exists(audio_temp):
+            try:
+                os.remove(audio_temp)
+            except OSError:
+                pass
+
+    if segments is None:
+        return None
+
+    # Whisper may downgrade the model on low RAM - only cache under the model actually used
+    if info and info.get('model_size') == model_size:
+        try:
+            save_transcript(key, segments, meta={
+                'source': os.path.basename(video_path),
+                'language': language or 'auto',
+                'detected_language': info.get('language'),
+                'model_size': model_size,
+                'backend': backend,
+                'profile': profile,
+            })
+        except OSError as e:
+            log(f"   ⚠️ Could not write transcript cache: {e}")
+    return segments
+
+
+def get_transcripts_batched(jobs, language=None, profile=None, log_callback=None,
+                            max_workers=4, batch_size=8):
+    """
+    Cross-file batch transcription for many short clips
+
+    Audio of all jobs is decoded in parallel (cache hits skip decoding),
+    misses are transcribed together by transcribe_batch_with_whisper() and
+    written back to the cache.
+
+    Args:
+        jobs: List of (job_key, video_path, start_time, duration)
+        language: Language code or None for auto-detect (once per batch)
+        profile: Inference profile ('draft', 'balanced', 'accurate')
+        log_callback: Optional callback function for logging
+        max_workers: Parallel audio decodes
+        batch_size: Whisper windows decoded together
+
+    Returns:
+        dict: {job_key: segments} - jobs missing from the dict (too long,
+              decode error, batch unavailable) should use get_transcript_cached()
+    """
+    import concurrent.futures
+
+    def log(msg):
+        if log_callback:
+            log_callback(msg)
+
+    from .subtitle_generator import get_whisper_backend, transcribe_batch_with_whisper
+    from .asr_profiles import get_asr_profile
+
+    backend = get_whisper_backend()
+    profile, prof = get_asr_profile(profile)
+    model_size = prof['model_size']
+
+    results = {}
+    misses = []  # (job_key, pcm, cache_key, video_path)
+
+    def lookup(job):
+        job_key, video_path, start_time, duration = job
+        segments, pcm, key = _lookup_cached(video_path, start_time, duration, language,
+                                            model_size, backend, profile, log)
+        return job_key, video_path, segments, pcm, key
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for job_key, video_path, segments, pcm, key in executor.map(lookup, jobs):
+            if segments is not None:
+                results[job_key] = segments
+            elif pcm and len(pcm) / 32000 <= BATCH_MAX_CLIP_SEC:
+                misses.append((job_key, pcm, key, video_path))
+
+    log(f"   📦 Batch ASR: {len(results)} cached, {len(misses)} to transcribe")
+
+    # Group misses so one batch never holds more than BATCH_MAX_AUDIO_SEC of audio
+    groups, group, group_sec = [], [], 0.0
+    for miss in misses:
+        sec = len(miss[1]) / 32000
+        if group and group_sec + sec > BATCH_MAX_AUDIO_SEC:
+            groups.append(group)
+            group, group_sec = [], 0.0
+        group.append(miss)
+        group_sec += sec
+    if group:
+        groups.append(group)
+
+    for group in groups:
+        batch = transcribe_batch_with_whisper(
+            [(job_key, pcm) for job_key, pcm, _, _ in group],
+            language=language, profile=profile, batch_size=batch_size, log_callback=log_callback
+        )
+        if batch is None:
+            break  # Batched inference unavailable - remaining files go per-file
+        for job_key, _pcm, key, video_path in group:
+            segments = batch.get(job_key, [])
+            results[job_key] = segments
+            try:
+                save_transcript(key, segments, meta={
+                    'source': os.path.basename(video_path),
+                    'language': language or 'auto',
+                    'model_size': model_size,
+                    'backend': backend,
+                    'profile': profile,
+                    'batched': True,
+                })
+            except OSError as e:
+                log(f"   ⚠️ Could not write transcript cache: {e}")
+
+    return results
@@ -15,7 +15,7 @@ import psutil # For priority management
 CONCAT_LOCK = threading.Lock()
 
 
-def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None, log_callback=None, progress_callback=None, check_stop_signal=None):
+def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None, log_callback=None, progress_callback=None, check_stop_signal=None, subtitles=None):
     """
     Process video entirely with FFmpeg - ULTRA FAST
     
@@ -23,9 +23,10 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
         input_path: Input video path
         output_path: Output video path
         settings: Dict with video settings (blur, brightness, zoom, speed, etc.)
-        srt_file: Optional SRT subtitle file path
+        srt_file: Optional external SRT subtitle file path (styled with force_style)
         log_callback: Optional callback function for logging
         progress_callback: Optional callback function for progress updates (0-100)
+        subtitles: Optional SubtitleTrack (burned in from its styled ASS file, takes precedence over srt_file)
         
     Returns:
         bool: True if successful, False otherwise
@@ -96,10 +97,9 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     # if enable_blur and blur_amount > 0:
     #     filters.append(f"boxblur={blur_amount}:{blur_amount}")
     
-    # 5. Brightness
+    # 5. Brightness (baked into the colour LUT, see 7b)
     enable_brightness = settings.get('enable_brightness', True)
-    if enable_brightness and brightness != 1.0:
-        filters.append(f"eq=brightness={brightness-1.0}")
+    lut_brightness = brightness if enable_brightness else 1.0
     
     # 6. Subtitles
     # TEMPORARY: Disable subtitles when blur background is enabled (filter chain conflict)
@@ -107,14 +107,27 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     blur_amount_check = settings.get('blur_amount', 0)
     
     subtitle_cmd = None
-    if srt_file and os.path.exists(srt_file):
+    subtitle_file = None
+    if subtitles:
+        # In-memory track -> ASS with the style in its header (cached by content next to the transcripts)
+        from utils.subtitle_model import subtitle_style_from_settings
+        subtitle_file = subtitles.write_ass(subtitle_style_from_settings(settings), log_callback=log_callback)
+    elif srt_file and os.path.exists(srt_file):
+        subtitle_file = srt_file
+    
+    if subtitle_file:
         # Use Absolute Path and Escape for FFmpeg Filter
-        abs_srt_path = os.path.abspath(srt_file)
+        abs_srt_path = os.path.abspath(subtitle_file)
         # Windows path: C:\path\to\file -> C\:/path/to/file (FFmpeg filter syntax)
         # Escape colon to prevent it being treated as option separator
         srt_escaped = abs_srt_path.replace('\\', '/').replace(':', '\\:')
         
-        subtitle_cmd = f"subtitles=filename='{srt_escaped}':force_style='FontSize={subtitle_font_size},PrimaryColour=&H{subtitle_color},OutlineColour=&H000000,Outline={subtitle_outline},Bold=1,Alignment=2'"
+        # fontsdir: bundled assets/fonts; system fonts come from the shared fontconfig cache (subtitle_fonts)
+        from utils.subtitle_fonts import fontsdir_option
+        subtitle_cmd = f"subtitles=filename='{srt_escaped}'{fontsdir_option()}"
+        if not subtitles:
+            # External SRT has no style section
+            subtitle_cmd += f":force_style='FontSize={subtitle_font_size},PrimaryColour=&H{subtitle_color},OutlineColour=&H000000,Outline={subtitle_outline},Bold=1,Alignment=2'"
 
     # 7. Scale (Transform Layer) - READ ONLY here, apply later
     scale_w = float(settings.get('scale_w', 1.0))
@@ -123,34 +136,12 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     # MOVED: filters.append(f"scale=iw*{scale_w}:ih*{scale_h}") 
     # Reason: We need to apply scale differently for BG and FG in Blur mode.
         
-    # 7b. Color Filters (NEW)
+    # 7b. Color Filters + Brightness: one 3D LUT (same tables as the preview, see utils/color_lut.py)
+    from .color_lut import parse_color_filter, lut3d_filter
     color_filter = settings.get('color_filter', 'None')
-    c_cmd = "" # Initialize here to prevent NameError later
-    if color_filter and "None" not in color_filter:
-        if "Đen Trắng" in color_filter or "B&W" in color_filter: 
-            c_cmd = "hue=s=0"
-        elif "Sepia" in color_filter or "Cổ điển" in color_filter: 
-            c_cmd = "colorchannelmixer=.393:.769:.189:0:.349:.686:.168:0:.272:.534:.131"
-        elif "Vintage" in color_filter or "Phim cũ" in color_filter: 
-            c_cmd = "eq=contrast=1.1:brightness=-0.05:saturation=0.8,colorbalance=rs=0.1:gs=-0.05:bs=-0.1"
-        elif "Cold" in color_filter or "Lạnh" in color_filter: 
-            c_cmd = "colorbalance=rs=-0.2:gs=-0.1:bs=0.3,eq=saturation=1.2"
-        elif "Warm" in color_filter or "Ấm" in color_filter: 
-            c_cmd = "colorbalance=rs=0.3:gs=-0.1:bs=-0.3,eq=saturation=1.1"
-        elif "Vivid" in color_filter or "Rực rỡ" in color_filter:
-            c_cmd = "eq=saturation=1.5:contrast=1.1"
-        elif "Cinematic" in color_filter or "Điện ảnh" in color_filter:
-            # Teal & Orange look
-            c_cmd = "colorbalance=rs=-0.1:bs=0.2:rh=0.2:bh=-0.1,eq=contrast=1.1:saturation=1.1"
-        elif "Dreamy" in color_filter or "Mộng mơ" in color_filter:
-            c_cmd = "colorbalance=rs=0.1:bs=0.1,eq=contrast=0.9:brightness=0.05:saturation=0.8"
-        elif "Dramatic" in color_filter or "Kịch tính" in color_filter:
-            c_cmd = "eq=contrast=1.3:saturation=0.6:brightness=-0.05"
-        elif "Cyberpunk" in color_filter:
-            # Neon Blue/Purple vibe
-            c_cmd = "colorbalance=rs=-0.2:gs=-0.1:bs=0.4:rh=0.2:gh=-0.1:bh=0.2,eq=contrast=1.2:saturation=1.4"
-        if c_cmd:
-            filters.append(c_cmd)
+    c_cmd = lut3d_filter(parse_color_filter(color_filter), lut_brightness)
+    if c_cmd:
+        filters.append(c_cmd)
         
     # 7c. Subtitle Bar (Black Box)
     drawbox_filter = None
@@ -161,7 +152,9 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
 
     # 7d. Text Outro (NEW)
     text_outro_filter = None
-    if settings.get('enable_outro_text', False):
+    text_outro_window = None  # (content, start, end): rendered as a PNG overlay once the output size is known
+    # Append mode adds the text as a separate clip after encoding (text_outro_helper)
+    if settings.get('enable_outro_text', False) and settings.get('outro_text_style', 'overlay') != 'append':
         content = settings.get('outro_text_content', '')
         end_dur = int(settings.get('outro_text_duration', 5))
         
@@ -191,34 +184,21 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
                 # Escape: ' -> \', : -> \:
                 safe_content = content.replace("'", "'\''").replace(":", "\:")
                 
-                # Font selection
-                font_name = settings.get('outro_text_font', 'Arial (Mặc định)')
-                font_path = "C:/Windows/Fonts/arial.ttf" # Default
+                text_outro_window = (content, start_t, total_dur)
                 
-                # Map names to Windows Font Paths
-                font_map = {
-                    "arial": "C:/Windows/Fonts/arial.ttf",
-                    "segoe ui": "C:/Windows/Fonts/segoeui.ttf", 
-                    "times new roman": "C:/Windows/Fonts/times.ttf",
-                    "tahoma": "C:/Windows/Fonts/tahoma.ttf",
-                    "verdana": "C:/Windows/Fonts/verdana.ttf",
-                    "impact": "C:/Windows/Fonts/impact.ttf"
-                }
-                
-                # Case insensitive match
-                for key, path in font_map.items():
-                    if key in font_name.lower():
-                        font_path = path
-                        break
-                
-                escaped_font_path = font_path.replace(':', '\\:')
-                font_arg = f":fontfile='{escaped_font_path}'"
+                # Font selection (same font file as the preview / PNG layer)
+                from utils.text_raster import resolve_font
+                font_path = resolve_font(settings.get('outro_text_font', 'Arial (Mặc định)'))
+                font_arg = ""
+                if font_path:
+                    escaped_font_path = font_path.replace('\\', '/').replace(':', '\\:')
+                    font_arg = f":fontfile='{escaped_font_path}'"
                 
                 # Get customizable settings
                 fontsize = int(settings.get('outro_text_font_size', 60))
                 fontcolor = settings.get('outro_text_font_color', 'white')
                 
-                # Position logic
+                # Position logic (bottom: text ends at 4/5 of the height, like the preview)
                 pos_mode = settings.get('outro_text_position', 'center')
                 x_expr = "(w-text_w)/2"
                 y_expr = "(h-text_h)/2"
@@ -226,7 +206,7 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
                 if pos_mode == 'top':
                     y_expr = "h/5"
                 elif pos_mode == 'bottom':
-                    y_expr = "h-h/5"
+                    y_expr = "h*4/5-text_h"
                 
                 # Box/Background logic - Build box parameters FIRST
                 box_params = ""
@@ -467,9 +447,14 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     # Check if we already have a complex filter (from blur background)
     has_complex_filter = vf and (';' in vf or 'split[' in vf)
     
+    # Final frame size is target_w x target_h, except "Original" + scale (iw*scale_w changes it at runtime).
+    # Pixel-positioned layers (static sticker layer, text PNG) need it; otherwise use W/H overlay expressions
+    output_size_known = target_w > 0 and ("Original" not in ratio_str or (scale_w == 1.0 and scale_h == 1.0))
+    
     # Process Multiple Stickers
     # Initialize output label variable in outer scope - CRITICAL for preventing UnboundLocalError
     final_output_label = None
+    sticker_inputs = []  # FFmpeg input args per sticker, in filter input order
 
     if enable_sticker and stickers_list:
         # Helper to format float to string for FFmpeg (avoid scientific notation)
@@ -492,6 +477,26 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             vf = ""
             has_complex_filter = True
         
+        # Consecutive static stickers are collected here and overlaid as one pre-composited layer
+        pending_static = []
+        
+        def flush_static_stickers():
+            nonlocal current_label
+            if not pending_static:
+                return
+            from utils.sticker_assets import static_sticker_position, composite_static_stickers
+            layers = [(a['path'],) + static_sticker_position(pos, sx, sy, target_w, target_h, a['width'], a['height'])
+                      for a, pos, sx, sy in pending_static]
+            layer = composite_static_stickers(layers, target_w, target_h, log_callback) if len(layers) > 1 else None
+            for path, x, y in ([layer] if layer else layers):
+                # Single RGBA frame: decoded once, overlay repeats it until the video ends
+                input_idx = len(sticker_inputs) + 1
+                sticker_inputs.append(['-i', path])
+                out_label = f"v{len(sticker_filters)+1}"
+                sticker_filters.append(f"[{current_label}][{input_idx}:v]overlay={x}:{y}:eof_action=repeat[{out_label}]")
+                current_label = out_label
+            pending_static.clear()
+        
         # Add each sticker as overlay
         for i, sticker in enumerate(stickers_list):
             sticker_path = sticker.get('path', '')
@@ -505,7 +510,6 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             
             # Create unique labels
             stk_label = f"stk{i}"
-            next_label = f"v{i+1}" if i < len(stickers_list)-1 else "vout"
             
             # Determine Position based on 'pos' string or 'x/y' coordinates
             margin = 20
@@ -539,20 +543,47 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             x_expr = calc_x
             y_expr = calc_y
             
-            # FFmpeg input index for this sticker (starts at 1, since 0 is video)
-            sticker_input_idx = i + 1 
-            
             # Build overlay filter for this sticker
             # OPTIMIZATION: If we know target_w/h, use simple 'scale' instead of 'scale2ref'
             # This is much more stable and avoids "Invalid Argument" errors
             use_simple_scale = (isinstance(target_w, int) and target_w > 0 and 
                                 isinstance(target_h, int) and target_h > 0)
             
+            asset = None
             if use_simple_scale:
                 # Calculate sticker width in Python (Force Even)
                 stk_w_px = int(target_w * float(s_scale))
                 if stk_w_px % 2 != 0: stk_w_px += 1
                 
+                # Pre-scaled asset (cached per sticker content + width): no per-frame format/scale
+                from utils.sticker_assets import prepare_sticker_asset
+                asset = prepare_sticker_asset(sticker_path, stk_w_px, ffmpeg_path, log_callback)
+            
+            if asset and not asset['animated'] and output_size_known:
+                pending_static.append((asset, s_pos, s_x, s_y))
+                continue
+            
+            # Animated / original / unknown-size sticker: static ones collected so far go below it
+            flush_static_stickers()
+            
+            # FFmpeg input index for this sticker (starts at 1, since 0 is video)
+            sticker_input_idx = len(sticker_inputs) + 1
+            next_label = f"v{len(sticker_filters)+1}"
+            
+            if asset and not asset['animated']:
+                # Pre-scaled PNG on a frame of unknown size: placed with the runtime W/H expressions
+                sticker_inputs.append(['-i', asset['path']])
+                sticker_filter = (
+                    f"[{current_label}][{sticker_input_idx}:v]overlay={x_expr}:{y_expr}:eof_action=repeat[{next_label}]"
+                )
+            elif asset:
+                # Pre-scaled yuva420p loop
+                sticker_inputs.append(['-stream_loop', '-1', '-i', asset['path']])
+                sticker_filter = (
+                    f"[{current_label}][{sticker_input_idx}:v]overlay={x_expr}:{y_expr}:shortest=1[{next_label}]"
+                )
+            elif use_simple_scale:
+                sticker_inputs.append(['-stream_loop', '-1', '-i', sticker_path])
                 sticker_filter = (
                     f"[{sticker_input_idx}:v]format=yuva420p,scale={stk_w_px}:-2[{stk_label}];"
                     f"[{current_label}][{stk_label}]overlay={x_expr}:{y_expr}:shortest=1[{next_label}]"
@@ -560,6 +591,7 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             else:
                 # Fallback for "Original" mode (unknown resolution)
                 # Force Even Dimensions: Width truncated to even, Height auto even (-2)
+                sticker_inputs.append(['-stream_loop', '-1', '-i', sticker_path])
                 sticker_filter = (
                     f"[{sticker_input_idx}:v]format=yuva420p[{stk_label}_alpha];"
                     f"[{stk_label}_alpha][{current_label}]scale2ref=w=trunc(rw*{flt(s_scale)}/2)*2:h=-2[{stk_label}][bg{i}];"
@@ -569,8 +601,12 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             sticker_filters.append(sticker_filter)
             current_label = next_label
         
+        flush_static_stickers()
+        
         # Combine all sticker filters
         if sticker_filters:
+            # Last overlay writes the chain output [vout]
+            sticker_filters[-1] = sticker_filters[-1][:-len(f"[{current_label}]")] + "[vout]"
             if vf:
                 vf = vf + ";" + ";".join(sticker_filters)
             else:
@@ -578,6 +614,17 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             
             final_output_label = "vout"
 
+    # Text outro as a pre-rendered PNG layer (same rasterizer as the preview) when the output size is known;
+    # drawtext stays the fallback
+    text_outro_overlay = None
+    if text_outro_window and output_size_known:
+        from utils.text_raster import text_style_from_settings, text_layer_png
+        content, start_t, end_t = text_outro_window
+        layer = text_layer_png(content, text_style_from_settings(settings), target_w, target_h, log_callback)
+        if layer:
+            text_outro_overlay = layer + (start_t, end_t)
+            text_outro_filter = None
+    
     # Append Drawbox and Text Outro (Independent overlays)
     extra_filters = []
     if drawbox_filter: extra_filters.append(drawbox_filter)
@@ -605,6 +652,21 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
                 vf = extra_chain
 
     
+    if text_outro_overlay:
+        png_path, tx, ty, start_t, end_t = text_outro_overlay
+        sticker_inputs.append(['-i', png_path])
+        text_input_idx = len(sticker_inputs)  # Input 0 is the video
+        text_overlay = f"[{text_input_idx}:v]overlay={tx}:{ty}:eof_action=repeat:enable='between(t,{start_t},{end_t})'[v_text]"
+        if final_output_label:
+            vf = f"{vf};[{final_output_label}]{text_overlay}"
+        elif has_complex_filter or (vf and vf.endswith("[v_main]")):
+            vf = f"{vf};[v_main]{text_overlay}"
+        elif vf:
+            vf = f"[0:v]{vf}[v_pre];[v_pre]{text_overlay}"
+        else:
+            vf = f"[0:v]{text_overlay}"
+        final_output_label = "v_text"
+    
     # Append Subtitles LAST (After everything including Sticker and Black Bar)
     if subtitle_cmd:
         if vf:
@@ -651,13 +713,10 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     cmd.extend(['-i', input_path])
     
     # NEW: Add Multiple Sticker Inputs if enabled
-    if enable_sticker and stickers_list:
-        for sticker in stickers_list:
-            sticker_path = sticker.get('path', '')
-            if sticker_path and os.path.exists(sticker_path):
-                # Use -stream_loop -1 for infinite looping of sticker (works with GIF/PNG)
-                # This prevents shortest=1 from cutting output to 1 frame when using sticker
-                cmd.extend(['-stream_loop', '-1', '-i', sticker_path])
+    # Originals use -stream_loop -1 (works with GIF/PNG) so shortest=1 doesn't cut output to 1 frame;
+    # static pre-scaled assets are a single frame repeated by overlay (eof_action=repeat)
+    for sticker_input in sticker_inputs:
+        cmd.extend(sticker_input)
         
     if duration:
         cmd.extend(['-t', str(duration)])
@@ -675,6 +734,9 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             # Complex filter (blur background) - output is [v_main] or [v_final] if drawbox
             output_label = final_output_label if final_output_label else "v_main"
             cmd.extend(['-map', f'[{output_label}]'])
+        elif final_output_label:
+            # Simple filters + text layer / subtitles chained by label
+            cmd.extend(['-map', f'[{final_output_label}]'])
         # else: simple filters, FFmpeg auto-maps
     
     if af:
@@ -769,7 +831,16 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
     if sys.platform == 'win32':
         creation_flags = subprocess.CREATE_NO_WINDOW | 0x00004000 # BELOW_NORMAL_PRIORITY_CLASS
     
+    # Subtitles: libass/fontconfig use the shared pre-warmed font cache
+    ffmpeg_env = None
+    if subtitle_cmd:
+        from utils.subtitle_fonts import subtitle_env
+        ffmpeg_env = subtitle_env()
+    
+    import time
+    
     # Needs explicit path check for Popen on Windows sometimes, but usually fine
+    spawn_time = time.perf_counter()
     process = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
@@ -777,12 +848,13 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
         universal_newlines=True, # Text mode
         encoding='utf-8',
         errors='ignore',
-        creationflags=creation_flags
+        creationflags=creation_flags,
+        env=ffmpeg_env
     )
+    first_frame_logged = False
     
     # Read stderr for progress
     last_log_time = 0
-    import time
     
     # Initialize output queue for thread-safe communication
     output_queue = queue.Queue()
@@ -826,6 +898,12 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
             break
             
         if line:
+            # Start-up cost of the job (includes subtitle filter / font init)
+            if not first_frame_logged and "frame=" in line:
+                first_frame_logged = True
+                if subtitle_cmd:
+                    log(f"   ⏱️ Khởi tạo filter phụ đề: {time.perf_counter() - spawn_time:.2f}s đến frame đầu")
+            
             # Try to get Duration if not known
             if duration_sec == 0 and "Duration:" in line:
                 try:
@@ -899,7 +977,7 @@ def process_video_with_ffmpeg(input_path, output_path, settings, srt_file=None,
         return process_video_with_ffmpeg(
             input_path, output_path, settings_cpu, 
             srt_file=srt_file, log_callback=log_callback, progress_callback=progress_callback,
-            check_stop_signal=check_stop_signal
+            check_stop_signal=check_stop_signal, subtitles=subtitles
         )
     
     if returncode != 0:
@@ -1224,6 +1302,15 @@ def get_video_info(video_path):
             
             info['width'] = w
             info['height'] = h
+
+        # Codec name (e.g. h264, hevc) - used to decide on preview proxies
+        codec_match = re.search(r'Stream #.*?: Video: (\w+)', output)
+        if codec_match:
+            info['video_codec'] = codec_match.group(1)
+
+        fps_match = re.search(r'Stream #.*?: Video:.*?(\d+(?:\.\d+)?) fps', output)
+        if fps_match:
+            info['fps'] = float(fps_match.group(1))
             
         # Regex to find Audio Stream
         if re.search(r'Stream #.*?: Audio:', output):